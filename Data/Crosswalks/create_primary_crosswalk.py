@@ -1,29 +1,17 @@
 #!/usr/bin/env python3
-"""Create primary ZCTA-County crosswalk (largest area overlap)"""
+"""Create primary ZCTA-County crosswalk (largest area overlap)
 
-import csv
-from collections import defaultdict
+Thin wrapper around Scripts/zcta_crosswalk.py, which reads
+zcta_county_full.csv into memory, groups it with one sort, stores the result
+as the memory-mapped zcta_county.xwalk/ (primary county plus area weights),
+and writes zcta_county_primary.csv from it.
+"""
 
-# Read full crosswalk
-zcta_counties = defaultdict(list)
-with open('zcta_county_full.csv', 'r') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        zcta = row['zcta']
-        county_fips = row['county_fips']
-        county_name = row['county_name']
-        area = int(row['area_land']) if row['area_land'] else 0
-        zcta_counties[zcta].append((area, county_fips, county_name))
+import sys
+from pathlib import Path
 
-# Write primary crosswalk (county with largest area)
-with open('zcta_county_primary.csv', 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['zcta', 'county_fips', 'county_name'])
-    for zcta in sorted(zcta_counties.keys()):
-        counties = zcta_counties[zcta]
-        # Sort by area descending, pick first
-        counties.sort(key=lambda x: x[0], reverse=True)
-        area, county_fips, county_name = counties[0]
-        writer.writerow([zcta, county_fips, county_name])
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
 
-print(f"Created primary crosswalk with {len(zcta_counties)} ZCTAs")
+from zcta_crosswalk import main
+
+main()
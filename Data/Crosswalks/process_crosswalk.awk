@@ -1,3 +1,5 @@
+# First row per ZCTA wins, so the result depends on the input order.
+# Superseded by Scripts/zcta_crosswalk.py (largest land area, order-free).
 BEGIN { FS=","; OFS="," }
 NR==1 { print "zcta", "county_fips", "county_name"; next }
 $1 != prev { print $1, $2, $3; prev=$1 }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Build All Paper Figures
+Purpose: Render every figure declared by the plot_*.py scripts in this folder,
+         in parallel worker processes on the headless Agg backend, and skip
+         figures whose inputs, style and plotting code are unchanged since the
+         last build.
+Date: October 2026
+
+Usage:
+    python build_figures.py              # render changed figures
+    python build_figures.py --force      # render everything
+    python build_figures.py --jobs 4     # number of worker processes
+    python build_figures.py event_study  # only the named figures
+
+Requirements:
+    - matplotlib, numpy, pandas
+
+Input files:
+    - Output/plot_*.py  (each defines FIGURES, a list of
+                         {'name', 'draw', 'inputs', 'style'} entries)
+    - the CSV files listed in each figure's 'inputs'
+
+Output files:
+    - Output/<name>.png, Output/<name>.pdf for every figure
+    - Output/.figure_cache.json  (build hash of each figure)
+
+Notes:
+    - A figure's build hash covers the bytes of its input files, its style
+      dict, any 'params' entry and the source of the script defining it, so
+      editing a plot script re-renders only that script's figures.
+    - Each figure is drawn under plt.rc_context(style); scripts no longer
+      change the global rcParams at import time.
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+# Set paths
+OUTPUT_DIR = Path(__file__).resolve().parent
+CACHE_FILE = OUTPUT_DIR / ".figure_cache.json"
+FORMATS = ('png', 'pdf')
+
+
+def _sha256_file(path, h):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+
+def figure_hash(fig, source_file):
+    """Build hash of one figure: input bytes, style, params and script source."""
+    h = hashlib.sha256()
+    h.update(json.dumps({'name': fig['name'], 'style': fig.get('style', {}),
+                         'params': fig.get('params', {})},
+                        sort_keys=True, default=str).encode())
+    _sha256_file(source_file, h)
+    for p in fig.get('inputs', []):
+        p = OUTPUT_DIR / p
+        h.update(str(p.name).encode())
+        if p.exists():
+            _sha256_file(p, h)
+    return h.hexdigest()
+
+
+def outputs_exist(name):
+    return all((OUTPUT_DIR / f"{name}.{ext}").exists() for ext in FORMATS)
+
+
+def read_cache():
+    return json.loads(CACHE_FILE.read_text()) if CACHE_FILE.exists() else {}
+
+
+def write_cache(cache):
+    tmp = CACHE_FILE.with_suffix('.tmp')
+    tmp.write_text(json.dumps(cache, indent=1, sort_keys=True))
+    tmp.replace(CACHE_FILE)
+
+
+def render(fig_spec):
+    """Draw one figure under its style, save PNG and PDF; returns seconds."""
+    start = time.perf_counter()
+    with plt.rc_context(fig_spec.get('style', {})):
+        fig = fig_spec['draw']()
+        for ext in FORMATS:
+            fig.savefig(OUTPUT_DIR / f"{fig_spec['name']}.{ext}", dpi=300,
+                        bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def _render_in_worker(module_name, index):
+    """Process-pool entry point: import the plot script and render one figure."""
+    if str(OUTPUT_DIR) not in sys.path:
+        sys.path.insert(0, str(OUTPUT_DIR))
+    module = importlib.import_module(module_name)
+    return render(module.FIGURES[index])
+
+
+def discover():
+    """(module name, index, figure, source file) for every plot_*.py figure."""
+    if str(OUTPUT_DIR) not in sys.path:
+        sys.path.insert(0, str(OUTPUT_DIR))
+    found = []
+    for path in sorted(OUTPUT_DIR.glob("plot_*.py")):
+        module = importlib.import_module(path.stem)
+        for i, fig in enumerate(getattr(module, 'FIGURES', [])):
+            found.append((path.stem, i, fig, path))
+    return found
+
+
+def stale(entries, cache, force=False):
+    """Entries whose build hash changed or whose outputs are missing."""
+    todo = []
+    for entry in entries:
+        fig, source = entry[2], entry[3]
+        h = figure_hash(fig, source)
+        if force or cache.get(fig['name']) != h or not outputs_exist(fig['name']):
+            todo.append((entry, h))
+    return todo
+
+
+def render_all(figures, force=False):
+    """Render a script's own FIGURES in this process (used by plot_*.py __main__)."""
+    cache = read_cache()
+    entries = [(None, i, fig, Path(inspect.getsourcefile(fig['draw'])))
+               for i, fig in enumerate(figures)]
+    todo = stale(entries, cache, force)
+    for entry, h in todo:
+        fig = entry[2]
+        seconds = render(fig)
+        cache[fig['name']] = h
+        print(f"  {fig['name']:<28s} {seconds:6.2f}s")
+    print(f"  ({len(entries) - len(todo)} up to date)")
+    write_cache(cache)
+
+
+def build(names=None, force=False, jobs=None):
+    """Render every stale figure in parallel worker processes."""
+    entries = discover()
+    if names:
+        unknown = set(names) - {e[2]['name'] for e in entries}
+        if unknown:
+            raise SystemExit(f"Unknown figure(s): {', '.join(sorted(unknown))}")
+        entries = [e for e in entries if e[2]['name'] in names]
+
+    cache = read_cache()
+    todo = stale(entries, cache, force)
+    print(f"{len(entries)} figures, {len(todo)} to render, "
+          f"{len(entries) - len(todo)} up to date")
+
+    start = time.perf_counter()
+    failed = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs or min(len(todo), os.cpu_count())) as pool:
+            futures = {pool.submit(_render_in_worker, entry[0], entry[1]): (entry, h)
+                       for entry, h in todo}
+            for future in as_completed(futures):
+                entry, h = futures[future]
+                name = entry[2]['name']
+                try:
+                    seconds = future.result()
+                except Exception as exc:
+                    failed.append(name)
+                    print(f"  {name:<28s} FAILED: {exc!r}")
+                    continue
+                cache[name] = h
+                print(f"  {name:<28s} {seconds:6.2f}s")
+        write_cache(cache)
+
+    print(f"\nTotal wall time: {time.perf_counter() - start:.2f}s")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the paper figures.")
+    parser.add_argument('names', nargs='*', help="figures to build (default: all)")
+    parser.add_argument('--force', action='store_true', help="ignore the build cache")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BUILDING FIGURES")
+    print("=" * 60)
+
+    failed = build(args.names, force=args.force, jobs=args.jobs)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,31 @@
 """
 Specification Curve Plot
 Publication-quality visualization of robustness across model specifications
+
+Usage:
+    python plot_specification_curve.py [--input specification_curve.csv]
+                                       [--max-detailed 500] [--max-points 0]
+
+All specifications are drawn with a handful of collection calls (one scatter
+per significance class, one LineCollection for the CIs, one call for the
+indicator matrix), so the cost does not grow with Python-level loops. Above
+--max-detailed specs the plot switches to density rendering: small rasterized
+markers, rasterized CI segments and an image for the indicator matrix, which
+keeps the PDF small. --max-points > 0 additionally downsamples to that many
+evenly spaced specs (the baseline is always kept).
 """
 
+import argparse
+from pathlib import Path
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 
-# Set publication-quality style
-plt.rcParams.update({
+# Publication-quality style (applied per figure by build_figures.py)
+STYLE = {
     'font.family': 'serif',
     'font.size': 11,
     'axes.labelsize': 12,
@@ -22,47 +39,22 @@ plt.rcParams.update({
     'savefig.bbox': 'tight',
     'axes.spines.top': False,
     'axes.spines.right': False,
-})
-
-# Data from Stata output
-data = {
-    'spec_id': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
-    'spec_desc': [
-        'No FE, robust',
-        'Year FE, robust',
-        'MergerID FE, robust',
-        'MergerID+Year FE, robust',
-        'County FE, robust',
-        'BASELINE: MergerID+Year,\ncounty cluster',
-        'MergerID+Year FE,\nmergerID cluster',
-        'County+Year FE,\ncounty cluster',
-        'Alternative outcome\n(anytouse)',
-        'Pre-2012 sample',
-        'Post-2012 sample',
-        'Individual+Year FE'
-    ],
-    'coef': [0.0479, 0.0338, 0.7262, 0.8224, -0.0824, 0.8224, 0.8224, -0.0853, -2.3878, 0.4859, 1.6050, -0.4494],
-    'se': [0.1225, 0.1230, 0.5927, 0.5859, 0.1288, 0.3617, 0.3396, 0.1343, 3.4779, 0.7251, 0.8526, 0.9690],
-    'pval': [0.696, 0.784, 0.221, 0.161, 0.522, 0.027, 0.046, 0.526, 0.495, 0.506, 0.066, 0.645],
-    'n_obs': [13027, 13027, 484, 484, 12961, 484, 484, 12961, 485, 365, 246, 456]
 }
 
-df = pd.DataFrame(data)
-
-# Sort by coefficient for the curve
-df_sorted = df.sort_values('coef').reset_index(drop=True)
-
-# Calculate confidence intervals
-df_sorted['ci_low'] = df_sorted['coef'] - 1.96 * df_sorted['se']
-df_sorted['ci_high'] = df_sorted['coef'] + 1.96 * df_sorted['se']
+# Specifications written by Scripts/specification_curve.py (results store)
+INPUT_FILE = Path(__file__).resolve().parent / 'specification_curve.csv'
 
-# Significance indicators
-df_sorted['sig_05'] = df_sorted['pval'] < 0.05
-df_sorted['sig_10'] = (df_sorted['pval'] >= 0.05) & (df_sorted['pval'] < 0.10)
+# Above this many specs, switch to density rendering
+MAX_DETAILED = 500
 
-# Create figure with two panels
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), height_ratios=[3, 1.5],
-                                gridspec_kw={'hspace': 0.05})
+# Indicator-matrix rows: column in the input file -> label
+FEATURE_LABELS = {
+    'mergerid_fe': 'MergerID FE',
+    'year_fe': 'Year FE',
+    'county_fe': 'County FE',
+    'individual_fe': 'Individual FE',
+    'county_cluster': 'County cluster',
+}
 
 # Colors
 color_sig05 = '#1a5276'  # Dark blue for p<0.05
@@ -70,113 +62,172 @@ color_sig10 = '#2874a6'  # Medium blue for p<0.10
 color_insig = '#85929e'  # Gray for insignificant
 color_baseline = '#e74c3c'  # Red for baseline
 
-# Top panel: Coefficient estimates with CIs
-x = np.arange(len(df_sorted))
-
-for i, row in df_sorted.iterrows():
-    # Determine color
-    if 'BASELINE' in row['spec_desc']:
-        color = color_baseline
-        marker = 'D'
-        markersize = 10
-        zorder = 10
-    elif row['sig_05']:
-        color = color_sig05
-        marker = 'o'
-        markersize = 8
-        zorder = 5
-    elif row['sig_10']:
-        color = color_sig10
-        marker = 'o'
-        markersize = 8
-        zorder = 5
-    else:
-        color = color_insig
-        marker = 'o'
-        markersize = 7
-        zorder = 3
+# Significance classes: (color, marker, markersize, zorder)
+CLASS_STYLE = {
+    'insig': (color_insig, 'o', 7, 3),
+    'sig10': (color_sig10, 'o', 8, 5),
+    'sig05': (color_sig05, 'o', 8, 5),
+    'baseline': (color_baseline, 'D', 10, 10),
+}
 
-    # Plot point
-    ax1.scatter(i, row['coef'], color=color, marker=marker, s=markersize**2,
-                zorder=zorder, edgecolors='white', linewidths=0.5)
 
-    # Plot CI
-    ax1.plot([i, i], [row['ci_low'], row['ci_high']], color=color,
-             linewidth=1.5, alpha=0.7, zorder=zorder-1)
+def downsample(df_sorted, max_points):
+    """Evenly spaced subset of the sorted specs, always keeping the baseline."""
+    if max_points <= 0 or len(df_sorted) <= max_points:
+        return df_sorted
+    keep = np.zeros(len(df_sorted), dtype=bool)
+    keep[np.linspace(0, len(df_sorted) - 1, max_points).round().astype(int)] = True
+    keep |= df_sorted['baseline'].to_numpy(dtype=bool)
+    return df_sorted[keep].reset_index(drop=True)
+
+
+def plot_specification_curve(df, max_detailed=MAX_DETAILED, max_points=0):
+    """Two-panel specification curve; returns the figure."""
+    # Sort by coefficient for the curve
+    df_sorted = df.sort_values('coef', kind='stable').reset_index(drop=True)
+    df_sorted = downsample(df_sorted, max_points)
+    n = len(df_sorted)
+    detailed = n <= max_detailed
+
+    coef = df_sorted['coef'].to_numpy()
+    se = df_sorted['se'].to_numpy()
+    pval = df_sorted['pval'].to_numpy()
+    baseline = df_sorted['baseline'].to_numpy(dtype=bool)
+    x = np.arange(n)
+
+    # Calculate confidence intervals
+    ci_low = coef - 1.96 * se
+    ci_high = coef + 1.96 * se
+
+    # Significance class of every spec
+    spec_class = np.select([baseline, pval < 0.05, pval < 0.10],
+                           ['baseline', 'sig05', 'sig10'], default='insig')
+
+    # Create figure with two panels
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), height_ratios=[3, 1.5],
+                                   gridspec_kw={'hspace': 0.05})
+
+    # Top panel: CIs as one LineCollection, colored by class; specs with no
+    # SE (omitted or unidentified) get a point but no interval
+    has_ci = np.isfinite(ci_low) & np.isfinite(ci_high)
+    colors = np.array([CLASS_STYLE[c][0] for c in spec_class])[has_ci]
+    segments = np.stack([np.column_stack([x, ci_low]), np.column_stack([x, ci_high])], axis=1)[has_ci]
+    ax1.add_collection(LineCollection(
+        segments, colors=colors, linewidths=1.5 if detailed else 0.4,
+        alpha=0.7 if detailed else 0.4, zorder=2, rasterized=not detailed))
+
+    # One scatter per significance class
+    for cls, (color, marker, markersize, zorder) in CLASS_STYLE.items():
+        idx = spec_class == cls
+        if not idx.any():
+            continue
+        if detailed or cls == 'baseline':
+            ax1.scatter(x[idx], coef[idx], color=color, marker=marker, s=markersize ** 2,
+                        zorder=zorder, edgecolors='white', linewidths=0.5)
+        else:
+            ax1.scatter(x[idx], coef[idx], color=color, marker=marker, s=4,
+                        zorder=zorder, linewidths=0, rasterized=True)
+
+    ax1.set_xlim(-0.5, n - 0.5)
+    bounds = np.r_[ci_low, ci_high, coef]
+    bounds = bounds[np.isfinite(bounds)]
+    if len(bounds):
+        lo, hi = bounds.min(), bounds.max()
+        pad = 0.05 * (hi - lo) if hi > lo else max(abs(lo), 1.0) * 0.05
+        ax1.set_ylim(lo - pad, hi + pad)
+
+    # Reference line at zero
+    ax1.axhline(y=0, color='black', linestyle='-', linewidth=0.8, alpha=0.5)
+
+    # Shade positive region
+    ax1.axhspan(0, ax1.get_ylim()[1], alpha=0.05, color='green')
+    ax1.axhspan(ax1.get_ylim()[0], 0, alpha=0.05, color='red')
+
+    ax1.set_ylabel('Coefficient on Closure × Fintech', fontweight='bold')
+    ax1.set_xticks([])
+
+    # Add legend
+    legend_elements = [
+        Line2D([0], [0], marker='D', color='w', markerfacecolor=color_baseline,
+               markersize=10, label='Baseline specification'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=color_sig05,
+               markersize=8, label='p < 0.05'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=color_sig10,
+               markersize=8, label='p < 0.10'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=color_insig,
+               markersize=7, label='Not significant'),
+    ]
+    ax1.legend(handles=legend_elements, loc='upper left', frameon=True,
+               fancybox=False, edgecolor='gray')
+
+    # Add annotation for key finding
+    if detailed:
+        ax1.annotate('MergerID FE crucial\nfor identification',
+                     xy=(0.75 * n, 1.2), fontsize=9, style='italic', color='#666666',
+                     ha='center')
+
+    # Bottom panel: Specification indicators
+    features = [c for c in FEATURE_LABELS if c in df_sorted.columns]
+    feature_names = [FEATURE_LABELS[c] for c in features]
+    n_features = len(features)
+    # Row 0 of the matrix is the first feature, drawn at the top
+    matrix = df_sorted[features].to_numpy(dtype=bool).T[::-1]
+
+    if detailed:
+        rows, cols = np.nonzero(matrix)
+        ax2.scatter(cols, rows, marker='s', s=min(100, 6000 / max(n, 1)),
+                    color='#2c3e50', alpha=0.8, linewidths=0)
+    else:
+        ax2.imshow(matrix, aspect='auto', interpolation='nearest', origin='lower',
+                   cmap='Greys', vmin=0, vmax=1.25, extent=(-0.5, n - 0.5, -0.5, n_features - 0.5),
+                   rasterized=True)
+
+    ax2.set_yticks(range(n_features))
+    ax2.set_yticklabels(feature_names[::-1])
+    ax2.set_xlim(-0.5, n - 0.5)
+    ax2.set_ylim(-0.5, n_features - 0.5)
+    ax2.set_xlabel('Specifications (ordered by coefficient estimate)', fontweight='bold')
+
+    # Add gridlines
+    if detailed:
+        ax2.set_xticks(x)
+        ax2.grid(True, axis='x', alpha=0.3, linestyle=':')
+    else:
+        ax2.set_xticks([])
+    ax2.tick_params(axis='x', which='both', bottom=False, labelbottom=False)
 
-# Reference line at zero
-ax1.axhline(y=0, color='black', linestyle='-', linewidth=0.8, alpha=0.5)
+    # Title
+    fig.suptitle('Specification Curve: Fintech Mitigation of Branch Closure Effects',
+                 fontsize=14, fontweight='bold', y=0.98)
+    return fig
 
-# Shade positive region
-ax1.axhspan(0, ax1.get_ylim()[1], alpha=0.05, color='green')
-ax1.axhspan(ax1.get_ylim()[0], 0, alpha=0.05, color='red')
 
-ax1.set_ylabel('Coefficient on Closure × Fintech', fontweight='bold')
-ax1.set_xlim(-0.5, len(df_sorted) - 0.5)
-ax1.set_xticks([])
+def draw_specification_curve():
+    """Specification curve from the default input file."""
+    return plot_specification_curve(pd.read_csv(INPUT_FILE))
 
-# Add legend
-from matplotlib.lines import Line2D
-legend_elements = [
-    Line2D([0], [0], marker='D', color='w', markerfacecolor=color_baseline,
-           markersize=10, label='Baseline specification'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=color_sig05,
-           markersize=8, label='p < 0.05'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=color_sig10,
-           markersize=8, label='p < 0.10'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=color_insig,
-           markersize=7, label='Not significant'),
+
+FIGURES = [
+    {'name': 'specification_curve', 'draw': draw_specification_curve,
+     'inputs': ['specification_curve.csv'], 'style': STYLE},
 ]
-ax1.legend(handles=legend_elements, loc='upper left', frameon=True,
-           fancybox=False, edgecolor='gray')
-
-# Add annotation for key finding
-ax1.annotate('MergerID FE crucial\nfor identification',
-             xy=(9, 1.2), fontsize=9, style='italic', color='#666666',
-             ha='center')
-
-# Bottom panel: Specification indicators
-spec_features = {
-    'MergerID FE': [False, False, True, True, False, True, True, False, True, True, True, False],
-    'Year FE': [False, True, False, True, False, True, True, True, True, True, True, True],
-    'County FE': [False, False, False, False, True, False, False, True, False, False, False, False],
-    'Individual FE': [False, False, False, False, False, False, False, False, False, False, False, True],
-    'County cluster': [False, False, False, False, False, True, False, True, True, True, True, True],
-}
 
-# Reorder features according to sorted coefficients
-sorted_indices = df_sorted['spec_id'].values - 1
-
-feature_names = list(spec_features.keys())
-n_features = len(feature_names)
-
-for i, (feature, values) in enumerate(spec_features.items()):
-    values_sorted = [values[idx] for idx in sorted_indices]
-    for j, val in enumerate(values_sorted):
-        if val:
-            ax2.scatter(j, n_features - i - 1, marker='s', s=100,
-                       color='#2c3e50', alpha=0.8)
-
-ax2.set_yticks(range(n_features))
-ax2.set_yticklabels(feature_names[::-1])
-ax2.set_xlim(-0.5, len(df_sorted) - 0.5)
-ax2.set_ylim(-0.5, n_features - 0.5)
-ax2.set_xlabel('Specifications (ordered by coefficient estimate)', fontweight='bold')
-
-# Add gridlines
-ax2.set_xticks(x)
-ax2.grid(True, axis='x', alpha=0.3, linestyle=':')
-ax2.tick_params(axis='x', which='both', bottom=False, labelbottom=False)
-
-# Title
-fig.suptitle('Specification Curve: Fintech Mitigation of Branch Closure Effects',
-             fontsize=14, fontweight='bold', y=0.98)
-
-plt.savefig('specification_curve.png', dpi=300, bbox_inches='tight',
-            facecolor='white', edgecolor='none')
-plt.savefig('specification_curve.pdf', bbox_inches='tight',
-            facecolor='white', edgecolor='none')
-
-print("Specification curve plots saved!")
-print(f"  - specification_curve.png")
-print(f"  - specification_curve.pdf")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--input', type=Path, default=INPUT_FILE)
+    parser.add_argument('--max-detailed', type=int, default=MAX_DETAILED)
+    parser.add_argument('--max-points', type=int, default=0)
+    args = parser.parse_args()
+
+    from build_figures import render_all
+    df = pd.read_csv(args.input)
+    render_all([{
+        'name': 'specification_curve', 'style': STYLE, 'inputs': [args.input],
+        'params': {'max_detailed': args.max_detailed, 'max_points': args.max_points},
+        'draw': lambda: plot_specification_curve(df, args.max_detailed, args.max_points),
+    }])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Compact CAPS Panel
+Purpose: Convert caps_geographic_merged.dta (one or several CAPS waves) into a
+         compact, typed column store: 0/1 indicators as int8, small integer
+         codes and FIPS as the narrowest integer type, strings as categorical
+         codes, and float32 where the values are float32 already (or, on
+         request, where the rounding error is acceptable). Columns are
+         memory-mapped and loaded only when asked for, and the estimators and
+         the streaming diagnostics read the store directly.
+Date: October 2026
+
+Usage:
+    python caps_panel.py                 # convert (if the .dta changed) and report
+    python caps_panel.py --float32 1e-6  # also store doubles as float32 when
+                                         # the relative error is below 1e-6
+    python caps_panel.py --report        # memory report of the existing store
+
+    from caps_panel import CapsPanel, read_caps
+    df = read_caps(['indivID', 'year', 'anytoise'])   # store if fresh, else the .dta
+    data_fp = caps_fingerprint(ResultsStore())        # results-store key of that data
+    panel = CapsPanel()
+    panel.column('closure_zip')                      # memory-mapped, nothing read yet
+    for chunk in panel.chunks(['year', 'anytoise']):  # for streaming statistics
+        ...
+
+Requirements:
+    - numpy, pandas
+
+Input files:
+    - Data/caps_geographic_merged.dta  (from 05_merge_caps_geographic.do)
+
+Output files:
+    - Data/caps_panel/   one .npy per column plus meta.json (see Layout)
+
+Layout (Data/caps_panel/):
+    meta.json       row count, source files with their size/mtime, and for
+                    every column its encoding, dtype, Stata label,
+                    categories (strings) and bytes before / after
+    <column>.npy    the column, in the row order of the source file(s)
+
+Notes:
+    - Encodings: 'indicator' (0/1, no missing) -> int8; 'integer' (no
+      missing) -> int8/int16/int32/int64; integers with missing values ->
+      float32 while |x| <= 2^24 (exact), else float64, so missing stays NaN
+      for complete_cases() and the Stata-style `!missing()` filters;
+      'category' -> int8/int16/int32 codes into the sorted distinct strings
+      ('' is kept as its own category, as Stata stores it).
+    - read_caps() returns string columns as pd.Categorical on both paths:
+      decoded from the panel's codes, or converted from the .dta strings
+      when the panel is stale, so callers see one dtype either way.
+    - Doubles stay float64 unless --float32 is given, so results match a
+      read of the .dta exactly. Arithmetic between two float32 columns
+      (e.g. a DataFrame.eval interaction) happens in float32.
+    - caps_fingerprint() is the ResultsStore data fingerprint of what
+      read_caps() serves: the .dta hash, combined with the panel's encodings
+      and float tolerance when the compact panel is used, so estimates from
+      a --float32 panel, a full-precision panel and the .dta never share a
+      cache entry.
+    - Conversion streams the .dta twice (types, then values) and never holds
+      the double-precision panel in memory; several waves with different
+      variables are stacked, with a variable missing in one wave set to
+      missing there.
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+PANEL_DIR = ROOT / "Data" / "caps_panel"
+
+CHUNKSIZE = 250_000
+
+# Integers up to 2^24 are exact in float32
+FLOAT32_EXACT = 2 ** 24
+
+
+def _stamp(path):
+    st = Path(path).stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _chunks(path, chunksize=CHUNKSIZE):
+    with pd.read_stata(path, chunksize=chunksize, convert_categoricals=False) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _new_stats():
+    return {'kind': None, 'n': 0, 'missing': 0, 'min': np.inf, 'max': -np.inf,
+            'integral': True, 'binary': True, 'float32': True, 'max_rel_err': 0.0,
+            'before_itemsize': 0, 'before_bytes': 0, 'categories': set(), 'source_dtype': None}
+
+
+def _fold_stats(st, s):
+    """Update one column's type statistics with a chunk of it."""
+    st['n'] += len(s)
+    if s.dtype.kind in 'biuf':
+        st['kind'] = st['kind'] or 'num'
+        x = s.to_numpy()
+        # read_stata turns an integer column with missing values into float64,
+        # so a full read costs the widest type seen in any chunk
+        if x.dtype.itemsize >= st['before_itemsize']:
+            st['before_itemsize'] = x.dtype.itemsize
+            st['source_dtype'] = x.dtype.str
+        finite = x[~np.isnan(x)] if x.dtype.kind == 'f' else x
+        st['missing'] += len(x) - len(finite)
+        if len(finite):
+            st['min'] = min(st['min'], float(finite.min()))
+            st['max'] = max(st['max'], float(finite.max()))
+            st['integral'] &= bool(np.all(finite == np.round(finite)))
+            st['binary'] &= bool(np.all((finite == 0) | (finite == 1)))
+            if x.dtype == np.float64:
+                f32 = finite.astype(np.float32).astype(np.float64)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rel = np.abs(f32 - finite) / np.abs(finite)
+                rel = rel[finite != 0]
+                if len(rel):
+                    st['max_rel_err'] = max(st['max_rel_err'], float(rel.max()))
+                st['float32'] &= bool(np.isfinite(f32).all())
+    else:
+        st['kind'] = 'str'
+        st['source_dtype'] = '|O'
+        st['categories'].update(s.dropna().astype(str).unique().tolist())
+        st['missing'] += int(s.isna().sum())
+        st['before_bytes'] += int(s.memory_usage(deep=True, index=False))
+
+
+def _int_dtype(lo, hi):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def choose_encoding(st, float_rtol=None):
+    """(encoding, numpy dtype) of a column from its type statistics."""
+    if st['kind'] == 'str':
+        n = len(st['categories'])
+        return 'category', _int_dtype(0, n)
+    if st['missing'] == st['n']:
+        return 'empty', np.dtype(np.float32)
+    if st['integral']:
+        if st['missing'] == 0:
+            if st['binary']:
+                return 'indicator', np.dtype(np.int8)
+            return 'integer', _int_dtype(st['min'], st['max'])
+        big = max(abs(st['min']), abs(st['max'])) > FLOAT32_EXACT
+        return 'integer_missing', np.dtype(np.float64 if big else np.float32)
+    if st['source_dtype'] == np.dtype(np.float32).str:
+        return 'float', np.dtype(np.float32)
+    if float_rtol is not None and st['float32'] and st['max_rel_err'] <= float_rtol:
+        return 'float', np.dtype(np.float32)
+    return 'double', np.dtype(np.float64)
+
+
+def convert(sources=CAPS_FILE, out_dir=PANEL_DIR, float_rtol=None, chunksize=CHUNKSIZE):
+    """Stream the .dta file(s) twice and write the compact column store."""
+    sources = [Path(p) for p in ([sources] if isinstance(sources, (str, Path)) else sources)]
+
+    # Pass 1: types, ranges, categories
+    stats, order, rows = {}, [], []
+    labels = {}
+    for path in sources:
+        with pd.io.stata.StataReader(path) as reader:
+            for col, label in reader.variable_labels().items():
+                labels.setdefault(col, label)
+        n_file, seen = 0, set()
+        for chunk in _chunks(path, chunksize):
+            n_file += len(chunk)
+            for col in chunk.columns:
+                if col not in stats:
+                    stats[col] = _new_stats()
+                    order.append(col)
+                    # Rows of earlier files that lack this variable are missing
+                    stats[col]['n'] = stats[col]['missing'] = sum(rows)
+                seen.add(col)
+                _fold_stats(stats[col], chunk[col])
+        for col in set(order) - seen:
+            stats[col]['n'] += n_file
+            stats[col]['missing'] += n_file
+        rows.append(n_file)
+    nrows = sum(rows)
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for old in list(out.glob("*.npy")) + list(out.glob("meta.json")):
+        old.unlink()
+
+    # Pass 2: values
+    enc = {col: choose_encoding(stats[col], float_rtol) for col in order}
+    cats = {col: sorted(stats[col]['categories']) for col in order if enc[col][0] == 'category'}
+    arrays = {col: np.lib.format.open_memmap(out / f"{col}.npy", mode='w+',
+                                             dtype=enc[col][1], shape=(nrows,))
+              for col in order}
+    start = 0
+    for path, n_file in zip(sources, rows):
+        for chunk in _chunks(path, chunksize):
+            stop = start + len(chunk)
+            for col in order:
+                encoding, dtype = enc[col]
+                if col not in chunk:
+                    arrays[col][start:stop] = np.nan if dtype.kind == 'f' else -1
+                elif encoding == 'category':
+                    codes = pd.Categorical(chunk[col], categories=cats[col]).codes
+                    arrays[col][start:stop] = codes.astype(dtype)
+                else:
+                    arrays[col][start:stop] = chunk[col].to_numpy().astype(dtype)
+            start = stop
+    for arr in arrays.values():
+        arr.flush()
+    del arrays
+
+    columns = {}
+    for col in order:
+        st, (encoding, dtype) = stats[col], enc[col]
+        after = nrows * dtype.itemsize
+        before = st['before_bytes'] if st['kind'] == 'str' else nrows * st['before_itemsize']
+        info = {'encoding': encoding, 'dtype': dtype.str, 'source_dtype': st['source_dtype'],
+                'label': labels.get(col, ''), 'before_bytes': int(before)}
+        if encoding == 'category':
+            info['categories'] = cats[col]
+            after += int(pd.Series(cats[col], dtype=object).memory_usage(deep=True, index=False))
+        if encoding == 'float' and st['source_dtype'] == np.dtype(np.float64).str:
+            info['max_rel_err'] = st['max_rel_err']
+        info['after_bytes'] = int(after)
+        columns[col] = info
+    meta = {'nrows': nrows, 'float_rtol': float_rtol, 'columns': columns,
+            'sources': [{'file': str(p), 'stamp': _stamp(p), 'nrows': n}
+                        for p, n in zip(sources, rows)]}
+    (out / "meta.json").write_text(json.dumps(meta, indent=1))
+    return CapsPanel(out)
+
+
+class CapsPanel:
+    """Memory-mapped, typed columns of the CAPS panel."""
+
+    def __init__(self, path=PANEL_DIR):
+        self.path = Path(path)
+        meta_file = self.path / "meta.json"
+        if not meta_file.exists():
+            raise FileNotFoundError(f"no compact panel at {self.path}; run caps_panel.py")
+        self.meta = json.loads(meta_file.read_text())
+        self._categories = {}
+
+    def __len__(self):
+        return self.meta['nrows']
+
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+
+    def is_fresh(self, sources=CAPS_FILE):
+        """True if the store was built from the current version of `sources`."""
+        sources = [sources] if isinstance(sources, (str, Path)) else sources
+        built = [s['stamp'] for s in self.meta['sources']]
+        return all(Path(p).exists() for p in sources) and built == [_stamp(p) for p in sources]
+
+    def encoding_hash(self):
+        """Hash of what a load returns beyond the source values: the float
+        tolerance and every column's encoding and dtype."""
+        layout = {'float_rtol': self.meta['float_rtol'],
+                  'columns': {c: [i['encoding'], i['dtype']] for c, i in self.meta['columns'].items()}}
+        return hashlib.sha256(json.dumps(layout, sort_keys=True).encode()).hexdigest()
+
+    def column(self, col):
+        """One memory-mapped column as stored (categories as integer codes)."""
+        if col not in self.meta['columns']:
+            raise KeyError(f"caps panel has no column {col}")
+        return np.load(self.path / f"{col}.npy", mmap_mode='r')
+
+    def _values(self, col, rows):
+        arr = self.column(col)
+        values = np.array(arr if rows is None else arr[rows])
+        info = self.meta['columns'][col]
+        if info['encoding'] != 'category':
+            return values
+        if col not in self._categories:
+            self._categories[col] = pd.CategoricalDtype(info['categories'])
+        return pd.Categorical.from_codes(values, dtype=self._categories[col])
+
+    def load(self, columns=None, rows=None):
+        """DataFrame of `columns` (default all), optionally only `rows`
+        (a boolean mask, a slice or integer positions)."""
+        columns = self.columns if columns is None else list(columns)
+        missing = [c for c in columns if c not in self.meta['columns']]
+        if missing:
+            raise KeyError(f"caps panel has no column(s): {', '.join(missing)}")
+        return pd.DataFrame({c: self._values(c, rows) for c in columns})
+
+    def chunks(self, columns=None, chunksize=CHUNKSIZE):
+        """DataFrames of `columns` over consecutive row blocks."""
+        for start in range(0, len(self), chunksize):
+            chunk = self.load(columns, slice(start, start + chunksize))
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            yield chunk
+
+
+def open_caps(path=CAPS_FILE, store=PANEL_DIR):
+    """The compact panel if it is up to date with `path`, otherwise `path`."""
+    try:
+        panel = CapsPanel(store)
+    except FileNotFoundError:
+        return path
+    return panel if panel.is_fresh(path) else path
+
+
+def read_caps(columns=None, path=CAPS_FILE, store=PANEL_DIR):
+    """CAPS variables as a DataFrame: from the compact panel when it is up to
+    date, else from the .dta (numeric codes, as convert_categoricals=False).
+    String columns are categorical either way."""
+    source = open_caps(path, store)
+    if isinstance(source, CapsPanel):
+        return source.load(columns)
+    df = pd.read_stata(path, columns=columns, convert_categoricals=False)
+    for col in df.columns:
+        if df[col].dtype.kind not in 'biuf':
+            # Same dtype as the panel: sorted distinct strings as categories
+            df[col] = pd.Categorical(df[col], categories=sorted(df[col].dropna().astype(str).unique()))
+    return df
+
+
+def caps_fingerprint(store, path=CAPS_FILE, panel_dir=PANEL_DIR):
+    """ResultsStore data fingerprint of the data read_caps(path=path) serves."""
+    fp = store.fingerprint(path)
+    source = open_caps(path, panel_dir)
+    if isinstance(source, CapsPanel):
+        fp = hashlib.sha256(f"{fp}:{source.encoding_hash()}".encode()).hexdigest()
+    return fp
+
+
+def memory_report(panel):
+    """Bytes per column before (as read from the .dta) and after conversion."""
+    table = pd.DataFrame.from_dict(panel.meta['columns'], orient='index')
+    table = table[['encoding', 'source_dtype', 'dtype', 'before_bytes', 'after_bytes']]
+    table['ratio'] = table['after_bytes'] / table['before_bytes'].where(table['before_bytes'] > 0)
+    return table.rename_axis('column').reset_index()
+
+
+def print_report(panel):
+    table = memory_report(panel)
+    mb = 1 << 20
+    by_enc = table.groupby('encoding')[['before_bytes', 'after_bytes']].sum()
+    by_enc['columns'] = table.groupby('encoding').size()
+    print(f"\n{len(panel):,} rows, {len(table)} columns")
+    print(f"\n{'encoding':<18s} {'columns':>8s} {'before MB':>11s} {'after MB':>10s}")
+    for enc, row in by_enc.sort_values('before_bytes', ascending=False).iterrows():
+        print(f"{enc:<18s} {row['columns']:>8d} {row['before_bytes'] / mb:>11.1f} "
+              f"{row['after_bytes'] / mb:>10.1f}")
+    before, after = table['before_bytes'].sum(), table['after_bytes'].sum()
+    print(f"{'total':<18s} {len(table):>8d} {before / mb:>11.1f} {after / mb:>10.1f}"
+          f"   ({after / before:.1%} of the .dta read)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compact CAPS panel.")
+    parser.add_argument('sources', nargs='*', type=Path, help="CAPS .dta file(s), stacked in order")
+    parser.add_argument('--float32', type=float, default=None, metavar='RTOL',
+                        help="store doubles as float32 when the relative error is at most RTOL")
+    parser.add_argument('--force', action='store_true', help="rebuild even if up to date")
+    parser.add_argument('--report', action='store_true', help="only print the memory report")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("COMPACT CAPS PANEL")
+    print("=" * 60)
+
+    if args.report:
+        print_report(CapsPanel())
+        return
+
+    sources = args.sources or [CAPS_FILE]
+    try:
+        panel = CapsPanel()
+        fresh = (panel.is_fresh(sources) and panel.meta['float_rtol'] == args.float32
+                 and not args.force)
+    except FileNotFoundError:
+        fresh = False
+    if fresh:
+        print(f"Up to date: {PANEL_DIR}")
+    else:
+        panel = convert(sources, float_rtol=args.float32)
+        print(f"Converted {len(sources)} file(s) to: {panel.path}")
+    print_report(panel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+County Panel Builder
+Purpose: Build county (or state, or any integer-keyed) panels from the
+         individual CAPS panel and from CBP in one bincount pass over an
+         integer-packed county_fips x year key, instead of the sort-based
+         `collapse` / `egen tag()` passes of 08_sample_diagnostics.do and
+         11_county_level_analysis.do, and join the Fuster et al. county
+         fintech shares through the same key index.
+Date: October 2026
+
+Usage:
+    python county_panel.py
+
+    from county_panel import KeyIndex, aggregate, join
+    idx = KeyIndex.fit(df, ['county_fips', 'year'])
+    cy = aggregate(df, idx, mean=['anytoise', 'closure_zip'],
+                   wmean=['anytoise'], weight='wgt', count=['fintech_share'],
+                   share={'has_fintech': 'fintech_share.notna()'})
+    cy = join(cy, fuster_shares(), idx)
+    # other granularities: state x year through a derived key
+    sy = aggregate(df, KeyIndex.fit(df, ['state', 'year'], derived={'state': 'county_fips // 1000'}),
+                   mean=['anytoise'], derived={'state': 'county_fips // 1000'})
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta (or its compact panel)
+    - Data/Fintech_Classification/fintech_county_shares.csv  (Fuster et al.)
+    - Data/CBP/cbp_county_panel.dta, or Data/CBP/cbpYYco.txt to build it
+    - Data/Banking_Deserts/banking_access_county.dta
+
+Output files:
+    - Results/county_year_panel.csv   (CAPS county-year means, counts and
+                                       shares joined to the Fuster shares)
+    - Results/cbp_county_panel.csv    (the county-year panel of 11)
+
+Notes:
+    - A key is the mixed-radix packing of integer variables: for
+      county_fips x year, code = (fips - min fips) * n_years + (year - min
+      year). Groups are the bins of one np.bincount over that code, so no
+      sort is needed; when the packed range is too large for a dense array
+      (MAX_DENSE), codes are hashed with pd.factorize instead.
+    - Means skip missing values of each variable separately, as `collapse
+      (mean)`; weighted means use the weights as aweights (rows with missing
+      or non-positive weight are left out of that mean).
+    - Rows with a missing or non-integer key are left out, as `collapse`
+      drops missing `by` values.
+"""
+
+from pathlib import Path
+import time
+
+import numpy as np
+import pandas as pd
+
+from caps_panel import read_caps
+from fe_regression import feols
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+FUSTER_FILE = ROOT / "Data" / "Fintech_Classification" / "fintech_county_shares.csv"
+CBP_DIR = ROOT / "Data" / "CBP"
+CBP_PANEL = CBP_DIR / "cbp_county_panel.dta"
+BANKING_FILE = ROOT / "Data" / "Banking_Deserts" / "banking_access_county.dta"
+RESULTS_DIR = ROOT / "Results"
+
+# Largest packed key range grouped by direct addressing
+MAX_DENSE = 1 << 22
+
+# The county-year collapse of 08 section 6
+CAPS_MEANS = ['anytoise', 'closure_zip', 'banking_desert', 'fintech_share']
+
+
+def _with_derived(frame, derived):
+    if not derived:
+        return frame
+    frame = frame.copy()
+    for name, expr in derived.items():
+        frame[name] = frame.eval(expr, engine='python')
+    return frame
+
+
+class KeyIndex:
+    """Mixed-radix integer packing of one or more integer key variables."""
+
+    def __init__(self, names, lows, sizes):
+        self.names = list(names)
+        self.lows = np.asarray(lows, dtype=np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.size = int(np.prod(self.sizes))
+
+    @classmethod
+    def fit(cls, frame, by, derived=None):
+        """Key ranges of `by` (variables of frame or of `derived`) in frame."""
+        frame = _with_derived(frame, derived)
+        lows, sizes = [], []
+        for b in by:
+            x = frame[b].to_numpy(dtype=float)
+            x = x[~np.isnan(x)]
+            lo, hi = (int(x.min()), int(x.max())) if len(x) else (0, 0)
+            lows.append(lo)
+            sizes.append(hi - lo + 1)
+        return cls(by, lows, sizes)
+
+    def pack(self, frame, derived=None):
+        """int64 code of every row, -1 where a key is missing, non-integer
+        or outside the fitted range."""
+        frame = _with_derived(frame, derived)
+        codes = np.zeros(len(frame), dtype=np.int64)
+        valid = np.ones(len(frame), dtype=bool)
+        for name, lo, size in zip(self.names, self.lows, self.sizes):
+            x = frame[name].to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                k = np.where(np.isnan(x), -1, x - lo)
+            valid &= (k >= 0) & (k < size) & (k == np.floor(k))
+            codes = codes * size + np.where(valid, k, 0).astype(np.int64)
+        return np.where(valid, codes, -1)
+
+    def unpack(self, codes):
+        """Key variables of packed codes, as a DataFrame."""
+        codes = np.asarray(codes, dtype=np.int64)
+        out = {}
+        for name, lo, size in zip(self.names[::-1], self.lows[::-1], self.sizes[::-1]):
+            out[name] = codes % size + lo
+            codes = codes // size
+        return pd.DataFrame({name: out[name] for name in self.names})
+
+
+def group_codes(codes, size):
+    """(dense group id of each row or -1, packed code of each group, G).
+
+    Direct addressing when the packed range fits in MAX_DENSE, hashing otherwise.
+    """
+    keep = codes >= 0
+    if size <= MAX_DENSE:
+        n = np.bincount(codes[keep], minlength=size)
+        occupied = np.flatnonzero(n)
+        slot = np.full(size, -1, dtype=np.int64)
+        slot[occupied] = np.arange(len(occupied))
+        return np.where(keep, slot[np.where(keep, codes, 0)], -1), occupied, len(occupied)
+    g = np.full(len(codes), -1, dtype=np.int64)
+    g[keep], uniques = pd.factorize(codes[keep], sort=True)
+    return g, uniques, len(uniques)
+
+
+def aggregate(frame, index, mean=(), wmean=(), weight=None, count=(), share=None, derived=None):
+    """Grouped panel of frame by index.names in one bincount pass.
+
+    Columns: the keys, n (rows), <var> (mean), <var>_w (weighted mean),
+    n_<var> (non-missing count) and one column per `share` entry (share of
+    rows where the expression is true).
+    """
+    frame = _with_derived(frame, derived)
+    g, packed, G = group_codes(index.pack(frame), index.size)
+    keep = g >= 0
+    gk = g[keep]
+
+    out = index.unpack(packed)
+    out['n'] = np.bincount(gk, minlength=G)
+    w = frame[weight].to_numpy(dtype=float)[keep] if weight is not None else None
+    for var in dict.fromkeys(list(mean) + list(wmean) + list(count)):
+        x = frame[var].to_numpy(dtype=float)[keep]
+        ok = ~np.isnan(x)
+        n_var = np.bincount(gk[ok], minlength=G)
+        if var in count:
+            out[f"n_{var}"] = n_var
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if var in mean:
+                out[var] = np.bincount(gk[ok], weights=x[ok], minlength=G) / n_var
+            if var in wmean:
+                okw = ok & ~np.isnan(w) & (w > 0)
+                out[f"{var}_w"] = (np.bincount(gk[okw], weights=w[okw] * x[okw], minlength=G)
+                                   / np.bincount(gk[okw], weights=w[okw], minlength=G))
+    for name, expr in (share or {}).items():
+        hit = frame.eval(expr, engine='python').to_numpy(dtype=bool, na_value=False)[keep]
+        out[name] = np.bincount(gk, weights=hit.astype(float), minlength=G) / out['n']
+    return out
+
+
+def join(left, right, index, columns=None, derived=None):
+    """left with the columns of right added, matched on index.names
+    (a left m:1 merge through the packed key). Raises ValueError if right
+    has duplicate keys."""
+    columns = [c for c in right.columns if c not in index.names] if columns is None else columns
+    rcodes = index.pack(right, derived)
+    ok = rcodes >= 0
+    if pd.Series(rcodes[ok]).duplicated().any():
+        raise ValueError(f"duplicate {' x '.join(index.names)} keys in the joined table")
+    lcodes = index.pack(left, derived)
+    if index.size <= MAX_DENSE:
+        slot = np.full(index.size, -1, dtype=np.int64)
+        slot[rcodes[ok]] = np.flatnonzero(ok)
+        rows = np.where(lcodes >= 0, slot[np.maximum(lcodes, 0)], -1)
+    else:
+        rows = pd.Index(rcodes[ok]).get_indexer(lcodes)
+        rows = np.where((lcodes >= 0) & (rows >= 0), np.flatnonzero(ok)[rows], -1)
+    found = rows >= 0
+    take = np.where(found, rows, 0)
+    out = left.copy()
+    for c in columns:
+        values = right[c].to_numpy()[take]
+        if not found.all():
+            values = values.astype(float) if values.dtype.kind in 'biuf' else values.astype(object)
+            values[~found] = np.nan
+        out[c] = values
+    return out
+
+
+def fuster_shares(path=FUSTER_FILE):
+    """Fuster et al. county-year shares with fintech_share as built in 04."""
+    df = pd.read_csv(path).rename(columns={'fips': 'county_fips'})
+    total = df['total_lending']
+    share = df['loan_amount'] / total.where(total != 0)
+    share = share.where(share.notna() | ~(total > 0), 0.0)
+    df['fintech_share'] = share.where(total.notna() & (total != 0))
+    by_year = df.groupby('year')['fintech_share']
+    df['fintech_share_std'] = (df['fintech_share'] - by_year.transform('mean')) / by_year.transform('std')
+    return df
+
+
+def cbp_panel(cbp_dir=CBP_DIR, years=range(2010, 2018)):
+    """County-year establishments, employment and growth (11 part 1)."""
+    frames = []
+    for year in years:
+        path = Path(cbp_dir) / f"cbp{year % 100:02d}co.txt"
+        if not path.exists():
+            continue
+        raw = pd.read_csv(path, usecols=['fipstate', 'fipscty', 'naics', 'est', 'emp', 'n1_4'],
+                          dtype={'naics': str})
+        raw = raw[raw['naics'] == '------']
+        frames.append(pd.DataFrame({
+            'county_fips': raw['fipstate'].to_numpy() * 1000 + raw['fipscty'].to_numpy(),
+            'year': year,
+            'establishments': raw['est'].to_numpy(dtype=float),
+            'employment': pd.to_numeric(raw['emp'], errors='coerce').to_numpy(),
+            'small_estab': pd.to_numeric(raw['n1_4'], errors='coerce').to_numpy(),
+        }))
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True).sort_values(['county_fips', 'year'], kind='stable')
+    # Growth over the previous observation of the same county, as `by fips: ...[_n-1]`
+    prev = df['establishments'].shift()
+    same = df['county_fips'].eq(df['county_fips'].shift())
+    df['estab_growth'] = ((df['establishments'] - prev) / prev * 100).where(same)
+    return df.reset_index(drop=True)
+
+
+def county_level_models(df):
+    """The three reghdfe models of 11 part 4."""
+    df = df[df['year'].between(2010, 2017) & df['fintech_share'].notna()].copy()
+    df['desert_x_fintech'] = df['banking_desert'] * df['fintech_share']
+    df['low_branch'] = (df['branches_per_10k'] < 2).astype(float)
+    # Stata compares missing as +infinity, so missing branches_per_10k is not low
+    df['lowbranch_x_fintech'] = df['low_branch'] * df['fintech_share']
+    y, cl = df['estab_growth'], df['county_fips']
+    desert = ['banking_desert', 'fintech_share', 'desert_x_fintech']
+    low = ['low_branch', 'fintech_share', 'lowbranch_x_fintech']
+    return {
+        'Model 1: Establishment Growth ~ Banking Desert x Fintech':
+            feols(y, df[desert], fe=[df['year']], cluster=cl),
+        'Model 2: Add County FE':
+            feols(y, df[desert], fe=[df['county_fips'], df['year']], cluster=cl),
+        'Model 3: Branch Density x Fintech':
+            feols(y, df[low], fe=[df['year']], cluster=cl),
+    }
+
+
+def main():
+    """CAPS county-year panel, then the CBP county analysis of 11."""
+
+    print("=" * 60)
+    print("COUNTY PANEL BUILDER")
+    print("=" * 60)
+
+    fuster = fuster_shares(FUSTER_FILE) if FUSTER_FILE.exists() else None
+    if fuster is not None:
+        fuster = fuster.rename(columns={'fintech_share': 'fuster_fintech_share',
+                                        'fintech_share_std': 'fuster_fintech_share_std'})
+        print(f"Fuster et al. shares: {len(fuster):,} county-years")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    if CAPS_FILE.exists():
+        caps = read_caps(['county_fips', 'year'] + CAPS_MEANS, CAPS_FILE)
+        start = time.perf_counter()
+        idx = KeyIndex.fit(caps, ['county_fips', 'year'])
+        cy = aggregate(caps, idx, mean=CAPS_MEANS, count=['fintech_share'],
+                       share={'has_fintech': 'fintech_share.notna()'})
+        if fuster is not None:
+            cy = join(cy, fuster, idx, ['loan_amount', 'total_lending', 'fuster_fintech_share'])
+        print(f"CAPS county-year panel: {len(cy):,} cells from {len(caps):,} rows "
+              f"in {1000 * (time.perf_counter() - start):.1f} ms")
+        cy.to_csv(RESULTS_DIR / "county_year_panel.csv", index=False, float_format='%.6f')
+
+    if CBP_PANEL.exists():
+        cbp = pd.read_stata(CBP_PANEL, convert_categoricals=False)
+        cbp = cbp.rename(columns={'fips': 'county_fips'})
+        cbp['county_fips'] = pd.to_numeric(cbp['county_fips'], errors='coerce')
+    else:
+        cbp = cbp_panel(CBP_DIR)
+    if cbp is None:
+        print(f"\nNo CBP data in {CBP_DIR} - skipping the county-level analysis")
+        return
+
+    start = time.perf_counter()
+    idx = KeyIndex.fit(cbp, ['county_fips', 'year'])
+    if fuster is not None:
+        cbp = join(cbp, fuster.rename(columns={'fuster_fintech_share': 'fintech_share'}),
+                   idx, ['fintech_share'])
+    else:
+        cbp['fintech_share'] = np.nan
+    if BANKING_FILE.exists():
+        bank = pd.read_stata(BANKING_FILE, columns=['county_fips', 'branches_per_10k', 'banking_desert'],
+                             convert_categoricals=False)
+        cbp = join(cbp, bank, KeyIndex.fit(cbp, ['county_fips']))
+    else:
+        cbp['branches_per_10k'] = cbp['banking_desert'] = np.nan
+    cbp['has_fintech'] = cbp['fintech_share'].notna().astype(np.int8)
+    counties = aggregate(cbp[cbp['has_fintech'] == 1], KeyIndex.fit(cbp, ['county_fips']))
+    print(f"\nCBP county-year panel built in {1000 * (time.perf_counter() - start):.1f} ms")
+    cbp.to_csv(RESULTS_DIR / "cbp_county_panel.csv", index=False, float_format='%.6f')
+
+    print(f"Total county-year observations: {len(cbp):,}")
+    print(f"With fintech data: {int(cbp['has_fintech'].sum()):,}")
+    print(f"Unique counties with fintech: {len(counties):,}")
+    summary_vars = ['establishments', 'employment', 'estab_growth', 'fintech_share', 'branches_per_10k']
+    print(cbp.loc[cbp['has_fintech'] == 1, summary_vars].describe().T[['count', 'mean', 'std', 'min', 'max']]
+          .to_string(float_format=lambda v: f"{v:,.3f}"))
+
+    for title, res in county_level_models(cbp).items():
+        print(f"\n--- {title} ---")
+        print(res.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Event Study Estimation
+Purpose: Dynamic effects of branch closures on self-employment, for the full
+         sample and any number of subgroup splits, written to one results file
+         that the event-study plots read (replaces the hand-copied coefficients
+         from 17_event_study.do)
+Date: October 2026
+
+Usage:
+    python event_study.py
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py, results_store.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+
+Output files:
+    - Output/event_study_coefs.csv  (split, event_time, coef, se, nobs;
+                                     the reference period is stored as 0/0)
+
+Adding a split or changing the window only requires editing SPLITS / WINDOW.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from caps_panel import caps_fingerprint, read_caps
+from fe_regression import absorb_info, absorb_sample, complete_cases, factorize, ols
+from results_store import ResultsStore, lazy
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+RESULTS_FILE = ROOT / "Output" / "event_study_coefs.csv"
+
+# Event window and omitted reference period (as in 17_event_study.do)
+WINDOW = (-4, 4)
+REFERENCE = -1
+
+# Subgroup splits: name -> (sample restriction passed to DataFrame.eval, absorbed FE)
+SPLITS = {
+    'full': (None, ['indivID', 'year']),
+    'high': ('high_fintech == 1', ['year']),
+    'low': ('high_fintech == 0', ['year']),
+}
+
+COLUMNS = ['indivID', 'year', 'anytoise', 'closure_zip', 'fintech_share',
+           'mergerID', 'county_fips']
+
+
+def closure_year(df, id_col='indivID', time_col='year', treat_col='closure_zip'):
+    """Year of each individual's first closure event (NaN if never treated).
+
+    An event is a year with positive treatment following a non-positive year,
+    or positive treatment in the individual's first observed year.
+    """
+    d = df[[id_col, time_col, treat_col]].sort_values([id_col, time_col])
+    treated = d[treat_col].to_numpy() > 0
+    ids = d[id_col].to_numpy()
+    first_row = np.r_[True, ids[1:] != ids[:-1]]
+    prev_treated = np.r_[False, treated[:-1]]
+    event = treated & (first_row | ~prev_treated)
+
+    first_event = d.loc[event].groupby(id_col)[time_col].min()
+    return df[id_col].map(first_event)
+
+
+def event_time_dummies(event_time, window=WINDOW, reference=REFERENCE):
+    """Relative-time indicator matrix (n x periods) with the reference omitted."""
+    periods = np.array([t for t in range(window[0], window[1] + 1) if t != reference])
+    et = np.asarray(event_time, dtype=float)
+    D = (et[:, None] == periods[None, :]).astype(float)
+    names = [f"evt_m{-t}" if t < 0 else (f"evt_{t}" if t == 0 else f"evt_p{t}") for t in periods]
+    return D, periods, names
+
+
+def prepare_sample(df, window=WINDOW):
+    """Event time, high/low fintech split and window restriction."""
+    df = df.copy()
+    df['closure_year'] = closure_year(df)
+    df['event_time'] = df['year'] - df['closure_year']
+    df = df[df['closure_year'].notna()]
+
+    # Median split on fintech share, computed before the window restriction
+    med = df['fintech_share'].median()
+    df['high_fintech'] = np.where(df['fintech_share'].notna(),
+                                  (df['fintech_share'] > med).astype(float), np.nan)
+
+    in_window = df['event_time'].between(window[0], window[1])
+    return df[in_window].reset_index(drop=True)
+
+
+def fit_split(df, design, condition, absorb, outcome='anytoise', cluster='county_fips'):
+    """Event-study regression for one subgroup from the shared indicator matrix."""
+    D, periods, names = design
+    y = df[outcome].to_numpy(dtype=float)
+    cl = df[cluster].to_numpy()
+    keep = np.ones(len(df), dtype=bool) if condition is None else df.eval(condition).to_numpy(dtype=bool, copy=True)
+    fe = [df[c].to_numpy() for c in absorb]
+    keep &= complete_cases(y, cl, *fe)
+
+    keep, absorber = absorb_sample(fe, keep, names=list(absorb))
+    Z = absorber.demean(np.column_stack([y[keep], D[keep]]))
+    cl_codes = factorize(cl[keep])[0]
+    res = ols(Z[:, 0], Z[:, 1:], names=names, cluster=cl[keep],
+              df_absorbed=absorber.df_absorbed(cl_codes))
+    res.extra.update(absorb_info(absorber, cl_codes))
+    return res
+
+
+def coef_table(results, window=WINDOW, reference=REFERENCE):
+    """Long table (split, event_time, coef, se, nobs) from {split: result}.
+
+    The reference period is included with coefficient and SE of zero.
+    """
+    periods = [t for t in range(window[0], window[1] + 1) if t != reference]
+    rows = []
+    for split, res in results.items():
+        for t, b, s in zip(periods, res.coef, res.se):
+            rows.append((split, t, b, s, res.nobs))
+        rows.append((split, reference, 0.0, 0.0, res.nobs))
+    out = pd.DataFrame(rows, columns=['split', 'event_time', 'coef', 'se', 'nobs'])
+    return out.sort_values(['split', 'event_time'], kind='stable').reset_index(drop=True)
+
+
+def estimate_event_study(df, splits=SPLITS, outcome='anytoise', cluster='county_fips',
+                         window=WINDOW, reference=REFERENCE):
+    """Estimate every split from one shared indicator matrix."""
+    design = event_time_dummies(df['event_time'], window, reference)
+    results = {split: fit_split(df, design, condition, absorb, outcome, cluster)
+               for split, (condition, absorb) in splits.items()}
+    return coef_table(results, window, reference)
+
+
+def split_spec(condition, absorb, outcome='anytoise', cluster='county_fips'):
+    """Store key contents for one split."""
+    return {'estimator': 'event_study', 'outcome': outcome, 'condition': condition,
+            'absorb': absorb, 'cluster': cluster, 'window': list(WINDOW),
+            'reference': REFERENCE}
+
+
+def main():
+    """Estimate changed splits through the results store and write the results file."""
+
+    print("=" * 60)
+    print("EVENT STUDY ANALYSIS")
+    print("=" * 60)
+
+    store = ResultsStore()
+    data_fp = caps_fingerprint(store, CAPS_FILE)
+    sample = lazy(lambda: prepare_sample(
+        read_caps(COLUMNS, CAPS_FILE)))
+    design = lazy(lambda: event_time_dummies(sample()['event_time']))
+
+    results = {}
+    for split, (condition, absorb) in SPLITS.items():
+        results[split] = store.fetch(
+            f"event_study/{split}", split_spec(condition, absorb), data_fp,
+            lambda: fit_split(sample(), design(), condition, absorb))
+        print(f"  {split:<6s} N = {results[split].nobs:,}  clusters = {results[split].n_clusters}")
+    print(f"Store: {store.hits} cached, {store.misses} estimated")
+
+    table = coef_table(results)
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(RESULTS_FILE, index=False, float_format='%.6f')
+    print(f"Saved event-study coefficients to: {RESULTS_FILE}")
+
+    print("\n" + table.pivot(index='event_time', columns='split', values='coef').round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+Fixed-Effects Regression Engine
+Purpose: OLS with absorbed fixed effects and clustered standard errors
+         (Python counterpart of `reghdfe y x, absorb(...) cluster(...)`)
+Date: October 2026
+
+Usage:
+    from fe_regression import feols
+    res = feols(df['anytoise'], df[['closure_zip']], fe=[df['indivID'], df['year']],
+                cluster=df['county_fips'], names=['closure_zip'])
+    print(res.summary())
+
+Requirements:
+    - numpy
+    - pandas
+    - scipy
+
+Notes:
+    - Fixed effects are held as sparse level-by-observation incidence
+      matrices, so memory stays linear in observations however many levels
+      they have; no dummy matrix is ever formed.
+    - They are partialled out by alternating projections (method of
+      alternating projections, as in reghdfe), where group means of all
+      columns come from one sparse product per fixed effect, or, once a
+      fixed effect has LSMR_MIN_LEVELS levels or more (individual effects),
+      by LSMR on the stacked incidence matrix with a diagonal (column-norm)
+      preconditioner, which does not slow down the way alternating
+      projections do on weakly connected individual-by-year panels.
+    - Singleton groups are dropped iteratively before estimation, as reghdfe
+      does by default; they are fit perfectly and would only inflate N.
+      `absorb_sample` does this for every estimator (feols, feiv, the event
+      study and the heterogeneity screens), so they all use the same sample.
+    - An `Absorber` holds the factorized fixed effects, so one set of FE can be
+      reused to demean any number of variables (outcomes, regressors,
+      instruments, interactions).
+    - Degrees of freedom follow reghdfe: fixed effects nested within the
+      cluster variable are not counted against the residual dof, and the
+      redundant levels of the first two fixed effects are the connected
+      components of their bipartite level graph (mobility groups); later
+      fixed effects count one redundant level each. `Absorber.dof_report`
+      lists levels, redundant levels and dof per fixed effect.
+"""
+
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import lsmr
+
+# Fixed effects with at least this many levels are absorbed by LSMR
+LSMR_MIN_LEVELS = 1000
+
+
+def factorize(values):
+    """Return integer codes (0..G-1, -1 for missing) and the number of levels."""
+    codes, uniques = pd.factorize(pd.Series(np.asarray(values)), sort=False)
+    return codes.astype(np.int64), len(uniques)
+
+
+def singleton_mask(fe_codes):
+    """Rows in singleton groups of any fixed effect, dropped iteratively
+    (removing a singleton can create new ones in another fixed effect)."""
+    fe_codes = [np.asarray(c) for c in fe_codes]
+    drop = np.zeros(len(fe_codes[0]) if fe_codes else 0, dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        for codes in fe_codes:
+            counts = np.bincount(codes[~drop], minlength=codes.max() + 1 if len(codes) else 0)
+            single = ~drop & (counts[codes] == 1)
+            if single.any():
+                drop |= single
+                changed = True
+    return drop
+
+
+def mobility_groups(codes_a, codes_b, n_a, n_b):
+    """Connected components of the bipartite graph linking levels of two
+    fixed effects that share observations."""
+    n = len(codes_a)
+    graph = sparse.csr_matrix((np.ones(n), (codes_a, n_a + codes_b)), shape=(n_a + n_b, n_a + n_b))
+    n_groups, _ = connected_components(graph, directed=False)
+    return n_groups
+
+
+class Absorber:
+    """Factorized fixed effects used to demean columns by alternating
+    projections or LSMR."""
+
+    def __init__(self, fe, tol=1e-10, maxiter=10000, method='auto', names=None):
+        self.tol = tol
+        self.maxiter = maxiter
+        self.codes = []
+        self.counts = []
+        self.incidence = []
+        for values in fe:
+            codes, n_levels = factorize(values)
+            if (codes < 0).any():
+                raise ValueError("Fixed effects contain missing values; drop them first")
+            self.codes.append(codes)
+            self.counts.append(np.bincount(codes, minlength=n_levels).astype(float))
+            # Sparse level-by-observation incidence: group sums of every
+            # column in one product
+            n = len(codes)
+            self.incidence.append(sparse.csr_matrix(
+                (np.ones(n), (codes, np.arange(n))), shape=(n_levels, n)))
+        self.nobs = len(self.codes[0]) if self.codes else None
+        self.names = list(names) if names is not None else [f"fe{k + 1}" for k in range(len(self.codes))]
+        if method == 'auto':
+            method = 'lsmr' if len(self.codes) > 1 and max(self.n_levels) >= LSMR_MIN_LEVELS else 'map'
+        if method not in ('map', 'lsmr'):
+            raise ValueError(f"Unknown absorb method: {method}")
+        self.method = method
+        self._design = None
+        # Rows dropped as singletons before these fixed effects were built
+        self.singletons = 0
+        # False once any demean call stops at maxiter without converging
+        self.converged = True
+
+    @property
+    def n_levels(self):
+        return [len(c) for c in self.counts]
+
+    def _sweep(self, X):
+        """One pass of group-mean subtraction over every fixed effect."""
+        for codes, counts, D in zip(self.codes, self.counts, self.incidence):
+            X -= (D @ X / counts[:, None])[codes]
+        return X
+
+    def design(self):
+        """Stacked observation-by-level incidence matrix with columns scaled
+        to unit norm (the diagonal preconditioner of LSMR)."""
+        if self._design is None:
+            self._design = sparse.hstack([
+                (D.T @ sparse.diags(1 / np.sqrt(counts))) for D, counts in zip(self.incidence, self.counts)
+            ]).tocsr()
+        return self._design
+
+    def _lsmr(self, X):
+        """Residuals of each column on the fixed effects, solved by LSMR."""
+        A = self.design()
+        for j in range(X.shape[1]):
+            sol = lsmr(A, X[:, j], atol=self.tol, btol=self.tol, maxiter=self.maxiter)
+            if sol[1] == 7:
+                self.converged = False
+                warnings.warn(f"LSMR did not converge in {self.maxiter} iterations", RuntimeWarning)
+            X[:, j] -= A @ sol[0]
+        return X
+
+    def demean(self, X):
+        """Partial the fixed effects out of every column of X (1-D or 2-D)."""
+        X = np.asarray(X, dtype=float)
+        squeeze = X.ndim == 1
+        X = np.array(X.reshape(len(X), -1), dtype=float, copy=True)
+        if not self.codes:
+            return X[:, 0] if squeeze else X
+
+        rms_before = np.sqrt((X ** 2).mean(axis=0))
+        if len(self.codes) == 1:
+            # A single fixed effect is an exact projection
+            X = self._sweep(X)
+        elif self.method == 'lsmr':
+            X = self._lsmr(X)
+        else:
+            scale = np.maximum(np.abs(X).max(axis=0), 1.0)
+            for _ in range(self.maxiter):
+                prev = X.copy()
+                X = self._sweep(X)
+                if (np.abs(X - prev).max(axis=0) / scale).max() < self.tol:
+                    break
+            else:
+                self.converged = False
+                warnings.warn(f"Demeaning did not converge in {self.maxiter} iterations", RuntimeWarning)
+
+        # Columns spanned by the fixed effects are exactly zero (omitted later)
+        collinear = np.sqrt((X ** 2).mean(axis=0)) < 1e-8 * np.maximum(rms_before, 1e-300)
+        X[:, collinear] = 0.0
+        return X[:, 0] if squeeze else X
+
+    def dof_report(self, cluster_codes=None):
+        """Levels, redundant levels and dof of each fixed effect (reghdfe conventions)."""
+        rows = []
+        free = []
+        for name, codes, counts in zip(self.names, self.codes, self.counts):
+            nested = cluster_codes is not None and _is_nested(codes, cluster_codes)
+            if nested:
+                redundant = len(counts)
+            elif not free:
+                redundant = 0
+            elif len(free) == 1:
+                # Exact for the first pair: one redundant level per mobility group
+                a = free[0]
+                redundant = mobility_groups(self.codes[a], codes, len(self.counts[a]), len(counts))
+            else:
+                redundant = 1
+            if not nested:
+                free.append(len(rows))
+            rows.append({'fe': name, 'levels': len(counts), 'nested': nested,
+                         'redundant': redundant, 'df': len(counts) - redundant})
+        return pd.DataFrame(rows, columns=['fe', 'levels', 'nested', 'redundant', 'df'])
+
+    def df_absorbed(self, cluster_codes=None):
+        """Degrees of freedom used by the fixed effects (reghdfe conventions)."""
+        if not self.codes:
+            return 0
+        # The constant is always absorbed, even when every FE is nested
+        return max(int(self.dof_report(cluster_codes)['df'].sum()), 1)
+
+
+def absorb_sample(fe, mask, drop_singletons=True, **kwargs):
+    """Estimation sample and Absorber of the fixed effects `fe`.
+
+    `fe` is a list of full-length vectors and `mask` the complete cases.
+    Returns the mask with singleton groups dropped (unless `drop_singletons`
+    is False) and an Absorber over exactly those rows; `absorber.singletons`
+    counts the rows dropped. Keyword arguments go to Absorber.
+    """
+    mask = np.array(mask, dtype=bool)
+    values = [np.asarray(f)[mask] for f in fe]
+    n_singletons = 0
+    if drop_singletons and values:
+        single = singleton_mask([factorize(v)[0] for v in values])
+        n_singletons = int(single.sum())
+        if n_singletons:
+            mask[np.flatnonzero(mask)[single]] = False
+            values = [v[~single] for v in values]
+    absorber = Absorber(values, **kwargs)
+    absorber.singletons = n_singletons
+    return mask, absorber
+
+
+def absorb_info(absorber, cluster_codes=None):
+    """Fixed-effect summary for FEResult.extra: levels and redundant levels
+    per fixed effect, the absorb method, the singletons dropped and whether
+    every demean call converged."""
+    report = absorber.dof_report(cluster_codes)
+    return {
+        'absorbed': ', '.join(
+            f"{r.fe} {r.levels:,}" + (" (nested)" if r.nested else
+                                     f" ({r.redundant:,} redundant)" if r.redundant else "")
+            for r in report.itertuples()),
+        'absorb_method': absorber.method,
+        'singletons': absorber.singletons,
+        'converged': absorber.converged,
+    }
+
+
+def _is_nested(codes, cluster_codes):
+    """True if every level of `codes` falls inside a single cluster."""
+    pairs = pd.DataFrame({'fe': codes, 'cl': cluster_codes}).drop_duplicates()
+    return pairs['fe'].is_unique
+
+
+@dataclass
+class FEResult:
+    """Coefficients and variance matrix from a fixed-effects regression."""
+    names: list
+    coef: np.ndarray
+    vcov: np.ndarray
+    nobs: int
+    df_resid: int
+    df_absorbed: int = 0
+    n_clusters: int = None
+    r2_within: float = np.nan
+    vce: str = 'robust'
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def se(self):
+        return np.sqrt(np.clip(np.diag(self.vcov), 0, None))
+
+    @property
+    def tstat(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.coef / self.se
+
+    @property
+    def pvalue(self):
+        return 2 * stats.t.sf(np.abs(self.tstat), self.df_resid)
+
+    def __getitem__(self, name):
+        """Return (coef, se) for one regressor, like _b[x] and _se[x]."""
+        i = self.names.index(name)
+        return self.coef[i], self.se[i]
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'coef': self.coef, 'se': self.se,
+            'tstat': self.tstat, 'pval': self.pvalue,
+        }, index=pd.Index(self.names, name='variable'))
+
+    def summary(self):
+        lines = [f"N = {self.nobs:,}   df_r = {self.df_resid:,}   vce = {self.vce}"
+                 + (f" ({self.n_clusters} clusters)" if self.n_clusters else "")
+                 + f"   within R2 = {self.r2_within:.4f}"]
+        if self.extra.get('absorbed'):
+            lines.append(f"  absorbed: {self.extra['absorbed']}   df_a = {self.df_absorbed:,}")
+        if self.extra.get('converged') is False:
+            lines.append("  WARNING: fixed effects not fully partialled out (did not converge)")
+        for name, (b, s, p) in zip(self.names, zip(self.coef, self.se, self.pvalue)):
+            lines.append(f"  {name:<24s} {b:>10.4f} ({s:.4f})  p={p:.3f}")
+        return "\n".join(lines)
+
+
+def cluster_scores(scores, cluster_codes, n_clusters):
+    """Sum observation-level scores (n x k) within clusters (G x k)."""
+    return np.column_stack([
+        np.bincount(cluster_codes, weights=scores[:, j], minlength=n_clusters)
+        for j in range(scores.shape[1])
+    ])
+
+
+def sandwich(X, resid, bread, cluster_codes=None, n_clusters=None, df_model=0):
+    """HC1 or one-way cluster-robust variance with Stata small-sample factors."""
+    n = X.shape[0]
+    scores = X * resid[:, None]
+    if cluster_codes is None:
+        meat = scores.T @ scores
+        q = n / max(n - df_model, 1)
+    else:
+        S = cluster_scores(scores, cluster_codes, n_clusters)
+        meat = S.T @ S
+        q = (n - 1) / max(n - df_model, 1) * n_clusters / max(n_clusters - 1, 1)
+    return q * bread @ meat @ bread
+
+
+def ols(y, X, names=None, cluster=None, df_absorbed=0, y_tss=None):
+    """OLS on already-demeaned data.
+
+    `cluster` is a vector of cluster identifiers (None for HC1 robust).
+    `df_absorbed` is the dof consumed by the fixed effects that produced the
+    demeaned data. `y_tss` overrides the total sum of squares for R2.
+    """
+    y = np.asarray(y, dtype=float)
+    X = np.asarray(X, dtype=float).reshape(len(y), -1)
+
+    # Regressors absorbed by the fixed effects were zeroed by Absorber.demean
+    # (relative to their own scale) and get coef and SE of 0. Columns are
+    # scaled to unit norm before the inverse so that the rank tolerance of
+    # pinv does not depend on the units of a regressor.
+    scale = np.sqrt((X ** 2).sum(axis=0))
+    scale[scale == 0] = 1.0
+    bread = np.linalg.pinv((X / scale).T @ (X / scale)) / np.outer(scale, scale)
+    coef = bread @ (X.T @ y)
+    resid = y - X @ coef
+
+    tss = y_tss if y_tss is not None else float(((y - y.mean()) ** 2).sum())
+    return ols_from_fit(X, coef, resid, bread, names, cluster, df_absorbed, tss)
+
+
+def ols_from_fit(X, coef, resid, bread, names=None, cluster=None, df_absorbed=0, tss=np.nan):
+    """Assemble an FEResult from a solved least-squares fit.
+
+    `bread` is (X'X)^-1. Used directly by estimators that update a fit rather
+    than re-solving it (e.g. Frisch-Waugh-Lovell updates in heterogeneity.py).
+    """
+    n, k = X.shape
+    names = list(names) if names is not None else [f"x{j}" for j in range(k)]
+
+    df_model = k + df_absorbed
+    if cluster is not None:
+        cl_codes, G = factorize(cluster)
+        vcov = sandwich(X, resid, bread, cl_codes, G, df_model)
+        df_resid = G - 1
+        vce = 'cluster'
+    else:
+        G = None
+        vcov = sandwich(X, resid, bread, df_model=df_model)
+        df_resid = n - df_model
+        vce = 'robust'
+
+    r2 = 1 - float(resid @ resid) / tss if tss > 0 else np.nan
+
+    return FEResult(names=names, coef=coef, vcov=vcov, nobs=n, df_resid=df_resid,
+                    df_absorbed=df_absorbed, n_clusters=G, r2_within=r2, vce=vce)
+
+
+def complete_cases(*arrays):
+    """Boolean mask of rows with no missing values in any of the arrays."""
+    mask = None
+    for a in arrays:
+        if a is None:
+            continue
+        m = pd.DataFrame(np.asarray(a).reshape(len(a), -1)).notna().all(axis=1).to_numpy()
+        mask = m if mask is None else mask & m
+    return mask
+
+
+def feols(y, X, fe=None, cluster=None, names=None, tol=1e-10, method='auto',
+          drop_singletons=True):
+    """OLS of y on X absorbing the fixed effects in `fe` (list of vectors).
+
+    Rows with missing y, X, fixed effects or cluster are dropped, as in Stata,
+    and so are singleton groups unless `drop_singletons` is False.
+    `method` is 'map', 'lsmr' or 'auto' (see Absorber).
+    With no fixed effects a constant is included and reported as `_cons`.
+    """
+    if names is None and isinstance(X, pd.DataFrame):
+        names = list(X.columns)
+    elif names is None and isinstance(X, pd.Series):
+        names = [X.name]
+    fe = list(fe) if fe is not None else []
+    fe_names = [getattr(f, 'name', None) or f"fe{k + 1}" for k, f in enumerate(fe)]
+
+    y = np.asarray(y, dtype=float)
+    X = np.asarray(X, dtype=float).reshape(len(y), -1)
+    fe_arrays = [np.asarray(f) for f in fe]
+    mask = complete_cases(y, X, *fe_arrays, cluster)
+
+    if fe_arrays:
+        mask, absorber = absorb_sample(fe_arrays, mask, drop_singletons,
+                                       tol=tol, method=method, names=fe_names)
+        cl = None if cluster is None else np.asarray(cluster)[mask]
+        Z = absorber.demean(np.column_stack([y[mask], X[mask]]))
+        cl_codes = factorize(cl)[0] if cl is not None else None
+        res = ols(Z[:, 0], Z[:, 1:], names=names, cluster=cl,
+                  df_absorbed=absorber.df_absorbed(cl_codes))
+        res.extra.update(absorb_info(absorber, cl_codes))
+        return res
+
+    y, X = y[mask], X[mask]
+    cl = None if cluster is None else np.asarray(cluster)[mask]
+    X = np.column_stack([X, np.ones(len(y))])
+    names = (list(names) if names is not None else [f"x{j}" for j in range(X.shape[1] - 1)]) + ['_cons']
+    res = ols(y, X, names=names, cluster=cl)
+    res.extra['singletons'] = 0
+    return res
@@ -0,0 +1,352 @@
+"""
+Batch Fintech Creditworthiness Scores
+Purpose: Compute the composite fintech scores of 03_fintech_credit_scores.do and
+         05_fintech_creditworthiness_analysis.do, and any number of alternative
+         weightings, in one matrix product: the component indices are
+         standardized together into Z, the weighting schemes are the columns
+         of W, and every score variant is a column of S = Z W. Percentile
+         groups, terciles and median splits are computed for all variants at
+         once. Panels larger than memory are scored chunk by chunk.
+Date: October 2026
+
+Usage:
+    python fintech_scores.py                 # baseline + 250 alternative schemes
+    python fintech_scores.py --random 1000   # number of random weightings
+
+    from fintech_scores import SCHEMES, score_variants
+    scores = score_variants(df, SCHEMES)     # score, pctile, tercile, high per scheme
+
+Requirements:
+    - numpy, pandas
+
+Input files:
+    - Results/caps_fintech_scores.dta  (component indices, from 05)
+
+Output files:
+    - Results/fintech_score_variants.csv  (one row per scheme: weights, mean,
+                                           sd, correlation with the baseline
+                                           score and with default_90)
+
+Notes:
+    - Missing components: by default a score is missing if any component with
+      a nonzero weight is missing (as `gen` in Stata). With renormalize=True
+      the weights are rescaled over the components observed in each row (as
+      `egen rowmean`), which is how fintech_score_simple is defined.
+    - Percentile groups and terciles follow `xtile, nq()`: cutoffs are Stata's
+      default percentiles and x <= cutoff falls in the lower group.
+    - fintech_score_payment is a rule-based score on individual indicators,
+      not a weighting of the component indices, and stays in the Do-file.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+SCORES_FILE = ROOT / "Results" / "caps_fintech_scores.dta"
+OUTPUT_FILE = ROOT / "Results" / "fintech_score_variants.csv"
+
+# Component indices (0-100, higher = more creditworthy) built in 05
+COMPONENTS = ['payment_index', 'income_index', 'resilience_index', 'debt_index',
+              'stability_index', 'education_index', 'afs_index', 'afs_nonuser']
+
+# Weighting schemes of 05: component -> weight (absent = 0)
+SCHEMES = {
+    'fintech_score_weighted': {
+        'weights': {'payment_index': 0.40, 'income_index': 0.25, 'resilience_index': 0.15,
+                    'debt_index': 0.10, 'stability_index': 0.05, 'education_index': 0.03,
+                    'afs_nonuser': 0.02},
+        'renormalize': False,
+    },
+    'fintech_score_simple': {
+        'weights': {c: 1 / 7 for c in COMPONENTS if c != 'afs_nonuser'},
+        'renormalize': True,
+    },
+}
+
+BASELINE = 'fintech_score_weighted'
+
+
+def available(df, components=COMPONENTS):
+    """Components that can be built from df."""
+    return [c for c in components if c in df or (c == 'afs_nonuser' and 'afs_user' in df)]
+
+
+def component_matrix(df, components=COMPONENTS):
+    """n x k float matrix of the components (afs_nonuser = 100 - 100 * afs_user)."""
+    cols = []
+    for c in components:
+        if c == 'afs_nonuser' and c not in df:
+            cols.append(100 - 100 * df['afs_user'].to_numpy(dtype=float))
+        else:
+            cols.append(df[c].to_numpy(dtype=float))
+    return np.column_stack(cols)
+
+
+def moments(Z):
+    """(count, mean, M2) of each column over non-missing values."""
+    n = (~np.isnan(Z)).sum(axis=0)
+    mean = np.nanmean(Z, axis=0) if len(Z) else np.zeros(Z.shape[1])
+    M2 = np.nansum((Z - mean) ** 2, axis=0)
+    return n, np.nan_to_num(mean), M2
+
+
+def combine_moments(a, b):
+    """Pooled (count, mean, M2) of two chunks (Chan et al.)."""
+    n_a, mean_a, M2_a = a
+    n_b, mean_b, M2_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w = np.where(n > 0, n_b / np.maximum(n, 1), 0)
+    return n, mean_a + delta * w, M2_a + M2_b + delta ** 2 * n_a * w
+
+
+def standardize(Z, how='raw', stats=None):
+    """Rescale every component at once.
+
+    how   'raw'  indices as they are (05 weighted and simple scores)
+          'unit' x / 100 (the *_std variables of 05)
+          'z'    (x - mean) / sd, as `egen std()` (03 composite)
+    stats (count, mean, M2) to use for 'z' instead of Z's own (streaming)
+    """
+    if how == 'raw':
+        return Z
+    if how == 'unit':
+        return Z / 100
+    if how == 'z':
+        n, mean, M2 = stats if stats is not None else moments(Z)
+        sd = np.sqrt(M2 / np.maximum(n - 1, 1))
+        return (Z - mean) / np.where(sd > 0, sd, np.nan)
+    raise ValueError(f"Unknown standardization: {how}")
+
+
+def weight_matrix(schemes, components=COMPONENTS):
+    """k x m weight matrix and the per-scheme renormalize flags."""
+    W = np.array([[s['weights'].get(c, 0.0) for s in schemes.values()] for c in components])
+    renorm = np.array([s.get('renormalize', False) for s in schemes.values()])
+    return W, renorm
+
+
+def score_matrix(Z, W, renorm=None):
+    """n x m scores S = Z W, with missing handling per scheme (see Notes)."""
+    observed = ~np.isnan(Z)
+    S = np.where(observed, Z, 0.0) @ W
+    used = W != 0
+    # Any weighted component missing -> missing score
+    complete = (~observed).astype(float) @ used.astype(float) == 0
+    out = np.where(complete, S, np.nan)
+    if renorm is not None and renorm.any():
+        r = np.flatnonzero(renorm)
+        avail = observed.astype(float) @ W[:, r]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, r] = np.where(avail != 0, S[:, r] / avail * W[:, r].sum(axis=0), np.nan)
+    return out
+
+
+def xtile_cutoffs(S, nq, S_sorted=None):
+    """(nq - 1) x m cutoffs of `xtile, nq()` for every column of S.
+
+    Stata's default percentile: with N non-missing values and P = N p, the
+    average of the P-th and (P+1)-th values if P is an integer, else the
+    ceil(P)-th value. One column-wise sort serves every nq.
+    """
+    if S_sorted is None:
+        S_sorted = np.sort(S, axis=0)            # NaNs sort last
+    N = (~np.isnan(S_sorted)).sum(axis=0)
+    P = np.outer(np.arange(1, nq), N) / nq
+    lo = np.clip(np.ceil(P).astype(int) - 1, 0, len(S_sorted) - 1)
+    hi = np.where(P == np.floor(P), np.minimum(lo + 1, len(S_sorted) - 1), lo)
+    cols = np.arange(S_sorted.shape[1])
+    return (S_sorted[lo, cols] + S_sorted[hi, cols]) / 2
+
+
+def xtile(S, cutoffs):
+    """Group 1..nq of every score (x <= cutoff -> lower group), NaN if missing."""
+    St = np.ascontiguousarray(S.T)
+    G = np.empty(St.shape)
+    for j in range(St.shape[0]):
+        G[j] = np.searchsorted(cutoffs[:, j], St[j], side='left') + 1
+    G[np.isnan(St)] = np.nan
+    return G.T
+
+
+def _sorted_groups(order, sorted_rows, cutoffs):
+    """xtile groups from a row-wise argsort of S.T, without a search per value.
+
+    In sorted order the group only steps up where a cutoff is passed, so it
+    is a cumulative count of cutoff positions, scattered back through `order`.
+    """
+    m, n = sorted_rows.shape
+    # First sorted position with value > cutoff (NaNs sort last)
+    pos = np.array([np.searchsorted(sorted_rows[j], cutoffs[:, j], side='right')
+                    for j in range(m)])
+    steps = np.zeros((m, n + 1))
+    np.add.at(steps, (np.broadcast_to(np.arange(m)[:, None], pos.shape), pos), 1)
+    G = np.empty((m, n))
+    np.put_along_axis(G, order, np.cumsum(steps[:, :n], axis=1) + 1, axis=1)
+    return G.T
+
+
+def splits(S, nq=(100, 3)):
+    """Percentile groups, terciles and above-median indicators for every column."""
+    # Variants as contiguous rows: sorting along the last axis is much faster
+    St = np.ascontiguousarray(S.T)
+    order = np.argsort(St, axis=1)
+    sorted_rows = np.take_along_axis(St, order, axis=1)
+    missing = np.isnan(S)
+    out = {}
+    for q in nq:
+        out[q] = _sorted_groups(order, sorted_rows, xtile_cutoffs(S, q, sorted_rows.T))
+        out[q][missing] = np.nan
+    median = xtile_cutoffs(S, 2, sorted_rows.T)[0]
+    out['high'] = np.where(missing, np.nan, (S > median).astype(float))
+    return out
+
+
+def score_variants(df, schemes=SCHEMES, how='raw', components=None):
+    """DataFrame with <scheme>, _pctile, _tercile and _high for every scheme."""
+    components = components or available(df)
+    W, renorm = weight_matrix(schemes, components)
+    S = score_matrix(standardize(component_matrix(df, components), how), W, renorm)
+    groups = splits(S)
+    out = {}
+    for j, name in enumerate(schemes):
+        out[name] = S[:, j]
+        out[f"{name}_pctile"] = groups[100][:, j]
+        out[f"{name}_tercile"] = groups[3][:, j]
+        out[f"{name}_high"] = groups['high'][:, j]
+    return pd.DataFrame(out, index=df.index)
+
+
+def stream_scores(path, schemes, out_dir, how='raw', components=COMPONENTS, chunksize=500_000):
+    """Score a .dta panel too large for memory.
+
+    Pass 1 collects component moments (only for how='z'); pass 2 writes the
+    n x m scores to a memory-mapped .npy; the cutoffs are then computed on
+    the mapped scores and pass 3 writes the percentile groups and splits
+    (int8; 0 = missing score for pctile / tercile, -1 for high).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cols = [c for c in components if c != 'afs_nonuser'] + (['afs_user'] if 'afs_nonuser' in components else [])
+    chunks = lambda: pd.read_stata(path, columns=cols, chunksize=chunksize, convert_categoricals=False)
+
+    stats = None
+    n = 0
+    for chunk in chunks():
+        if how == 'z':
+            m = moments(component_matrix(chunk, components))
+            stats = m if stats is None else combine_moments(stats, m)
+        n += len(chunk)
+
+    W, renorm = weight_matrix(schemes, components)
+    S = np.lib.format.open_memmap(out_dir / "scores.npy", mode='w+', dtype=np.float32,
+                                  shape=(n, W.shape[1]))
+    start = 0
+    for chunk in chunks():
+        Z = standardize(component_matrix(chunk, components), how, stats)
+        S[start:start + len(chunk)] = score_matrix(Z, W, renorm)
+        start += len(chunk)
+    S.flush()
+
+    # Cutoffs per block of variants, then group every row
+    pct = np.empty((99, S.shape[1]))
+    ter = np.empty((2, S.shape[1]))
+    med = np.empty(S.shape[1])
+    block = max(1, int(2e8 // max(n * 8, 1)))
+    for j in range(0, S.shape[1], block):
+        cols_j = np.sort(np.asarray(S[:, j:j + block], dtype=float), axis=0)
+        pct[:, j:j + block] = xtile_cutoffs(None, 100, cols_j)
+        ter[:, j:j + block] = xtile_cutoffs(None, 3, cols_j)
+        med[j:j + block] = xtile_cutoffs(None, 2, cols_j)[0]
+
+    groups = {}
+    for name in ('pctile', 'tercile', 'high'):
+        groups[name] = np.lib.format.open_memmap(out_dir / f"{name}.npy", mode='w+',
+                                                 dtype=np.int8, shape=S.shape)
+    for start in range(0, n, chunksize):
+        s = np.asarray(S[start:start + chunksize], dtype=float)
+        missing = np.isnan(s)
+        groups['pctile'][start:start + len(s)] = np.where(missing, 0, xtile(s, pct))
+        groups['tercile'][start:start + len(s)] = np.where(missing, 0, xtile(s, ter))
+        groups['high'][start:start + len(s)] = np.where(missing, -1, s > med)
+    for g in groups.values():
+        g.flush()
+    pd.Series(list(schemes), name='scheme').to_csv(out_dir / "schemes.csv", index=False)
+    return S
+
+
+def random_schemes(base, n, seed=20260, concentration=20.0, components=COMPONENTS):
+    """n Dirichlet perturbations of a scheme's weights (same total weight)."""
+    rng = np.random.default_rng(seed)
+    names = [c for c in components if base['weights'].get(c, 0) > 0]
+    w = np.array([base['weights'][c] for c in names])
+    draws = rng.dirichlet(w / w.sum() * concentration, size=n) * w.sum()
+    return {f"random_{i:04d}": {'weights': dict(zip(names, d)),
+                                'renormalize': base.get('renormalize', False)}
+            for i, d in enumerate(draws)}
+
+
+def leave_one_out(base, components=COMPONENTS):
+    """Scheme without each component, remaining weights rescaled to the same total."""
+    total = sum(base['weights'].values())
+    out = {}
+    for c, w in base['weights'].items():
+        if w == 0 or c not in components:
+            continue
+        rest = {k: v for k, v in base['weights'].items() if k != c}
+        scale = total / sum(rest.values())
+        out[f"drop_{c}"] = {'weights': {k: v * scale for k, v in rest.items()},
+                            'renormalize': base.get('renormalize', False)}
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch fintech score variants.")
+    parser.add_argument('--random', type=int, default=250, help="random weightings")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FINTECH SCORE VARIANTS")
+    print("=" * 60)
+
+    df = pd.read_stata(SCORES_FILE, convert_categoricals=False)
+    components = available(df)
+    missing = sorted(set(COMPONENTS) - set(components))
+    if missing:
+        print(f"Components not in {SCORES_FILE.name} (weight set to 0): {', '.join(missing)}")
+
+    schemes = dict(SCHEMES)
+    schemes.update(leave_one_out(SCHEMES[BASELINE], components))
+    schemes.update(random_schemes(SCHEMES[BASELINE], args.random, components=components))
+
+    W, renorm = weight_matrix(schemes, components)
+    S = score_matrix(component_matrix(df, components), W, renorm)
+    print(f"Scored {S.shape[1]} schemes on {S.shape[0]:,} observations")
+
+    # Vectorized summaries across all variants
+    base = S[:, list(schemes).index(BASELINE)]
+    summary = pd.DataFrame(W.T, columns=[f"w_{c}" for c in components], index=list(schemes))
+    summary['mean'] = np.nanmean(S, axis=0)
+    summary['sd'] = np.nanstd(S, axis=0, ddof=1)
+    summary['corr_baseline'] = pd.DataFrame(S).corrwith(pd.Series(base)).to_numpy()
+    if 'default_90' in df:
+        summary['corr_default_90'] = pd.DataFrame(S).corrwith(df['default_90'].reset_index(drop=True)).to_numpy()
+    groups = splits(S, nq=(3,))
+    summary['share_high'] = np.nanmean(groups['high'], axis=0)
+
+    summary.index.name = 'scheme'
+    summary.to_csv(OUTPUT_FILE, float_format='%.6f')
+    print(f"Saved: {OUTPUT_FILE}")
+
+    print("\n" + summary.loc[list(SCHEMES) + [s for s in schemes if s.startswith('drop_')],
+                             [c for c in ['mean', 'sd', 'corr_baseline', 'corr_default_90'] if c in summary]]
+          .round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
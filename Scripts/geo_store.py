@@ -0,0 +1,259 @@
+"""
+Geographic Attribute Store
+Purpose: Keep the prepared geographic covariates of 04_prepare_geographic_data.do
+         (social capital, fintech shares, food access, broadband, dollar
+         stores, banking deserts) as typed, memory-mapped columns indexed by
+         ZIP or county FIPS (and year where relevant), so a job that needs two
+         columns reads those two columns for the rows it asks for, instead of
+         loading every .dta file in full.
+Date: October 2026
+
+Usage:
+    python geo_store.py              # build / refresh the store from the .dta files
+    python geo_store.py --list       # show sources and columns
+
+    from geo_store import GeoStore
+    geo = GeoStore()
+    ec = geo.fetch('social_capital', ['economic_connectedness'], keys=df['zip'])
+    df = geo.attach(df, 'banking_deserts', ['branches_per_10k', 'banking_desert'],
+                    on='county_fips')
+    df = geo.attach(df, 'fintech_county', ['fintech_share'], on='county_fips', year='year')
+
+Requirements:
+    - numpy, pandas
+
+Input files (written by 04_prepare_geographic_data.do):
+    - Data/Social_Capital/social_capital_zip.dta
+    - Data/fintech_county_clean.dta
+    - Data/Food_Access/food_access_county.dta
+    - Data/Broadband/broadband_zip.dta
+    - Data/Dollar_Stores/dollar_stores_county.dta
+    - Data/Banking_Deserts/banking_access_county.dta
+
+Output files:
+    - Data/geo_store/<source>/   one .npy per column plus meta.json
+
+Layout (Data/geo_store/<source>/):
+    meta.json       key, year, columns with dtypes and Stata labels, and the
+                    size/mtime of the .dta it was built from
+    slot.npy        int32[100000] row of each ZIP / county code (no-year sources)
+    code.npy        int64[N] sorted key * 10000 + year (yearly sources)
+    <column>.npy    one typed column each (strings as fixed-width unicode)
+
+Notes:
+    - A source is rebuilt only when its .dta changed (size or mtime).
+    - Keys must be unique per (key, year); build raises ValueError otherwise.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "Data"
+STORE_DIR = DATA_DIR / "geo_store"
+
+# ZIP codes and county FIPS are both five digits
+N_CODES = 100_000
+
+# name -> prepared file, key variable, year variable
+SOURCES = {
+    'social_capital': {'file': DATA_DIR / "Social_Capital" / "social_capital_zip.dta",
+                       'key': 'zip', 'year': None},
+    'fintech_county': {'file': DATA_DIR / "fintech_county_clean.dta",
+                       'key': 'county_fips', 'year': 'year'},
+    'food_access': {'file': DATA_DIR / "Food_Access" / "food_access_county.dta",
+                    'key': 'county_fips', 'year': None},
+    'broadband': {'file': DATA_DIR / "Broadband" / "broadband_zip.dta",
+                  'key': 'zip', 'year': None},
+    'dollar_stores': {'file': DATA_DIR / "Dollar_Stores" / "dollar_stores_county.dta",
+                      'key': 'county_fips', 'year': None},
+    'banking_deserts': {'file': DATA_DIR / "Banking_Deserts" / "banking_access_county.dta",
+                        'key': 'county_fips', 'year': None},
+}
+
+
+def _stamp(path):
+    st = Path(path).stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _codes(values):
+    """Integer codes of ZIP / FIPS / year values, -1 where missing or invalid."""
+    codes = pd.to_numeric(pd.Series(values), errors='coerce')
+    return codes.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _column_array(s):
+    """Typed array of a column: numeric as is, anything else as fixed-width unicode."""
+    if s.dtype.kind in 'biuf':
+        return s.to_numpy()
+    return s.astype(str).where(s.notna(), '').to_numpy(dtype=str)
+
+
+def build_source(name, df, key, year=None, root=STORE_DIR, labels=None, stamp=None):
+    """Write one source's columns, sorted by key (and year)."""
+    keys = _codes(df[key])
+    if (keys < 0).any() or (keys >= N_CODES).any():
+        raise ValueError(f"{name}: {key} must be a five-digit code for every row")
+    by = [key] if year is None else [key, year]
+    if df.duplicated(by).any():
+        raise ValueError(f"{name}: duplicate {' x '.join(by)} rows")
+
+    df = df.sort_values(by, kind='stable').reset_index(drop=True)
+    out = Path(root) / name
+    out.mkdir(parents=True, exist_ok=True)
+    for old in out.glob("*.npy"):
+        old.unlink()
+
+    keys = _codes(df[key])
+    if year is None:
+        slot = np.full(N_CODES, -1, dtype=np.int32)
+        slot[keys] = np.arange(len(df), dtype=np.int32)
+        np.save(out / "slot.npy", slot)
+    else:
+        np.save(out / "code.npy", keys * 10_000 + _codes(df[year]))
+
+    columns = {}
+    for col in df.columns:
+        arr = _column_array(df[col])
+        np.save(out / f"{col}.npy", arr)
+        columns[col] = {'dtype': arr.dtype.str, 'label': (labels or {}).get(col, '')}
+    meta = {'key': key, 'year': year, 'nrows': len(df), 'columns': columns, 'stamp': stamp}
+    (out / "meta.json").write_text(json.dumps(meta, indent=1))
+    return meta
+
+
+class GeoStore:
+    """Selective, memory-mapped column fetches from the prepared sources."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self._meta = {}
+
+    def sources(self):
+        return sorted(p.parent.name for p in self.root.glob("*/meta.json"))
+
+    def meta(self, source):
+        if source not in self._meta:
+            path = self.root / source / "meta.json"
+            if not path.exists():
+                raise KeyError(f"{source} is not in the store; run geo_store.py")
+            self._meta[source] = json.loads(path.read_text())
+        return self._meta[source]
+
+    def columns(self, source):
+        return list(self.meta(source)['columns'])
+
+    def column(self, source, col):
+        """One memory-mapped column (no data is read until it is indexed)."""
+        if col not in self.meta(source)['columns']:
+            raise KeyError(f"{source} has no column {col}")
+        return np.load(self.root / source / f"{col}.npy", mmap_mode='r')
+
+    def rows(self, source, keys, years=None):
+        """Row of each (key[, year]) in the source, -1 where absent."""
+        meta = self.meta(source)
+        keys = _codes(keys)
+        valid = (keys >= 0) & (keys < N_CODES)
+        if meta['year'] is None:
+            slot = np.load(self.root / source / "slot.npy", mmap_mode='r')
+            return np.where(valid, slot[np.where(valid, keys, 0)], -1)
+
+        if years is None:
+            raise ValueError(f"{source} is by {meta['key']} and {meta['year']}; pass years")
+        code = np.load(self.root / source / "code.npy", mmap_mode='r')
+        if not len(code):
+            return np.full(len(keys), -1, dtype=np.int64)
+        target = keys * 10_000 + _codes(years)
+        pos = np.minimum(np.searchsorted(code, target), len(code) - 1)
+        return np.where(valid & (code[pos] == target), pos, -1)
+
+    def fetch(self, source, columns, keys=None, years=None):
+        """DataFrame of `columns`: the whole source, or one row per key (NaN if absent)."""
+        if keys is None:
+            return pd.DataFrame({c: np.asarray(self.column(source, c)) for c in columns})
+
+        rows = self.rows(source, keys, years)
+        found = rows >= 0
+        take = np.where(found, rows, 0)
+        out = {}
+        for c in columns:
+            col = self.column(source, c)
+            # An empty source has nothing to take; every key is absent
+            values = col[take] if len(col) else np.zeros(len(take), dtype=col.dtype)
+            if not found.all():
+                if values.dtype.kind in 'biu':
+                    values = values.astype(float)
+                if values.dtype.kind == 'f':
+                    values[~found] = np.nan
+                else:
+                    values = values.astype(object)
+                    values[~found] = None
+            out[c] = values
+        index = keys.index if isinstance(keys, pd.Series) else None
+        return pd.DataFrame(out, index=index)
+
+    def attach(self, df, source, columns, on, year=None):
+        """df with `columns` of a source added (a left m:1 merge on `on` [and `year`])."""
+        fetched = self.fetch(source, columns, keys=df[on],
+                             years=df[year] if year is not None else None)
+        return df.assign(**{c: fetched[c].to_numpy() for c in columns})
+
+
+def build(names=None, root=STORE_DIR, force=False):
+    """Refresh the store from every prepared .dta that exists and changed."""
+    built = {}
+    for name in names or SOURCES:
+        src = SOURCES[name]
+        if not src['file'].exists():
+            print(f"  {name:<18s} not available - skipping")
+            continue
+        stamp = _stamp(src['file'])
+        meta_file = Path(root) / name / "meta.json"
+        if not force and meta_file.exists() and json.loads(meta_file.read_text())['stamp'] == stamp:
+            print(f"  {name:<18s} up to date")
+            continue
+        reader = pd.io.stata.StataReader(src['file'])
+        with reader:
+            df = reader.read(convert_categoricals=False)
+            labels = reader.variable_labels()
+        built[name] = build_source(name, df, src['key'], src['year'], root, labels, stamp)
+        print(f"  {name:<18s} {len(df):>8,} rows, {len(df.columns):>3} columns")
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the geographic attribute store.")
+    parser.add_argument('names', nargs='*', help=f"sources to build ({', '.join(SOURCES)})")
+    parser.add_argument('--force', action='store_true', help="rebuild unchanged sources")
+    parser.add_argument('--list', action='store_true', help="list sources and columns")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("GEOGRAPHIC ATTRIBUTE STORE")
+    print("=" * 60)
+
+    if args.list:
+        geo = GeoStore()
+        for name in geo.sources():
+            meta = geo.meta(name)
+            index = meta['key'] + (f" x {meta['year']}" if meta['year'] else '')
+            print(f"\n{name} ({meta['nrows']:,} rows by {index})")
+            for col, info in meta['columns'].items():
+                print(f"  {col:<28s} {info['dtype']:<6s} {info['label']}")
+        return
+
+    unknown = set(args.names) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(sorted(unknown))}")
+    build(args.names or None, force=args.force)
+    print(f"\nStore: {STORE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
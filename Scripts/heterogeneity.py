@@ -0,0 +1,269 @@
+"""
+Batch Heterogeneity Estimation
+Purpose: Screen many moderators of the closure (x fintech) effect in one pass.
+         The shared base design is demeaned once; each moderator's interaction
+         terms are added by a Frisch-Waugh-Lovell update on that design.
+         Replaces the per-moderator reghdfe loops in 13_heterogeneity_analysis.do,
+         14_dose_response.do and the component loop in
+         05_fintech_creditworthiness_analysis.do.
+Date: October 2026
+
+Usage:
+    python heterogeneity.py
+
+    from heterogeneity import batch_interactions, dose_bins
+    table = batch_interactions(df, 'anytoise', base=['closure_zip'],
+                               interact=['closure_zip'],
+                               moderators={'income_std': df['income_std']},
+                               fe=['mergerID', 'year'], cluster='county_fips')
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+    - Data/Banking_Deserts/banking_access_county.dta
+
+Output files:
+    - Output/heterogeneity_batch.csv
+
+Notes:
+    - A moderator is a Series (one variable) or a DataFrame (e.g. a set of dose
+      bins). For each moderator column m the model adds `interact` x m, and
+      also m itself when main_effect=True (the triple-interaction designs).
+    - Moderators observed on the whole base sample use the fast update.
+      Moderators with missing values change the estimation sample, as in
+      Stata, and are refit on their own subsample.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from caps_panel import read_caps
+from fe_regression import absorb_sample, complete_cases, factorize, ols, ols_from_fit
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+BANKING_FILE = ROOT / "Data" / "Banking_Deserts" / "banking_access_county.dta"
+OUTPUT_FILE = ROOT / "Output" / "heterogeneity_batch.csv"
+
+
+def standardize(x):
+    """(x - mean) / sd over non-missing values, as `sum` + `gen x_std` in Stata."""
+    x = pd.Series(x, dtype=float)
+    return (x - x.mean()) / x.std()
+
+
+def dose_bins(x, q=None, edges=None, name=None):
+    """Indicator columns for dose bins of x, omitting the lowest bin.
+
+    Pass quantiles `q` (e.g. [0.5] for a median split, [0.25, 0.5, 0.75] for
+    quartiles) or explicit bin `edges`. Missing x stays missing.
+    """
+    x = pd.Series(x, dtype=float)
+    name = name or x.name or 'dose'
+    cuts = x.quantile(q).to_numpy() if edges is None else np.asarray(edges, dtype=float)
+    bins = np.searchsorted(np.unique(cuts), x.to_numpy(), side='right').astype(float)
+    bins[x.isna().to_numpy()] = np.nan
+    out = pd.DataFrame(index=x.index)
+    for b in range(1, len(np.unique(cuts)) + 1):
+        out[f"{name}_bin{b}"] = np.where(np.isnan(bins), np.nan, (bins == b).astype(float))
+    return out
+
+
+def _added_columns(moderator, interact_values, interact, main_effect):
+    """Moderator columns and their interactions with the `interact` variables."""
+    cols, names = [], []
+    for m_name in moderator.columns:
+        m = moderator[m_name].to_numpy(dtype=float)
+        if main_effect:
+            cols.append(m)
+            names.append(m_name)
+        for j, v in enumerate(interact):
+            cols.append(interact_values[:, j] * m)
+            names.append(f"{v}_x_{m_name}")
+    return np.column_stack(cols), names
+
+
+def _fwl_update(name, A, Ad, names, ctx):
+    """Add one moderator's (already demeaned) terms to the base fit.
+
+    Frisch-Waugh-Lovell: the new coefficients come from regressing the base
+    residual on the new columns net of the base design; the base design is
+    never re-solved.
+    """
+    B = ctx['Bd']
+    F = ctx['BtB_inv'] @ (B.T @ Ad)
+    A_perp = Ad - B @ F
+    S_inv = np.linalg.pinv(A_perp.T @ A_perp)
+    gamma = S_inv @ (A_perp.T @ ctx['e0'])
+    beta = ctx['b0'] - F @ gamma
+    resid = ctx['e0'] - A_perp @ gamma
+
+    # Partitioned inverse of [B, Ad]'[B, Ad]
+    bread = np.block([[ctx['BtB_inv'] + F @ S_inv @ F.T, -F @ S_inv],
+                      [-S_inv @ F.T, S_inv]])
+    res = ols_from_fit(np.column_stack([B, Ad]), np.r_[beta, gamma], resid, bread,
+                       ctx['base'] + names, ctx['cl'], ctx['df_abs'], ctx['tss'])
+    res.extra['singletons'] = ctx['singletons']
+    res.extra['converged'] = ctx['absorber'].converged
+    return _to_table(name, res, 'fwl')
+
+
+def _refit(name, A, names, ctx):
+    """Moderator missing for part of the sample: refit on its own sample."""
+    keep = ctx['complete'] & ~np.isnan(A).any(axis=1)
+    keep, absorber = absorb_sample(ctx['fe_values'], keep)
+    cl = ctx['cl_full'][keep] if ctx['cl_full'] is not None else None
+    Z = absorber.demean(np.column_stack([ctx['y'][keep], ctx['base_values'][keep], A[keep]]))
+    res = ols(Z[:, 0], Z[:, 1:], names=ctx['base'] + names, cluster=cl,
+              df_absorbed=absorber.df_absorbed(factorize(cl)[0] if cl is not None else None))
+    res.extra['singletons'] = absorber.singletons
+    res.extra['converged'] = absorber.converged
+    return _to_table(name, res, 'refit')
+
+
+def _to_table(name, res, path):
+    table = res.to_frame().reset_index()
+    table.insert(0, 'moderator', name)
+    table['nobs'] = res.nobs
+    table['singletons'] = res.extra.get('singletons', 0)
+    table['converged'] = res.extra.get('converged', True)
+    table['path'] = path
+    return table
+
+
+def batch_interactions(df, outcome, base, interact, moderators, fe, cluster=None,
+                       main_effect=False, n_jobs=None):
+    """Interaction coefficients for every moderator, stacked into one table.
+
+    df          analysis data
+    outcome     dependent variable
+    base        base regressors included in every model (e.g. closure_zip,
+                fintech_share, closure_x_fintech)
+    interact    base variables interacted with each moderator
+    moderators  {name: Series or DataFrame} aligned with df
+    fe          names of absorbed fixed effects
+    cluster     cluster variable (None for robust SEs)
+    main_effect include the moderator's own level(s)
+    n_jobs      worker threads (default: all cores)
+    """
+    y = df[outcome].to_numpy(dtype=float)
+    base_values = df[base].to_numpy(dtype=float)
+    fe_values = [df[f].to_numpy() for f in fe]
+    cl_full = df[cluster].to_numpy() if cluster is not None else None
+    complete = complete_cases(y, base_values, *fe_values, cl_full)
+
+    # Shared base design, demeaned and solved once
+    mask, absorber = absorb_sample(fe_values, complete)
+    Z = absorber.demean(np.column_stack([y[mask], base_values[mask]]))
+    cl = cl_full[mask] if cl_full is not None else None
+    yd, Bd = Z[:, 0], Z[:, 1:]
+    BtB_inv = np.linalg.pinv(Bd.T @ Bd)
+    b0 = BtB_inv @ (Bd.T @ yd)
+    ctx = {
+        'y': y, 'base_values': base_values, 'fe_values': fe_values, 'cl_full': cl_full,
+        'complete': complete, 'mask': mask, 'singletons': absorber.singletons,
+        'absorber': absorber,
+        'Bd': Bd, 'BtB_inv': BtB_inv, 'b0': b0, 'e0': yd - Bd @ b0,
+        'tss': float((yd - yd.mean()) @ (yd - yd.mean())),
+        'cl': cl, 'df_abs': absorber.df_absorbed(factorize(cl)[0] if cl is not None else None),
+        'base': list(base),
+    }
+
+    interact_values = df[interact].to_numpy(dtype=float)
+    added = {}
+    for name, m in moderators.items():
+        m = m.to_frame(name) if isinstance(m, pd.Series) else m
+        added[name] = _added_columns(m, interact_values, interact, main_effect)
+
+    # Demean the terms of every fully observed moderator in one call
+    fast = [name for name, (A, _) in added.items() if not np.isnan(A[mask]).any()]
+    demeaned = {}
+    demeaned_names = set(fast)
+    if fast:
+        Ad_all = absorber.demean(np.column_stack([added[name][0][mask] for name in fast]))
+        splits = np.cumsum([added[name][0].shape[1] for name in fast])[:-1]
+        demeaned = dict(zip(fast, np.split(Ad_all, splits, axis=1)))
+
+    def fit(name):
+        A, names = added[name]
+        if name in demeaned_names:
+            return _fwl_update(name, A, demeaned[name], names, ctx)
+        return _refit(name, A, names, ctx)
+
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        tables = list(pool.map(fit, added))
+
+    return pd.concat(tables, ignore_index=True)
+
+
+def main():
+    """Heterogeneity and dose-response screens (13, 14, 05 component loop)."""
+
+    print("=" * 60)
+    print("BATCH HETEROGENEITY ANALYSIS")
+    print("=" * 60)
+
+    df = read_caps(path=CAPS_FILE)
+    df = df[df['year'].between(2010, 2014) & df['fintech_share'].notna() & df['anytoise'].notna()]
+    df = df.reset_index(drop=True)
+    df['closure_x_fintech'] = df['closure_zip'] * df['fintech_share']
+    print(f"Analysis sample: {len(df):,} observations")
+
+    if BANKING_FILE.exists():
+        bank = pd.read_stata(BANKING_FILE, columns=['county_fips', 'branches_per_10k', 'banking_desert'],
+                             convert_categoricals=False)
+        df = df.merge(bank, on='county_fips', how='left', validate='m:1')
+
+    # Triple interactions: closure x fintech x moderator (13 and 14)
+    moderators = {}
+    if 'credit_score' in df:
+        moderators['credit_mid'] = ((df['credit_score'] >= 620) & (df['credit_score'] < 720)).astype(float).where(df['credit_score'].notna())
+    if 'income' in df:
+        moderators['low_income'] = (df['income'] <= df['income'].median()).astype(float).where(df['income'].notna())
+    if 'age' in df:
+        moderators['age_group'] = dose_bins(df['age'], edges=[35, 55], name='age')
+    if 'race' in df:
+        moderators['minority'] = (df['race'] != 1).astype(float).where(df['race'].notna())
+    if 'education' in df:
+        moderators['college'] = (df['education'] >= 4).astype(float).where(df['education'].notna())
+    if 'branches_per_10k' in df:
+        moderators['low_branch'] = (df['branches_per_10k'] < df['branches_per_10k'].median()).astype(float).where(df['branches_per_10k'].notna())
+        moderators['branch_quartile'] = dose_bins(df['branches_per_10k'], q=[0.25, 0.5, 0.75], name='branches')
+    if 'banking_desert' in df:
+        moderators['banking_desert'] = df['banking_desert'].astype(float)
+
+    base = ['closure_zip', 'fintech_share', 'closure_x_fintech']
+    triple = batch_interactions(df, 'anytoise', base=base, interact=base,
+                                moderators=moderators, fe=['mergerID', 'year'],
+                                cluster='county_fips', main_effect=True)
+    triple.insert(0, 'design', 'closure_x_fintech_x_moderator')
+
+    # Closure x standardized component (05 component loop)
+    components = ['payment_index', 'income_index', 'resilience_index', 'has_buffer', 'afs_user']
+    comp = {f"{c}_std": standardize(df[c]) for c in components if c in df}
+    tables = [triple]
+    if comp:
+        single = batch_interactions(df, 'anytoise', base=['closure_zip'], interact=['closure_zip'],
+                                    moderators=comp, fe=['mergerID', 'year'], cluster='county_fips')
+        single.insert(0, 'design', 'closure_x_component')
+        tables.append(single)
+
+    results = pd.concat(tables, ignore_index=True)
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(OUTPUT_FILE, index=False, float_format='%.6f')
+    print(f"Saved {results['moderator'].nunique()} moderators to: {OUTPUT_FILE}")
+
+    key = results[results['variable'].str.contains('_x_') & results['variable'].str.startswith(('closure_x_fintech_x', 'closure_zip_x'))]
+    print("\n" + key[['design', 'moderator', 'variable', 'coef', 'se', 'pval', 'nobs']].round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
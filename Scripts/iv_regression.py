@@ -0,0 +1,388 @@
+"""
+Instrumental-Variables Regression with Absorbed Fixed Effects
+Purpose: 2SLS / LIML on the fe_regression engine, with first stage, reduced
+         form, cluster-robust first-stage F, Kleibergen-Paap rk Wald F and
+         Anderson-Rubin confidence sets.
+         Python counterpart of 12_broadband_iv_analysis.do that does not depend
+         on ivreghdfe / ivreg2.
+Date: October 2026
+
+Usage:
+    python iv_regression.py
+
+    from iv_regression import feiv
+    res = feiv(df['anytoise'], df[['closure_x_fintech']],
+               exog=df[['closure_zip', 'fintech_share']],
+               instruments=df[['closure_x_broadband']],
+               fe=[df['mergerID'], df['year']], cluster=df['county_fips'])
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+    - Data/Broadband/broadband_zip.dta
+
+Notes:
+    - The outcome, endogenous regressors, exogenous regressors and instruments
+      are demeaned together once; the first stage, reduced form and second
+      stage are all computed from that single demeaned design.
+    - The Kleibergen-Paap rk Wald statistic tests rank(Pi) = p - 1 for the
+      L x p first-stage coefficients of the excluded instruments, with the
+      cluster-robust covariance of vec(Pi) and the normalization of ranktest
+      (Kleibergen and Paap 2006). With one endogenous regressor the rk Wald F
+      is the cluster-robust first-stage F.
+    - The Anderson-Rubin set is found by inverting the AR test over a grid of
+      hypothesized coefficients. The AR residual is linear in the hypothesized
+      value, so every grid point is evaluated in one batched computation.
+      An accepted region that reaches the end of the grid is reported as
+      open (-inf / inf) and flagged in extra['ar_unbounded'].
+    - `relevance` adds auxiliary regressions on the same sample and demeaned
+      design, e.g. 12's `reghdfe fintech_share broadband_pct`, with the
+      clustered Wald F of their regressors.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from caps_panel import read_caps
+from fe_regression import (FEResult, absorb_info, absorb_sample, cluster_scores,
+                           complete_cases, factorize, feols, ols, sandwich)
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+BROADBAND_FILE = ROOT / "Data" / "Broadband" / "broadband_zip.dta"
+
+
+def _as_matrix(X, n, prefix):
+    """Return (n x k float matrix, names) for a Series/DataFrame/array or None."""
+    if X is None:
+        return np.empty((n, 0)), []
+    if isinstance(X, pd.DataFrame):
+        return X.to_numpy(dtype=float), list(X.columns)
+    if isinstance(X, pd.Series):
+        return X.to_numpy(dtype=float).reshape(n, 1), [X.name]
+    X = np.asarray(X, dtype=float).reshape(n, -1)
+    return X, [f"{prefix}{j}" for j in range(X.shape[1])]
+
+
+def _resid(A, B):
+    """Residuals of the columns of B projected on the columns of A."""
+    if A.shape[1] == 0:
+        return B
+    return B - A @ np.linalg.lstsq(A, B, rcond=None)[0]
+
+
+def first_stage_f(fs, n_instruments):
+    """Cluster-robust Wald F for the excluded instruments (last columns of fs)."""
+    b = fs.coef[-n_instruments:]
+    V = fs.vcov[-n_instruments:, -n_instruments:]
+    return float(b @ np.linalg.pinv(V) @ b) / n_instruments
+
+
+def _sqrtm(A):
+    """Symmetric square root of a symmetric positive semi-definite matrix."""
+    w, Q = np.linalg.eigh((A + A.T) / 2)
+    return (Q * np.sqrt(np.clip(w, 0, None))) @ Q.T
+
+
+def rk_statistic(Pi, V, zz, yy):
+    """Kleibergen-Paap rk statistic for rank(Pi) = p - 1.
+
+    Pi is L x p, V the covariance of vec(Pi) (column-major), and zz, yy the
+    cross-products of the partialled instruments and endogenous regressors
+    that normalize Pi as Theta = F Pi G' (F'F = zz, G'G = yy^-1).
+    """
+    L, p = Pi.shape
+    q = p - 1
+    F = np.linalg.cholesky(zz).T
+    G = np.linalg.cholesky(np.linalg.inv(yy)).T
+    theta = F @ Pi @ G.T
+    U, _, Vt = np.linalg.svd(theta)
+    Vm = Vt.T
+    U22, V22 = U[q:, q:], Vm[q:, q:]
+    A = U[:, q:] @ np.linalg.solve(U22, _sqrtm(U22 @ U22.T))
+    B = _sqrtm(V22 @ V22.T) @ np.linalg.solve(V22.T, Vm[:, q:].T)
+    K = np.kron(B, A.T)
+    lam = K @ theta.reshape(-1, order='F')
+    omega = np.kron(G, F) @ V @ np.kron(G, F).T
+    return float(lam @ np.linalg.pinv(K @ omega @ K.T) @ lam)
+
+
+def kp_wald_f(X1, W, n_instruments, cluster=None, df_absorbed=0):
+    """Kleibergen-Paap rk Wald F of the endogenous regressors X1 (n x p) on
+    W = [exog, instruments], all demeaned; cluster-robust when `cluster` is
+    given, HC1 otherwise, with the small-sample factors of the first stages."""
+    n, k = W.shape
+    L, p = n_instruments, X1.shape[1]
+    WtW_inv = np.linalg.pinv(W.T @ W)
+    H = (W @ WtW_inv)[:, -L:]              # score weights for the instruments
+    Pi = H.T @ X1
+    E = X1 - W @ (WtW_inv @ (W.T @ X1))
+    scores = np.column_stack([H * E[:, [j]] for j in range(p)])
+    df_model = k + df_absorbed
+    if cluster is not None:
+        cl_codes, G = factorize(cluster)
+        S = cluster_scores(scores, cl_codes, G)
+        q = (n - 1) / max(n - df_model, 1) * G / max(G - 1, 1)
+    else:
+        S = scores
+        q = n / max(n - df_model, 1)
+    V = q * S.T @ S
+    Zt = _resid(W[:, :-L], W[:, -L:])
+    Yt = _resid(W[:, :-L], X1)
+    return rk_statistic(Pi, V, Zt.T @ Zt / n, Yt.T @ Yt / n) / L
+
+
+def ar_confidence_set(y, x, W, n_instruments, grid, cluster=None, df_absorbed=0, level=0.95):
+    """Anderson-Rubin test over a grid of values for one endogenous coefficient.
+
+    y, x and W = [exog, instruments] are already demeaned. For each b0 in the
+    grid, regress y - b0*x on W and test the instrument coefficients jointly.
+    Returns (grid, AR F statistics, p-values, list of accepted intervals).
+    """
+    grid = np.asarray(grid, dtype=float)
+    n, k = W.shape
+    L = n_instruments
+
+    WtW_inv = np.linalg.pinv(W.T @ W)
+    P = WtW_inv @ W.T                      # k x n
+    g_y, g_x = P[-L:] @ y, P[-L:] @ x      # instrument coefficients
+    e_y = y - W @ (P @ y)
+    e_x = x - W @ (P @ x)
+    H = (W @ WtW_inv)[:, -L:]              # score weights for the instruments
+
+    df_model = k + df_absorbed
+    if cluster is not None:
+        cl_codes, G = factorize(cluster)
+        S_y = cluster_scores(H * e_y[:, None], cl_codes, G)
+        S_x = cluster_scores(H * e_x[:, None], cl_codes, G)
+        q = (n - 1) / max(n - df_model, 1) * G / max(G - 1, 1)
+        df_denom = G - 1
+    else:
+        S_y, S_x = H * e_y[:, None], H * e_x[:, None]
+        q = n / max(n - df_model, 1)
+        df_denom = n - df_model
+
+    # Meat and coefficients are quadratic / linear in b0
+    M_yy, M_xx, M_yx = S_y.T @ S_y, S_x.T @ S_x, S_y.T @ S_x
+    b = grid[:, None, None]
+    meat = q * (M_yy - b * (M_yx + M_yx.T) + b ** 2 * M_xx)        # B x L x L
+    gamma = g_y[None, :] - grid[:, None] * g_x[None, :]              # B x L
+    wald = np.einsum('bi,bi->b', gamma, np.linalg.solve(meat, gamma[:, :, None])[:, :, 0])
+    ar_f = wald / L
+    pvals = stats.f.sf(ar_f, L, df_denom)
+
+    accepted = pvals > 1 - level
+    intervals = []
+    start = None
+    for i, ok in enumerate(accepted):
+        if ok and start is None:
+            start = i
+        if start is not None and (not ok or i == len(grid) - 1):
+            end = i if ok else i - 1
+            lo = -np.inf if start == 0 else grid[start]
+            hi = np.inf if end == len(grid) - 1 else grid[end]
+            intervals.append((lo, hi))
+            start = None
+    return grid, ar_f, pvals, intervals
+
+
+def feiv(y, endog, exog=None, instruments=None, fe=None, cluster=None,
+         method='2sls', ar_grid=None, relevance=None, tol=1e-10):
+    """2SLS or LIML of y on [endog, exog] with instruments, absorbing `fe`.
+
+    Returns an FEResult for the second stage. `extra` holds the first-stage
+    results and F statistics, the reduced form, kappa, and (for one endogenous
+    regressor) the Anderson-Rubin test over `ar_grid` and its accepted intervals.
+    `relevance` is {name: (outcome, regressors)} of auxiliary regressions run
+    on the same sample and absorber; their results and clustered F statistics
+    are in extra['relevance'] and extra['relevance_F'].
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    X1, endog_names = _as_matrix(endog, n, 'endog')
+    X2, exog_names = _as_matrix(exog, n, 'exog')
+    Z, inst_names = _as_matrix(instruments, n, 'inst')
+    p, L = X1.shape[1], Z.shape[1]
+    aux = {}
+    for name, (ry, rX) in (relevance or {}).items():
+        rX, r_names = _as_matrix(rX, n, 'x')
+        aux[name] = (np.asarray(ry, dtype=float).reshape(n, 1), rX, r_names)
+    aux_cols = [np.column_stack([ry, rX]) for ry, rX, _ in aux.values()]
+    if L < p:
+        raise ValueError(f"Equation not identified: {L} instruments for {p} endogenous regressors")
+
+    fe = [np.asarray(f) for f in (fe or [])]
+    mask = complete_cases(y, X1, X2, Z, *aux_cols, *fe, cluster)
+    absorber = None
+    if fe:
+        # Singletons are dropped here too, so the sample matches feols
+        mask, absorber = absorb_sample(fe, mask, tol=tol)
+    cl = None if cluster is None else np.asarray(cluster)[mask]
+
+    if not fe:
+        X2 = np.column_stack([X2, np.ones(n)])
+        exog_names = exog_names + ['_cons']
+    k2 = X2.shape[1]
+
+    # One demeaned design shared by every stage
+    design = np.column_stack([y, X1, X2, Z, *aux_cols])[mask]
+    df_abs = 0
+    if absorber is not None:
+        design = absorber.demean(design)
+        df_abs = absorber.df_absorbed(factorize(cl)[0] if cl is not None else None)
+    k_main = 1 + p + k2 + L
+    design, aux_d = design[:, :k_main], design[:, k_main:]
+    yd, X1d, X2d, Zd = np.split(design, [1, 1 + p, 1 + p + k2], axis=1)
+    yd = yd[:, 0]
+    W = np.column_stack([X2d, Zd])
+
+    # First stages and reduced form
+    first_stage, fs_f = {}, {}
+    for j, name in enumerate(endog_names):
+        fs = ols(X1d[:, j], W, names=exog_names + inst_names, cluster=cl, df_absorbed=df_abs)
+        first_stage[name] = fs
+        fs_f[name] = first_stage_f(fs, L)
+    reduced_form = ols(yd, W, names=exog_names + inst_names, cluster=cl, df_absorbed=df_abs)
+
+    # Auxiliary relevance regressions: same rows, same demeaned design
+    rel, rel_f = {}, {}
+    start = 0
+    for name, (_, rX, r_names) in aux.items():
+        k = 1 + rX.shape[1]
+        block = aux_d[:, start:start + k]
+        start += k
+        Xr, names = block[:, 1:], r_names
+        if not fe:
+            Xr, names = np.column_stack([np.ones(len(block)), Xr]), ['_cons'] + r_names
+        rel[name] = ols(block[:, 0], Xr, names=names, cluster=cl, df_absorbed=df_abs)
+        rel_f[name] = first_stage_f(rel[name], rX.shape[1])
+
+    # k-class second stage: kappa = 1 is 2SLS, smallest eigenvalue is LIML
+    Yd = np.column_stack([yd, X1d])
+    M_W_Y = _resid(W, Yd)
+    if method == '2sls':
+        kappa = 1.0
+    elif method == 'liml':
+        M_X2_Y = _resid(X2d, Yd)
+        kappa = float(np.min(np.real(np.linalg.eigvals(
+            np.linalg.solve(M_W_Y.T @ Yd, M_X2_Y.T @ Yd)))))
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    X = np.column_stack([X1d, X2d])
+    X_tilde = X - kappa * np.column_stack([M_W_Y[:, 1:], np.zeros_like(X2d)])
+    bread = np.linalg.pinv(X_tilde.T @ X)
+    coef = bread @ (X_tilde.T @ yd)
+    resid = yd - X @ coef
+
+    df_model = X.shape[1] + df_abs
+    if cl is not None:
+        cl_codes, G = factorize(cl)
+        vcov = sandwich(X_tilde, resid, bread, cl_codes, G, df_model)
+        df_resid, vce = G - 1, 'cluster'
+    else:
+        G = None
+        vcov = sandwich(X_tilde, resid, bread, df_model=df_model)
+        df_resid, vce = len(yd) - df_model, 'robust'
+
+    extra = {
+        'method': method,
+        'kappa': kappa,
+        'first_stage': first_stage,
+        'first_stage_F': fs_f,
+        # With one endogenous regressor the KP rk Wald F equals the
+        # cluster-robust first-stage F on the excluded instruments
+        'kp_f': fs_f[endog_names[0]] if p == 1 else kp_wald_f(X1d, W, L, cl, df_abs),
+        'reduced_form': reduced_form,
+        'relevance': rel,
+        'relevance_F': rel_f,
+        'singletons': 0,
+    }
+    if absorber is not None:
+        extra.update(absorb_info(absorber, factorize(cl)[0] if cl is not None else None))
+
+    if p == 1 and ar_grid is not None:
+        grid, ar_f, ar_p, intervals = ar_confidence_set(
+            yd, X1d[:, 0], W, L, ar_grid, cluster=cl, df_absorbed=df_abs)
+        extra.update({'ar_grid': grid, 'ar_F': ar_f, 'ar_pvalue': ar_p, 'ar_ci': intervals,
+                      # Accepted at an end of the grid: the set extends beyond it
+                      'ar_unbounded': any(np.isinf(b) for iv in intervals for b in iv)})
+
+    tss = float((yd - yd.mean()) @ (yd - yd.mean()))
+    return FEResult(names=endog_names + exog_names, coef=coef, vcov=vcov, nobs=len(yd),
+                    df_resid=df_resid, df_absorbed=df_abs, n_clusters=G,
+                    r2_within=1 - float(resid @ resid) / tss if tss > 0 else np.nan,
+                    vce=vce, extra=extra)
+
+
+def main():
+    """Broadband IV analysis (12_broadband_iv_analysis.do)."""
+
+    print("=" * 60)
+    print("INSTRUMENTAL VARIABLES ANALYSIS")
+    print("=" * 60)
+
+    df = read_caps([
+        'indivID', 'year', 'anytoise', 'closure_zip', 'fintech_share',
+        'mergerID', 'county_fips', 'zip'], CAPS_FILE)
+    df = df[df['year'].between(2010, 2014) & df['fintech_share'].notna() & df['anytoise'].notna()]
+    df['closure_x_fintech'] = df['closure_zip'] * df['fintech_share']
+    print(f"Fintech analysis sample: {len(df):,} observations")
+
+    fe = [df['mergerID'], df['year']]
+    ols_res = feols(df['anytoise'], df[['closure_zip', 'fintech_share', 'closure_x_fintech']],
+                    fe=fe, cluster=df['county_fips'])
+    print("\n=== OLS BASELINE ===")
+    print(ols_res.summary())
+
+    if not BROADBAND_FILE.exists():
+        print(f"\nBroadband data not found at: {BROADBAND_FILE}")
+        print("Cannot run IV without broadband instrument data")
+        return
+
+    bb = pd.read_stata(BROADBAND_FILE, columns=['zip', 'broadband_pct'], convert_categoricals=False)
+    df = df.merge(bb, on='zip', how='left', validate='m:1')
+    df['closure_x_broadband'] = df['closure_zip'] * df['broadband_pct']
+    fe = [df['mergerID'], df['year']]
+
+    grid = np.linspace(-10, 10, 4001)
+    # 12 part 4: does broadband predict fintech? (same sample and absorber as the IV)
+    relevance = {'fintech_share': (df['fintech_share'], df[['broadband_pct']])}
+    for method in ['2sls', 'liml']:
+        res = feiv(df['anytoise'], df[['closure_x_fintech']],
+                   exog=df[['closure_zip', 'fintech_share']],
+                   instruments=df[['closure_x_broadband']],
+                   fe=fe, cluster=df['county_fips'], method=method, ar_grid=grid,
+                   relevance=relevance)
+        print(f"\n=== IV ESTIMATION ({method.upper()}) ===")
+        print(res.summary())
+        if method == '2sls':
+            print("\nFirst stage: broadband -> fintech (fintech_share on broadband_pct):")
+            print(res.extra['relevance']['fintech_share'].summary())
+            print(f"First stage F-statistic: {res.extra['relevance_F']['fintech_share']:.2f}")
+            if res.extra['relevance_F']['fintech_share'] < 10:
+                print("WARNING: Weak instrument (F < 10)")
+            print("\nFirst stage (closure_x_fintech):")
+            print(res.extra['first_stage']['closure_x_fintech'].summary())
+            print("\nReduced form:")
+            print(res.extra['reduced_form'].summary())
+        print(f"Kleibergen-Paap Wald F: {res.extra['kp_f']:.2f}   "
+              f"(broadband -> fintech F: {res.extra['relevance_F']['fintech_share']:.2f})")
+        if res.extra['kp_f'] < 10:
+            print("WARNING: Weak instrument (F < 10)")
+        ci = ", ".join(f"[{lo:.4f}, {hi:.4f}]" for lo, hi in res.extra['ar_ci']) or "empty"
+        print(f"Anderson-Rubin 95% confidence set: {ci}")
+        if res.extra['ar_unbounded']:
+            print(f"WARNING: the AR set reaches the end of the grid [{grid[0]:g}, {grid[-1]:g}]; "
+                  "it is unbounded there (weak identification) or the grid is too narrow")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Merge Key Coverage
+Purpose: Check the merges of 01_merge_fintech_data.do, 05_merge_caps_geographic.do
+         and 06_caps_hmda_linkage.do before running them: build the sorted key
+         set of every source (CAPS ZIPs, crosswalk ZCTAs, tract FIPS, HMDA
+         tracts, county FIPS x year, ...) from its key columns only, and
+         report match rates, overlap matrices, unmatched keys by year and
+         state, and many-to-many hazards from set operations alone.
+Date: October 2026
+
+Usage:
+    python key_coverage.py
+
+    from key_coverage import KeySet, check_merge
+    caps = KeySet('caps', zip_codes(df['zip']))
+    xw = KeySet('zip_county', zip_codes(xwalk['zip']))
+    check_merge(caps, xw, ('zip',))    # match rate, unmatched keys, duplicate hazards
+
+Requirements:
+    - numpy, pandas
+    - pipeline.py, zcta_crosswalk.py (same folder)
+
+Input files (key columns only; missing files or key columns are skipped):
+    - CAPS working_feb24.dta ($caps in 05; CAPS_RAW), else
+      Data/caps_geographic_merged.dta
+    - Data/Crosswalks/zip_county.dta, zcta_county_primary.csv,
+      tract_zip_crosswalk.csv
+    - Data/Social_Capital/social_capital_zip.dta, Data/Broadband/broadband_zip.dta
+    - Data/fintech_county_clean.dta, Data/Food_Access/food_access_county.dta,
+      Data/Dollar_Stores/dollar_stores_county.dta,
+      Data/Banking_Deserts/banking_access_county.dta
+    - Data/HMDA/hmda_fintech_zip_year.csv, hmda_fintech_tract_year.csv
+
+Output files:
+    - Results/merge_coverage.csv       (one row per merge)
+    - Results/merge_unmatched.csv      (unmatched master rows by merge, year, state)
+    - Results/key_overlap_<kind>.csv   (share of row source's keys found in
+                                        column source, per key kind)
+
+Notes:
+    - Keys are packed to int64: ZIP and county FIPS as five-digit numbers,
+      tract FIPS as the 11-digit state-county-tract number, and a key by
+      year as key * 10000 + year. A key set is the sorted unique keys with
+      their multiplicities, and membership is a binary search, so no merge
+      is ever materialized.
+    - Hazards: `merge m:1` stops with "variables do not uniquely identify
+      observations in the using data" when a matched key repeats in the
+      using file; mm_extra_rows counts the rows a joinby on those keys would
+      add, from the key multiplicities of both sides.
+    - CAPS has no county until merge 1, so the county keys of the CAPS rows
+      come from a ZIP -> county lookup table of zip_county.dta (the first
+      county of a ZIP, as merge m:1 would pick had it not failed).
+    - State is the first two digits of the county or tract FIPS; for ZIP keys
+      it comes from the ZIP's county in the crosswalk (-1 if not a ZCTA).
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline import CAPS_RAW
+from zcta_crosswalk import N_CODES, to_code
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "Data"
+RESULTS_DIR = ROOT / "Results"
+CAPS_FILE = DATA_DIR / "caps_geographic_merged.dta"
+
+# name -> file and its key columns (zip, county, tract, year); a list gives
+# alternative names (the first present is used), and a tract given as
+# (state, county, tract) columns is assembled into the 11-digit FIPS
+SOURCES = {
+    'caps': {'file': CAPS_RAW, 'zip': 'zip', 'year': 'year'},
+    'zip_county': {'file': DATA_DIR / "Crosswalks" / "zip_county.dta",
+                   'zip': 'zip', 'county': 'county_fips'},
+    'zcta_crosswalk': {'file': DATA_DIR / "Crosswalks" / "zcta_county_primary.csv",
+                       'zip': 'zcta', 'county': 'county_fips'},
+    'social_capital': {'file': DATA_DIR / "Social_Capital" / "social_capital_zip.dta", 'zip': 'zip'},
+    'broadband': {'file': DATA_DIR / "Broadband" / "broadband_zip.dta", 'zip': 'zip'},
+    'fintech_county': {'file': DATA_DIR / "fintech_county_clean.dta",
+                       'county': 'county_fips', 'year': 'year'},
+    'food_access': {'file': DATA_DIR / "Food_Access" / "food_access_county.dta", 'county': 'county_fips'},
+    'dollar_stores': {'file': DATA_DIR / "Dollar_Stores" / "dollar_stores_county.dta", 'county': 'county_fips'},
+    'banking_deserts': {'file': DATA_DIR / "Banking_Deserts" / "banking_access_county.dta",
+                        'county': 'county_fips'},
+    'hmda_zip': {'file': DATA_DIR / "HMDA" / "hmda_fintech_zip_year.csv", 'zip': 'zip', 'year': 'year'},
+    'hmda_tract': {'file': DATA_DIR / "HMDA" / "hmda_fintech_tract_year.csv",
+                   'tract': ('state', 'county', 'tract'), 'year': 'year'},
+    'tract_zip': {'file': DATA_DIR / "Crosswalks" / "tract_zip_crosswalk.csv",
+                  'tract': ['tract_fips', 'tract'], 'zip': 'zip'},
+}
+
+# (label, master, using, key): the merges of 01, 05 and 06
+MERGES = [
+    ('01 zip -> county crosswalk', 'caps', 'zcta_crosswalk', ('zip',)),
+    ('05 merge 1: zip_county', 'caps', 'zip_county', ('zip',)),
+    ('05 merge 2: social capital', 'caps', 'social_capital', ('zip',)),
+    ('05 merge 3: fintech county x year', 'caps', 'fintech_county', ('county', 'year')),
+    ('05 merge 4: broadband', 'caps', 'broadband', ('zip',)),
+    ('05 merge 5: food access', 'caps', 'food_access', ('county',)),
+    ('05 merge 6: dollar stores', 'caps', 'dollar_stores', ('county',)),
+    ('05 merge 7: banking deserts', 'caps', 'banking_deserts', ('county',)),
+    ('06 HMDA zip x year', 'caps', 'hmda_zip', ('zip', 'year')),
+    ('06 HMDA tract -> zip crosswalk', 'hmda_tract', 'tract_zip', ('tract',)),
+]
+
+# Largest example list printed per hazard
+N_EXAMPLES = 5
+
+
+def zip_codes(values):
+    """Five-digit ZIP / county codes as int64, -1 where missing or invalid."""
+    codes = to_code(values)
+    return np.where((codes >= 0) & (codes < N_CODES), codes, -1)
+
+
+def tract_codes(values):
+    """11-digit tract FIPS (string or number) as int64, -1 where invalid."""
+    s = pd.Series(values)
+    if s.dtype.kind not in 'biuf':
+        s = s.astype(str).str.strip().str.replace('.', '', regex=False)
+    codes = pd.to_numeric(s, errors='coerce')
+    return codes.where((codes >= 0) & (codes < 10 ** 11)).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def tract_from_parts(state, county, tract):
+    """Tract FIPS from HMDA state code, county code and census tract
+    ('9501.00' or 950100)."""
+    st = pd.to_numeric(pd.Series(state), errors='coerce')
+    co = pd.to_numeric(pd.Series(county), errors='coerce')
+    tr = pd.Series(tract)
+    dotted = tr.astype(str).str.contains('.', regex=False)
+    tr = pd.to_numeric(tr, errors='coerce')
+    tr = tr.where(~dotted, np.round(tr * 100))
+    codes = st * 10 ** 9 + co * 10 ** 6 + tr
+    return codes.where(tr < 10 ** 6).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def with_year(codes, years):
+    """key * 10000 + year, -1 where either part is missing."""
+    years = pd.to_numeric(pd.Series(years), errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    ok = (codes >= 0) & (years >= 0) & (years < 10_000)
+    return np.where(ok, codes * 10_000 + years, -1)
+
+
+def _header(path):
+    """Column names of a .dta or CSV file (lower-cased for CSV), reading no rows."""
+    if path.suffix == '.dta':
+        with pd.read_stata(path, chunksize=1) as reader:
+            return list(reader.variable_labels())
+    return [c.lower() for c in pd.read_csv(path, nrows=0).columns]
+
+
+def resolve_columns(spec, header):
+    """spec with every alternative-name list replaced by the name present in
+    the file; KeyError naming the key columns that are absent."""
+    spec = dict(spec)
+    missing = []
+    for field in ('zip', 'county', 'tract', 'year'):
+        v = spec.get(field)
+        if isinstance(v, list):
+            found = [c for c in v if c in header]
+            spec[field] = found[0] if found else None
+            if not found:
+                missing.append('/'.join(v))
+        elif isinstance(v, tuple):
+            missing.extend(c for c in v if c not in header)
+        elif v and v not in header:
+            missing.append(v)
+    if missing:
+        raise KeyError(f"no key column {', '.join(missing)}")
+    return spec
+
+
+def read_keys(spec):
+    """DataFrame of packed key columns (zip, county, tract, year) of a source."""
+    path = Path(spec['file'])
+    spec = resolve_columns(spec, _header(path))
+    cols = []
+    for field in ('zip', 'county', 'tract', 'year'):
+        v = spec.get(field)
+        cols.extend(v if isinstance(v, tuple) else [v] if v else [])
+    if path.suffix == '.dta':
+        raw = pd.read_stata(path, columns=cols, convert_categoricals=False)
+    else:
+        raw = pd.read_csv(path, usecols=lambda c: c.lower() in cols, dtype=str)
+        raw.columns = [c.lower() for c in raw.columns]
+    out = pd.DataFrame(index=raw.index)
+    for field in ('zip', 'county'):
+        if spec.get(field):
+            out[field] = zip_codes(raw[spec[field]])
+    if isinstance(spec.get('tract'), tuple):
+        out['tract'] = tract_from_parts(*(raw[c] for c in spec['tract']))
+    elif spec.get('tract'):
+        out['tract'] = tract_codes(raw[spec['tract']])
+    if spec.get('year'):
+        out['year'] = pd.to_numeric(raw[spec['year']], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+    return out
+
+
+class KeySet:
+    """Sorted unique keys of one source, with their multiplicities."""
+
+    def __init__(self, name, codes):
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = codes >= 0
+        self.name = name
+        self.n_rows = len(codes)
+        self.n_missing = int((~valid).sum())
+        self.keys, self.counts = np.unique(codes[valid], return_counts=True)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def contains(self, codes):
+        """Membership of each code (binary search in the sorted keys)."""
+        codes = np.asarray(codes, dtype=np.int64)
+        if not len(self.keys):
+            return np.zeros(len(codes), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.keys, codes), len(self.keys) - 1)
+        return (self.keys[pos] == codes) & (codes >= 0)
+
+    def duplicated(self):
+        """Keys that occur more than once."""
+        return self.keys[self.counts > 1]
+
+
+def check_merge(master, using, key=('zip',)):
+    """Coverage of a merge of master (rows) onto using, from key sets alone."""
+    in_using = using.contains(master.keys)
+    using_dups = using.duplicated()
+    hazard = np.intersect1d(using_dups, master.keys, assume_unique=True)
+    # Rows a joinby on the hazard keys would add over a unique match
+    m_count = master.counts[np.searchsorted(master.keys, hazard)]
+    u_count = using.counts[np.searchsorted(using.keys, hazard)]
+    return {
+        'master_rows': master.n_rows,
+        'master_missing_key': master.n_missing,
+        'master_keys': len(master),
+        'using_keys': len(using),
+        'matched_keys': int(in_using.sum()),
+        'matched_rows': int(master.counts[in_using].sum()),
+        'match_rate': master.counts[in_using].sum() / master.n_rows if master.n_rows else np.nan,
+        'unmatched_keys': int((~in_using).sum()),
+        'using_only_keys': len(using) - int(in_using.sum()),
+        'using_duplicate_keys': len(using_dups),
+        'm1_hazard_keys': len(hazard),
+        'mm_extra_rows': int((m_count * (u_count - 1)).sum()),
+        'hazard_examples': ' '.join(format_key(k, key) for k in hazard[:N_EXAMPLES]),
+        'unmatched_examples': ' '.join(format_key(k, key) for k in master.keys[~in_using][:N_EXAMPLES]),
+    }
+
+
+def format_key(code, key):
+    """Packed key as it reads in the data ('01001/2019', '01001950100')."""
+    code = int(code)
+    year = ''
+    if 'year' in key:
+        code, year = divmod(code, 10_000)
+        year = f"/{year}"
+    width = 11 if key[0] == 'tract' else 5
+    return f"{code:0{width}d}{year}"
+
+
+def overlap_matrix(keysets):
+    """Share of each row source's keys that are also keys of the column source."""
+    names = list(keysets)
+    M = np.full((len(names), len(names)), np.nan)
+    for i, a in enumerate(names):
+        for j, b in enumerate(names):
+            if len(keysets[a]):
+                M[i, j] = keysets[b].contains(keysets[a].keys).mean()
+    return pd.DataFrame(M, index=names, columns=names)
+
+
+def zip_county_lookup(frame):
+    """int64[100000] county of every ZIP (first county listed), -1 if none."""
+    table = np.full(N_CODES, -1, dtype=np.int64)
+    ok = (frame['zip'] >= 0) & (frame['county'] >= 0)
+    z, c = frame.loc[ok, 'zip'].to_numpy(), frame.loc[ok, 'county'].to_numpy()
+    # Assign in reverse so the first row of a repeated ZIP wins
+    table[z[::-1]] = c[::-1]
+    return table
+
+
+def merge_codes(frame, key):
+    """Packed codes of a merge key (('zip',), ('county', 'year'), ...)."""
+    codes = frame[key[0]].to_numpy()
+    if 'year' in key:
+        codes = with_year(codes, frame['year'])
+    return codes
+
+
+def state_of(frame, lookup=None):
+    """State FIPS of each row from its county, tract or ZIP, -1 if unknown."""
+    if 'county' in frame:
+        c = frame['county'].to_numpy()
+        return np.where(c >= 0, c // 1000, -1)
+    if 'tract' in frame:
+        t = frame['tract'].to_numpy()
+        return np.where(t >= 0, t // 10 ** 9, -1)
+    if 'zip' in frame and lookup is not None:
+        z = frame['zip'].to_numpy()
+        c = np.where(z >= 0, lookup[np.maximum(z, 0)], -1)
+        return np.where(c >= 0, c // 1000, -1)
+    return np.full(len(frame), -1)
+
+
+def unmatched_by(frame, codes, using, state):
+    """Master rows and unmatched master rows by year and state."""
+    matched = using.contains(codes)
+    year = frame['year'].to_numpy() if 'year' in frame else np.full(len(frame), -1)
+    table = pd.DataFrame({'year': year, 'state': state, 'rows': 1, 'unmatched': (~matched).astype(int)})
+    out = table.groupby(['year', 'state'], sort=True)[['rows', 'unmatched']].sum().reset_index()
+    return out[out['unmatched'] > 0]
+
+
+def main():
+    """Key sets of every available source, then each merge of 01, 05 and 06."""
+
+    print("=" * 60)
+    print("MERGE KEY COVERAGE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    frames = {}
+    for name, spec in SOURCES.items():
+        path = Path(spec['file'])
+        if name == 'caps' and not path.exists() and CAPS_FILE.exists():
+            spec = dict(spec, file=CAPS_FILE)
+            path = CAPS_FILE
+        if not path.exists():
+            print(f"  {name:<16s} not available - skipping")
+            continue
+        try:
+            frames[name] = read_keys(spec)
+        except KeyError as e:
+            print(f"  {name:<16s} {e.args[0]} in {path.name} - skipping")
+            continue
+        print(f"  {name:<16s} {len(frames[name]):>10,} rows  ({path.name})")
+    read_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    xwalk = frames.get('zip_county', frames.get('zcta_crosswalk'))
+    lookup = zip_county_lookup(xwalk) if xwalk is not None else None
+    if 'caps' in frames and lookup is not None and 'county' not in frames['caps']:
+        z = frames['caps']['zip'].to_numpy()
+        frames['caps']['county'] = np.where(z >= 0, lookup[np.maximum(z, 0)], -1)
+
+    rows, unmatched = [], []
+    keysets = {}
+    for label, master, using, key in MERGES:
+        if master not in frames or using not in frames:
+            continue
+        if any(k not in frames[master] or k not in frames[using] for k in key):
+            continue
+        m_codes = merge_codes(frames[master], key)
+        for name, codes in ((master, m_codes), (using, merge_codes(frames[using], key))):
+            keysets.setdefault((name, key), KeySet(name, codes))
+        m_set, u_set = keysets[(master, key)], keysets[(using, key)]
+        rows.append({'merge': label, 'master': master, 'using': using, 'key': ' x '.join(key),
+                     **check_merge(m_set, u_set, key)})
+        by = unmatched_by(frames[master], m_codes, u_set, state_of(frames[master], lookup))
+        unmatched.append(by.assign(merge=label))
+
+    overlaps = {}
+    for kind in (('zip',), ('county',), ('tract',), ('county', 'year'), ('zip', 'year')):
+        have = {name: KeySet(name, merge_codes(f, kind)) for name, f in frames.items()
+                if all(k in f for k in kind)}
+        if len(have) > 1:
+            overlaps['_'.join(kind)] = overlap_matrix(have)
+    check_seconds = time.perf_counter() - start
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    coverage = pd.DataFrame(rows)
+    for r in rows:
+        print(f"\n{r['merge']}  ({r['master']} -> {r['using']} on {r['key']})")
+        print(f"  matched {r['matched_rows']:,} of {r['master_rows']:,} rows "
+              f"({r['match_rate']:.1%}); {r['unmatched_keys']:,} unmatched keys, "
+              f"{r['using_only_keys']:,} using-only keys")
+        if r['master_missing_key']:
+            print(f"  {r['master_missing_key']:,} master rows with a missing key")
+        if r['m1_hazard_keys']:
+            print(f"  HAZARD: {r['m1_hazard_keys']:,} matched keys repeat in "
+                  f"{r['using']} (merge m:1 stops; m:m would add "
+                  f"{r['mm_extra_rows']:,} rows), e.g. {r['hazard_examples']}")
+    if rows:
+        coverage.to_csv(RESULTS_DIR / "merge_coverage.csv", index=False, float_format='%.6f')
+    if unmatched:
+        by = pd.concat(unmatched, ignore_index=True)[['merge', 'year', 'state', 'rows', 'unmatched']]
+        by.to_csv(RESULTS_DIR / "merge_unmatched.csv", index=False)
+        worst = by.sort_values('unmatched', ascending=False).head(10)
+        print("\nLargest unmatched cells (merge, year, state):")
+        print(worst.to_string(index=False))
+    for kind, M in overlaps.items():
+        M.to_csv(RESULTS_DIR / f"key_overlap_{kind}.csv", float_format='%.4f')
+        print(f"\nKey overlap ({kind.replace('_', ' x ')}; share of row keys found in column):")
+        print(M.to_string(float_format=lambda v: f"{v:.3f}"))
+
+    print(f"\nRead key columns in {read_seconds:.2f}s, checked {len(rows)} merges "
+          f"in {check_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
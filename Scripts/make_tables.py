@@ -0,0 +1,166 @@
+"""
+Regression Tables from the Results Store
+Purpose: Re-estimate (only where data or spec changed) and write the LaTeX
+         tables of 06_regression_analysis.do in esttab format, from the
+         results store instead of numbers copied from Stata logs.
+Date: October 2026
+
+Usage:
+    python make_tables.py            # estimate changed specs, write tables
+    python make_tables.py --no-estimate   # render from stored results only
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py, results_store.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+
+Output files:
+    - Results/table2_banking_access.tex
+    - Results/table4_social_capital.tex
+"""
+
+import sys
+from pathlib import Path
+
+from caps_panel import caps_fingerprint, read_caps
+from results_store import ResultsStore, lazy
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+RESULTS_DIR = ROOT / "Results"
+
+# Interactions built in 06_regression_analysis.do
+DERIVED = {
+    'closure_x_fintech': 'closure_zip * fintech_share',
+    'closure_x_banking_desert': 'closure_zip * banking_desert',
+    'closure_x_branches': 'closure_zip * branches_per_10k',
+    'closure_x_econ_connect': 'closure_zip * economic_connectedness',
+    'closure_x_broadband': 'closure_zip * pct_broadband',
+}
+
+
+def spec(*regressors, outcome='anytoise'):
+    """Baseline specification of 06: absorb(mergerID year) cluster(county_fips)."""
+    return {
+        'outcome': outcome,
+        'regressors': list(regressors),
+        'derived': {r: DERIVED[r] for r in regressors if r in DERIVED},
+        'fe': ['mergerID', 'year'],
+        'cluster': 'county_fips',
+    }
+
+
+TABLES = {
+    'table2_banking_access': {
+        'title': 'Banking Access and Incorporated Self-Employment',
+        'keep': ['closure_zip', 'branches_per_10k', 'closure_x_branches',
+                 'banking_desert', 'closure_x_banking_desert'],
+        'columns': [
+            ('Baseline', spec('closure_zip')),
+            ('+Branches', spec('closure_zip', 'branches_per_10k')),
+            ('+Interaction', spec('closure_zip', 'branches_per_10k', 'closure_x_branches')),
+            ('Banking Desert', spec('closure_zip', 'banking_desert', 'closure_x_banking_desert')),
+        ],
+    },
+    'table4_social_capital': {
+        'title': 'Social Capital and Digital Access',
+        'keep': ['closure_zip', 'economic_connectedness', 'closure_x_econ_connect',
+                 'pct_broadband', 'closure_x_broadband'],
+        'columns': [
+            ('Econ Connect', spec('closure_zip', 'economic_connectedness', 'closure_x_econ_connect')),
+            ('Broadband', spec('closure_zip', 'pct_broadband', 'closure_x_broadband')),
+            ('Combined', spec('closure_zip', 'economic_connectedness', 'closure_x_econ_connect',
+                              'pct_broadband', 'closure_x_broadband')),
+        ],
+    },
+}
+
+
+def stars(p):
+    if p < 0.01:
+        return r'\sym{***}'
+    if p < 0.05:
+        return r'\sym{**}'
+    if p < 0.10:
+        return r'\sym{*}'
+    return ''
+
+
+def esttab_tex(results, mtitles, keep, title):
+    """LaTeX table in the layout of `esttab ..., b(4) se(4) star(* 0.10 ** 0.05 *** 0.01)`."""
+    k = len(results)
+    esc = lambda s: s.replace('_', r'\_')
+    lines = [
+        r'\begin{table}[htbp]\centering',
+        r'\def\sym#1{\ifmmode^{#1}\else\(^{#1}\)\fi}',
+        rf'\caption{{{title}}}',
+        rf'\begin{{tabular}}{{l*{{{k}}}{{c}}}}',
+        r'\hline\hline',
+        '            ' + ''.join(rf'&\multicolumn{{1}}{{c}}{{({i + 1})}}' for i in range(k)) + r'\\',
+        '            ' + ''.join(rf'&\multicolumn{{1}}{{c}}{{{m}}}' for m in mtitles) + r'\\',
+        r'\hline',
+    ]
+    rows = []
+    for var in keep:
+        b_cells, se_cells = [], []
+        for res in results:
+            if var in res.names:
+                i = res.names.index(var)
+                b, se, p = res.coef[i], res.se[i], res.pvalue[i]
+                if se > 0:
+                    b_cells.append(f"{b:12.4f}{stars(p):<9s}")
+                    se_cells.append(f"{'(' + format(se, '.4f') + ')':>12s}         ")
+                else:
+                    # Omitted (collinear) coefficient, as esttab prints it
+                    b_cells.append(f"{0.0:12.4f}         ")
+                    se_cells.append(f"{'(.)':>12s}         ")
+            else:
+                b_cells.append(' ' * 21)
+                se_cells.append(' ' * 21)
+        rows.append(f"{esc(var):<12s}&" + '&'.join(b_cells) + r'\\' + '\n'
+                    + ' ' * 12 + '&' + '&'.join(se_cells) + r'\\')
+    lines.append('\n[1em]\n'.join(rows))
+    lines += [
+        r'\hline',
+        r'\(N\)       &' + '&'.join(f"{res.nobs:12d}         " for res in results) + r'\\',
+        r'\hline\hline',
+        rf'\multicolumn{{{k + 1}}}{{l}}{{\footnotesize Standard errors in parentheses}}\\',
+        rf'\multicolumn{{{k + 1}}}{{l}}{{\footnotesize \sym{{*}} \(p<0.10\), \sym{{**}} \(p<0.05\), \sym{{***}} \(p<0.01\)}}\\',
+        r'\end{tabular}',
+        r'\end{table}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def main(estimate=True):
+    """Estimate changed specs through the store and write every table."""
+
+    print("=" * 60)
+    print("REGRESSION TABLES")
+    print("=" * 60)
+
+    store = ResultsStore()
+    if estimate:
+        data_fp = caps_fingerprint(store, CAPS_FILE)
+        load = lazy(lambda: read_caps(path=CAPS_FILE))
+
+    for name, table in TABLES.items():
+        labels = [f"{name}/c{i + 1}" for i in range(len(table['columns']))]
+        if estimate:
+            for label, (_, col_spec) in zip(labels, table['columns']):
+                store.estimate(label, col_spec, data_fp, load)
+        results = [store.load(label) for label in labels]
+
+        out = RESULTS_DIR / f"{name}.tex"
+        out.write_text(esttab_tex(results, [m for m, _ in table['columns']],
+                                  table['keep'], table['title']))
+        print(f"Saved {out.name}")
+
+    print(f"\nStore: {store.hits} cached, {store.misses} estimated")
+
+
+if __name__ == "__main__":
+    main(estimate='--no-estimate' not in sys.argv)
@@ -0,0 +1,526 @@
+"""
+Analysis Pipeline Runner
+Purpose: Run the Do-files and Python scripts of the project as one dependency
+         graph: every step declares the files it reads and writes, steps
+         whose inputs are ready run concurrently up to a core limit, and a
+         step is skipped when the content hash of its inputs (and its own
+         source) is unchanged since its last successful run.
+Date: October 2026
+
+Usage:
+    python pipeline.py                      # run every stale step
+    python pipeline.py --dry-run            # show what would run
+    python pipeline.py --jobs 4             # at most 4 steps at a time
+    python pipeline.py 15_randomization_inference event_study
+                                            # these steps and their upstream
+    python pipeline.py --force 17_event_study
+    python pipeline.py --list               # steps, inputs and outputs
+
+Requirements:
+    - Stata (batch mode; set STATA if the executable is not `stata-mp`)
+    - Python packages of the individual scripts
+
+Input files:
+    - the inputs declared in STEPS below
+
+Output files:
+    - Results/pipeline/cache.json        (input hash of each step's last
+                                          successful run, file digests)
+    - Results/pipeline/runs.csv          (one row per step and run: status,
+                                          wall time, peak memory)
+    - Results/pipeline/logs/<step>.out   (console output of each step)
+    - Results/pipeline/logs/<step>.log   (Stata batch log of each Do-file)
+
+Notes:
+    - The DAG is built from the declared files: a step depends on the step
+      that writes one of its inputs. Editing 15_randomization_inference.do
+      changes only that step's hash, so only that step reruns; rebuilding
+      caps_geographic_merged.dta with different content reruns everything
+      below it, and an upstream rerun that writes identical files does not.
+    - Peak memory is the maximum resident set size of the step's process
+      tree, from wait4().
+    - Stata batch mode exits with status 0 even when the do-file stops on an
+      error, so a Stata step also fails if its batch log ends in `r(###);`.
+    - 01-03 and 04_merge_geographic_data.do are the earlier template chain,
+      superseded by 04_prepare_geographic_data.do and 05_merge_caps_geographic.do;
+      06_regression_analysis.do is left out because make_tables.py writes
+      the same tables. fix_county_fips.do and check_*.do are one-off fixes.
+    - Step inputs missing on disk are hashed as missing, so a step that
+      guards an optional file with `cap confirm file` still runs.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+PIPELINE_DIR = ROOT / "Results" / "pipeline"
+CACHE_FILE = PIPELINE_DIR / "cache.json"
+RUNS_FILE = PIPELINE_DIR / "runs.csv"
+LOG_DIR = PIPELINE_DIR / "logs"
+
+STATA = os.environ.get('STATA', 'stata-mp')
+
+# Raw CAPS panel, kept outside the project folder (as $caps in 05)
+CAPS_RAW = Path(os.environ.get('CAPS_RAW', ROOT.parent / "Review SEj" / "Data" / "working_feb24.dta"))
+
+# Files shared by many steps
+MERGED = "Data/caps_geographic_merged.dta"
+FINTECH_COUNTY = "Data/fintech_county_clean.dta"
+BANKING = "Data/Banking_Deserts/banking_access_county.dta"
+BROADBAND = "Data/Broadband/broadband_zip.dta"
+GEO_PREPARED = [
+    "Data/Crosswalks/zip_county.dta",
+    "Data/Social_Capital/social_capital_zip.dta",
+    FINTECH_COUNTY,
+    "Data/Food_Access/food_access_county.dta",
+    BROADBAND,
+    "Data/Dollar_Stores/dollar_stores_county.dta",
+    BANKING,
+]
+PANEL = "Data/caps_panel/meta.json"
+ENGINE = ["Scripts/fe_regression.py", "Scripts/caps_panel.py", PANEL]
+STORE = ENGINE + ["Scripts/results_store.py"]
+CBP_PANEL = "Data/CBP/cbp_county_panel.dta"
+
+# One entry per step: the script it runs, the files it reads (glob patterns
+# allowed) and the files it writes. The script itself is always an input.
+STEPS = [
+    # --- Data preparation ---
+    {'run': "Scripts/zcta_crosswalk.py",
+     'inputs': ["Data/Crosswalks/zcta_county_full.csv"],
+     'outputs': ["Data/Crosswalks/zcta_county_primary.csv",
+                 "Data/Crosswalks/zcta_county.xwalk/slot.npy"]},
+    {'run': "Scripts/process_hmda_fintech.py",
+     'inputs': ["Data/HMDA/LAR/hmda_*_nationwide.csv",
+                "Data/HMDA/fintech_respondent_ids.txt",
+                "Data/Fintech_Classification/fintech_xlsx/fintech_classification.xlsx",
+                "Data/Crosswalks/tract_zip_crosswalk.csv"],
+     'outputs': ["Data/HMDA/hmda_fintech_tract_year.csv",
+                 "Data/HMDA/hmda_fintech_zip_year.csv"]},
+    {'run': "Do-files/04_prepare_geographic_data.do",
+     'inputs': ["Data/Crosswalks/zcta_county_primary.csv",
+                "Data/Social_Capital/social_capital_zip.csv",
+                "Data/Fintech_Classification/fintech_county_shares.csv",
+                "Data/Food_Access/food_access_atlas_2019.csv",
+                "Data/Broadband/broadband_zcta_2019.csv",
+                "Data/Dollar_Stores/dollar_stores_county_2019.csv",
+                "Data/Banking_Deserts/banking_access_county_2023.csv"],
+     'outputs': GEO_PREPARED},
+    {'run': "Scripts/geo_store.py",
+     'inputs': GEO_PREPARED[1:]},
+    {'run': "Scripts/key_coverage.py",
+     'inputs': [CAPS_RAW, "Data/Crosswalks/zcta_county_primary.csv",
+                "Data/Crosswalks/tract_zip_crosswalk.csv",
+                "Data/HMDA/hmda_fintech_tract_year.csv",
+                "Data/HMDA/hmda_fintech_zip_year.csv"] + GEO_PREPARED,
+     'outputs': ["Results/merge_coverage.csv", "Results/merge_unmatched.csv"]},
+    {'run': "Do-files/05_merge_caps_geographic.do",
+     'inputs': [CAPS_RAW] + GEO_PREPARED,
+     'outputs': [MERGED]},
+    {'run': "Scripts/caps_panel.py",
+     'inputs': [MERGED],
+     'outputs': [PANEL]},
+
+    # --- Scores and linkage ---
+    {'run': "Do-files/05_fintech_creditworthiness_analysis.do",
+     'inputs': [MERGED],
+     'outputs': ["Results/caps_fintech_scores.dta",
+                 "Results/creditworthiness_validation.csv",
+                 "Results/all_regressions.tex"]},
+    {'run': "Scripts/fintech_scores.py",
+     'inputs': ["Results/caps_fintech_scores.dta"],
+     'outputs': ["Results/fintech_score_variants.csv"]},
+    {'run': "Do-files/06_caps_hmda_linkage.do",
+     'inputs': [MERGED, "Data/HMDA/hmda_fintech_zip_year.csv",
+                "Data/HMDA/LAR/hmda_*_nationwide.csv",
+                "Data/Fintech_Classification/fintech_lenders.dta",
+                "Data/Crosswalks/tract_zip_crosswalk.dta"],
+     'outputs': ["Data/caps_hmda_analysis.dta",
+                 "Output/Tables/hmda_linkage_results.tex"]},
+
+    # --- Main tables and diagnostics ---
+    {'run': "Scripts/make_tables.py",
+     'inputs': [MERGED] + STORE,
+     'outputs': ["Results/table2_banking_access.tex",
+                 "Results/table4_social_capital.tex"]},
+    {'run': "Do-files/07_robustness_checks.do",
+     'inputs': [MERGED],
+     'outputs': ["Results/tableR1_identification.tex"]},
+    {'run': "Do-files/08_sample_diagnostics.do",
+     'inputs': [MERGED]},
+    {'run': "Scripts/sample_diagnostics.py",
+     'inputs': [MERGED] + ENGINE,
+     'outputs': ["Results/sample_construction.tex",
+                 "Results/sample_attrition.tex",
+                 "Results/banking_desert_variation.tex",
+                 "Results/county_year_means.csv"]},
+    {'run': "Do-files/16_attrition_analysis.do",
+     'inputs': [MERGED]},
+
+    # --- Robustness branches (each depends only on the merged panel) ---
+    {'run': "Do-files/09_leave_one_out.do",
+     'inputs': [MERGED]},
+    {'run': "Do-files/10_loo_quick.do",
+     'inputs': [MERGED]},
+    {'run': "Do-files/11_county_level_analysis.do",
+     'inputs': ["Data/CBP/cbp*co.txt", FINTECH_COUNTY, BANKING],
+     'outputs': [CBP_PANEL]},
+    {'run': "Scripts/county_panel.py",
+     'inputs': [MERGED, "Data/Fintech_Classification/fintech_county_shares.csv",
+                "Data/CBP/cbp*co.txt", CBP_PANEL, BANKING] + ENGINE,
+     'outputs': ["Results/county_year_panel.csv", "Results/cbp_county_panel.csv"]},
+    {'run': "Do-files/12_broadband_iv_analysis.do",
+     'inputs': [MERGED, BROADBAND]},
+    {'run': "Scripts/iv_regression.py",
+     'inputs': [MERGED, BROADBAND] + ENGINE},
+    {'run': "Do-files/13_heterogeneity_analysis.do",
+     'inputs': [MERGED]},
+    {'run': "Scripts/heterogeneity.py",
+     'inputs': [MERGED, BANKING] + ENGINE,
+     'outputs': ["Output/heterogeneity_batch.csv"]},
+    {'run': "Do-files/14_dose_response.do",
+     'inputs': [MERGED, BANKING]},
+    {'run': "Do-files/15_randomization_inference.do",
+     'inputs': [MERGED, BANKING]},
+    {'run': "Do-files/17_event_study.do",
+     'inputs': [MERGED]},
+    {'run': "Scripts/event_study.py",
+     'inputs': [MERGED] + STORE,
+     'outputs': ["Output/event_study_coefs.csv"]},
+    {'run': "Do-files/18_home_equity_mechanism.do",
+     'inputs': [MERGED]},
+    {'run': "Do-files/19_sba_cra_outcomes.do",
+     'inputs': ["Data/SBA/sba_loans_county.dta",
+                "Data/CRA/cra_small_business_county.dta",
+                CBP_PANEL,
+                "Data/Fintech_Classification/fintech_county_lending.dta",
+                FINTECH_COUNTY, BANKING]},
+    {'run': "Do-files/20_specification_curve.do",
+     'inputs': [MERGED],
+     'outputs': ["Output/specification_curve_results.csv"]},
+    {'run': "Scripts/specification_curve.py",
+     'inputs': [MERGED] + STORE,
+     'outputs': ["Output/specification_curve.csv"]},
+
+    # --- Figures ---
+    {'run': "Output/build_figures.py",
+     'inputs': ["Output/plot_*.py",
+                "Output/event_study_coefs.csv",
+                "Output/specification_curve.csv"]},
+]
+
+RUN_FIELDS = ['started', 'step', 'status', 'seconds', 'peak_mb', 'returncode']
+
+
+def step_name(step):
+    return step.get('name', Path(step['run']).stem)
+
+
+def _paths(patterns):
+    """Expand declared files (ROOT-relative, absolute, or glob) to sorted paths."""
+    paths = []
+    for p in patterns:
+        p = Path(p)
+        full = p if p.is_absolute() else ROOT / p
+        if any(ch in str(p) for ch in '*?['):
+            matches = sorted(full.parent.glob(full.name))
+            paths.extend(matches if matches else [full])
+        else:
+            paths.append(full)
+    return paths
+
+
+def build_graph(steps=STEPS):
+    """name -> step, and name -> set of upstream step names.
+
+    Raises ValueError if two steps write the same file or the graph has a cycle.
+    """
+    by_name, producer = {}, {}
+    for step in steps:
+        name = step_name(step)
+        if name in by_name:
+            raise ValueError(f"duplicate step name {name}")
+        by_name[name] = step
+        for path in _paths(step.get('outputs', [])):
+            if path in producer:
+                raise ValueError(f"{path} is written by both {producer[path]} and {name}")
+            producer[path] = name
+
+    deps = {}
+    for name, step in by_name.items():
+        reads = _paths(step.get('inputs', []))
+        deps[name] = {producer[p] for p in reads if p in producer and producer[p] != name}
+    topological_order(deps)
+    return by_name, deps
+
+
+def topological_order(deps):
+    """Step names with every step after its upstream steps (Kahn's algorithm)."""
+    remaining = {name: set(d) for name, d in deps.items()}
+    order = []
+    ready = sorted(name for name, d in remaining.items() if not d)
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        del remaining[name]
+        for other, d in remaining.items():
+            if name in d:
+                d.discard(name)
+                if not d:
+                    ready.append(other)
+    if remaining:
+        raise ValueError(f"dependency cycle among: {', '.join(sorted(remaining))}")
+    return order
+
+
+def upstream(names, deps):
+    """The named steps and every step they (transitively) depend on."""
+    todo, seen = list(names), set()
+    while todo:
+        name = todo.pop()
+        if name not in seen:
+            seen.add(name)
+            todo.extend(deps[name])
+    return seen
+
+
+class FileDigests:
+    """sha256 of files, re-read only when a file's size or mtime changed."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def __call__(self, path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return 'missing'
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        key = str(path)
+        if key in self.known and self.known[key][0] == stamp:
+            return self.known[key][1]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        self.known[key] = [stamp, h.hexdigest()]
+        return self.known[key][1]
+
+
+def step_hash(step, digest):
+    """Hash of a step's command, its script and the current bytes of its inputs."""
+    h = hashlib.sha256()
+    h.update(json.dumps({'run': step['run'], 'args': step.get('args', [])}).encode())
+    for path in _paths([step['run']] + list(step.get('inputs', []))):
+        h.update(f"{path.relative_to(ROOT) if path.is_relative_to(ROOT) else path}\0".encode())
+        h.update(digest(path).encode())
+    return h.hexdigest()
+
+
+def outputs_exist(step):
+    return all(p.exists() for p in _paths(step.get('outputs', [])))
+
+
+def command(step):
+    script = ROOT / step['run']
+    if script.suffix == '.do':
+        return [STATA, '-b', 'do', str(script)]
+    return [sys.executable, str(script)] + step.get('args', [])
+
+
+def read_cache():
+    if CACHE_FILE.exists():
+        return json.loads(CACHE_FILE.read_text())
+    return {'steps': {}, 'files': {}}
+
+
+def write_cache(cache):
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_suffix('.tmp')
+    tmp.write_text(json.dumps(cache, indent=1, sort_keys=True))
+    tmp.replace(CACHE_FILE)
+
+
+def _stata_error(step):
+    """Error code at the end of a Stata batch log, or None."""
+    log = LOG_DIR / f"{Path(step['run']).stem}.log"
+    if not log.exists():
+        return None
+    with open(log, 'rb') as f:
+        f.seek(max(0, log.stat().st_size - 4096))
+        tail = f.read().decode(errors='replace')
+    codes = re.findall(r'^r\((\d+)\);\s*$', tail, flags=re.M)
+    return int(codes[-1]) if codes else None
+
+
+def run_step(step):
+    """Run one step to completion; returns (returncode, seconds, peak MB)."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(LOG_DIR / f"{step_name(step)}.out", 'wb') as log:
+        # Stata batch mode writes <do-file>.log into the working directory
+        proc = subprocess.Popen(command(step), cwd=LOG_DIR, stdout=log,
+                                stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_mb = usage.ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    if returncode == 0 and step['run'].endswith('.do'):
+        code = _stata_error(step)
+        if code is not None:
+            returncode = code
+    return returncode, seconds, peak_mb
+
+
+def plan(names=None, steps=STEPS):
+    """(order, deps, steps) restricted to `names` and their upstream steps."""
+    by_name, deps = build_graph(steps)
+    if names:
+        unknown = set(names) - set(by_name)
+        if unknown:
+            raise SystemExit(f"Unknown step(s): {', '.join(sorted(unknown))}")
+        keep = upstream(names, deps)
+    else:
+        keep = set(by_name)
+    order = [n for n in topological_order(deps) if n in keep]
+    return order, {n: deps[n] & keep for n in order}, by_name
+
+
+def run(names=None, force=False, jobs=None, dry_run=False, steps=STEPS):
+    """Run every stale step of the graph, independent steps in parallel.
+
+    A step becomes ready when all of its upstream steps have finished; its
+    hash is taken at that moment, so it sees the files they just wrote.
+    Returns {step: status} with status 'ran', 'skipped', 'failed' or 'blocked'.
+    """
+    order, deps, by_name = plan(names, steps)
+    forced = set(names or order) if force else set()
+    cache = read_cache()
+    digest = FileDigests(cache['files'])
+    jobs = jobs or os.cpu_count()
+
+    if dry_run:
+        will_run = set()
+        for name in order:
+            step = by_name[name]
+            fresh = (name not in forced and not deps[name] & will_run
+                     and cache['steps'].get(name) == step_hash(step, digest)
+                     and outputs_exist(step))
+            if not fresh:
+                will_run.add(name)
+            after = ', '.join(sorted(deps[name])) or '-'
+            print(f"  {'run ' if not fresh else 'skip'}  {name:<42s} after: {after}")
+        print(f"\n{len(will_run)} of {len(order)} steps would run")
+        return {n: ('run' if n in will_run else 'skipped') for n in order}
+
+    started = datetime.now().isoformat(timespec='seconds')
+    status, hashes, records = {}, {}, []
+    waiting = list(order)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while waiting or running:
+            for name in list(waiting):
+                if not deps[name] <= status.keys():
+                    continue
+                waiting.remove(name)
+                step = by_name[name]
+                if any(status[d] in ('failed', 'blocked') for d in deps[name]):
+                    status[name] = 'blocked'
+                    records.append([started, name, 'blocked', '', '', ''])
+                    print(f"  {name:<42s} blocked")
+                    continue
+                hashes[name] = step_hash(step, digest)
+                if (name not in forced and cache['steps'].get(name) == hashes[name]
+                        and outputs_exist(step)):
+                    status[name] = 'skipped'
+                    records.append([started, name, 'skipped', '', '', ''])
+                    print(f"  {name:<42s} up to date")
+                    continue
+                running[pool.submit(run_step, step)] = name
+                print(f"  {name:<42s} started")
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    returncode, seconds, peak_mb = future.result()
+                except OSError as exc:
+                    returncode, seconds, peak_mb = -1, 0.0, 0.0
+                    print(f"  {name:<42s} could not start: {exc}")
+                ok = returncode == 0
+                status[name] = 'ran' if ok else 'failed'
+                if ok:
+                    cache['steps'][name] = hashes[name]
+                else:
+                    cache['steps'].pop(name, None)
+                records.append([started, name, status[name], f"{seconds:.2f}",
+                                f"{peak_mb:.1f}", returncode])
+                note = '' if ok else f"  FAILED ({returncode}), see {LOG_DIR / name}.out"
+                print(f"  {name:<42s} {seconds:8.2f}s {peak_mb:9.1f} MB{note}")
+                # Persist after every step so an interrupted run keeps its progress
+                cache['files'] = digest.known
+                write_cache(cache)
+
+    cache['files'] = digest.known
+    write_cache(cache)
+    new_file = not RUNS_FILE.exists()
+    with open(RUNS_FILE, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(RUN_FIELDS)
+        writer.writerows(records)
+
+    counts = {s: sum(v == s for v in status.values()) for s in ('ran', 'skipped', 'failed', 'blocked')}
+    print(f"\n{counts['ran']} ran, {counts['skipped']} up to date, "
+          f"{counts['failed']} failed, {counts['blocked']} blocked "
+          f"in {time.perf_counter() - t0:.2f}s")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline.")
+    parser.add_argument('names', nargs='*', help="steps to bring up to date (default: all)")
+    parser.add_argument('--force', action='store_true', help="rerun the named steps (or all)")
+    parser.add_argument('--jobs', type=int, default=None, help="steps run at the same time")
+    parser.add_argument('--dry-run', action='store_true', help="show the plan, run nothing")
+    parser.add_argument('--list', action='store_true', help="list steps and their files")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ANALYSIS PIPELINE")
+    print("=" * 60)
+
+    if args.list:
+        order, deps, by_name = plan(args.names)
+        for name in order:
+            step = by_name[name]
+            print(f"\n{name}  ({step['run']})")
+            print(f"  after:   {', '.join(sorted(deps[name])) or '-'}")
+            for p in step.get('inputs', []):
+                print(f"  reads:   {p}")
+            for p in step.get('outputs', []):
+                print(f"  writes:  {p}")
+        return
+
+    status = run(args.names, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    if any(s in ('failed', 'blocked') for s in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Content-Addressed Results Store
+Purpose: Keep regression results (coefficients, variance matrix, N, fit
+         statistics) keyed by a hash of (data snapshot, spec definition,
+         estimator options), so estimation scripts only compute specs whose
+         inputs changed and table / figure generators read stored numbers
+         instead of values copied from Stata logs.
+Date: October 2026
+
+Usage:
+    from results_store import ResultsStore, lazy
+
+    store = ResultsStore()
+    data_fp = store.fingerprint(CAPS_FILE)
+    load = lazy(lambda: pd.read_stata(CAPS_FILE))
+    res = store.estimate('table2/c1', SPEC, data_fp, load)   # hit or compute
+    res = store.load('table2/c1')                            # read only
+
+Requirements:
+    - numpy, pandas
+    - fe_regression.py (same folder)
+
+Layout (Results/store/):
+    objects/ab/abcd....json   one result per key
+    labels.json               label -> key of the most recent estimate
+    fingerprints.json         file hashes memoized by (size, mtime)
+
+A spec is a plain dict, for example:
+    {'outcome': 'anytoise',
+     'regressors': ['closure_zip', 'closure_x_branches'],
+     'derived': {'closure_x_branches': 'closure_zip * branches_per_10k'},
+     'sample': 'year >= 2010 & year <= 2014',
+     'fe': ['mergerID', 'year'], 'cluster': 'county_fips'}
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fe_regression import FEResult, feols
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+STORE_DIR = ROOT / "Results" / "store"
+
+# Bump when estimator code changes in a way that alters results
+ENGINE_VERSION = 3
+
+
+def canonical_json(obj):
+    """Deterministic JSON for hashing (sorted keys, no whitespace)."""
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_fingerprint(df):
+    """SHA-256 of a DataFrame's column names, dtypes and values."""
+    h = hashlib.sha256()
+    h.update(canonical_json([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def spec_key(data_fp, spec, options=None):
+    """Store key for one estimate."""
+    payload = {'data': data_fp, 'spec': spec, 'options': options or {},
+               'engine': ENGINE_VERSION}
+    return hashlib.sha256(canonical_json(payload).encode()).hexdigest()
+
+
+def lazy(loader):
+    """Wrap a data loader so it runs at most once, and only if needed."""
+    cache = []
+
+    def load():
+        if not cache:
+            cache.append(loader())
+        return cache[0]
+    return load
+
+
+def result_to_dict(res):
+    """JSON-serializable form of an FEResult."""
+    extra = {k: v for k, v in res.extra.items()
+             if isinstance(v, (str, int, float, bool, type(None)))}
+    return {
+        'names': list(res.names),
+        'coef': np.asarray(res.coef, dtype=float).tolist(),
+        'vcov': np.asarray(res.vcov, dtype=float).tolist(),
+        'nobs': int(res.nobs),
+        'df_resid': int(res.df_resid),
+        'df_absorbed': int(res.df_absorbed),
+        'n_clusters': None if res.n_clusters is None else int(res.n_clusters),
+        'r2_within': float(res.r2_within),
+        'vce': res.vce,
+        'extra': extra,
+    }
+
+
+def result_from_dict(d):
+    return FEResult(names=d['names'], coef=np.array(d['coef'], dtype=float),
+                    vcov=np.array(d['vcov'], dtype=float).reshape(len(d['names']), len(d['names'])),
+                    nobs=d['nobs'], df_resid=d['df_resid'], df_absorbed=d['df_absorbed'],
+                    n_clusters=d['n_clusters'], r2_within=d['r2_within'], vce=d['vce'],
+                    extra=d.get('extra', {}))
+
+
+def run_spec(df, spec):
+    """Estimate one spec dict with feols."""
+    df = df.copy() if spec.get('derived') else df
+    for name, expr in (spec.get('derived') or {}).items():
+        df[name] = df.eval(expr)
+    if spec.get('sample'):
+        df = df.query(spec['sample'])
+    fe = [df[f] for f in spec.get('fe') or []]
+    cluster = df[spec['cluster']] if spec.get('cluster') else None
+    return feols(df[spec['outcome']], df[spec['regressors']], fe=fe, cluster=cluster,
+                 names=spec['regressors'])
+
+
+class ResultsStore:
+    """Results keyed by content hash, with human-readable labels."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.labels_file = self.root / "labels.json"
+        self.fingerprints_file = self.root / "fingerprints.json"
+        self.hits = 0
+        self.misses = 0
+
+    def _read_json(self, path):
+        return json.loads(path.read_text()) if path.exists() else {}
+
+    def _write_json(self, path, obj):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(obj, indent=1, sort_keys=True))
+        tmp.replace(path)
+
+    def path(self, key):
+        return self.objects / key[:2] / f"{key}.json"
+
+    def fingerprint(self, *paths):
+        """Combined content hash of data files, memoized by size and mtime."""
+        memo = self._read_json(self.fingerprints_file)
+        parts = []
+        changed = False
+        for p in paths:
+            p = Path(p).resolve()
+            st = p.stat()
+            stamp = f"{st.st_size}:{st.st_mtime_ns}"
+            entry = memo.get(str(p))
+            if entry is None or entry['stamp'] != stamp:
+                entry = {'stamp': stamp, 'sha256': file_fingerprint(p)}
+                memo[str(p)] = entry
+                changed = True
+            parts.append(entry['sha256'])
+        if changed:
+            self._write_json(self.fingerprints_file, memo)
+        return parts[0] if len(parts) == 1 else hashlib.sha256(''.join(parts).encode()).hexdigest()
+
+    def has(self, key):
+        return self.path(key).exists()
+
+    def get(self, key):
+        p = self.path(key)
+        return result_from_dict(json.loads(p.read_text())['result']) if p.exists() else None
+
+    def put(self, key, result, label=None, spec=None, options=None, data_fp=None):
+        record = {'key': key, 'label': label, 'data': data_fp, 'spec': spec,
+                  'options': options or {}, 'result': result_to_dict(result)}
+        self._write_json(self.path(key), record)
+
+    def set_labels(self, mapping):
+        labels = self._read_json(self.labels_file)
+        if any(labels.get(k) != v for k, v in mapping.items()):
+            labels.update(mapping)
+            self._write_json(self.labels_file, labels)
+
+    def load(self, label):
+        """Most recent result stored under a label (KeyError if never estimated)."""
+        labels = self._read_json(self.labels_file)
+        res = self.get(labels[label])
+        if res is None:
+            raise KeyError(f"Store object for {label} is missing")
+        return res
+
+    def fetch(self, label, spec, data_fp, compute, options=None):
+        """Stored result for (data, spec, options), computing it only on a miss."""
+        key = spec_key(data_fp, spec, options)
+        res = self.get(key)
+        if res is None:
+            self.misses += 1
+            res = compute()
+            self.put(key, res, label=label, spec=spec, options=options, data_fp=data_fp)
+        else:
+            self.hits += 1
+        self.set_labels({label: key})
+        return res
+
+    def estimate(self, label, spec, data_fp, load_data, options=None):
+        """feols estimate of a spec dict; `load_data` is only called on a miss."""
+        return self.fetch(label, spec, data_fp, lambda: run_spec(load_data(), spec), options)
+
+    def estimate_many(self, specs, data_fp, load_data, options=None):
+        """{label: spec} -> {label: result}, computing only the changed specs."""
+        return {label: self.estimate(label, spec, data_fp, load_data, options)
+                for label, spec in specs.items()}
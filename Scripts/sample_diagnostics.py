@@ -0,0 +1,506 @@
+"""
+Streaming Sample Diagnostics
+Purpose: Compute the sample diagnostics of 08_sample_diagnostics.do and the
+         attrition summaries of 16_attrition_analysis.do (sample construction
+         counts, composition, within-merger SDs, county-year means, ever-pre /
+         ever-post flags, balance tests) in one streaming pass over the CAPS
+         panel, and write the tables of Paper/appendix_sample_diagnostics.tex.
+Date: October 2026
+
+Usage:
+    python sample_diagnostics.py
+
+    from sample_diagnostics import StreamingStats
+    stats = StreamingStats([
+        {'name': 'n_full', 'stat': 'count'},
+        {'name': 'bd_by_merger', 'stat': 'sd', 'var': 'banking_desert', 'by': ['mergerID']},
+        {'name': 'ever_post', 'stat': 'any', 'var': 'post_period', 'by': ['indivID']},
+    ], derived={'post_period': 'year >= 2010 & year <= 2014'})
+    stats.run(CAPS_FILE)
+    stats['bd_by_merger']          # one row per mergerID: n, mean, sd, min, max
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+
+Output files:
+    - Results/sample_construction.tex     (Table tab:sample of the appendix;
+                                           overwrites the checked-in copy)
+    - Results/sample_attrition.tex        (attrition and balance, from 16)
+    - Results/banking_desert_variation.tex
+    - Results/county_year_means.csv       (the county-year collapse of 08)
+
+Notes:
+    - Every statistic is a dict: name, stat (count, sum, mean, sd, min, max,
+      any, all, nunique), var, by (list of variables, default ungrouped) and
+      where (an expression for DataFrame.eval). All of them are accumulated
+      chunk by chunk in the same pass; means and SDs are merged across
+      chunks with the pairwise Welford update, so no chunk is read twice.
+    - Rows with a missing `by` value are left out of that statistic.
+    - SDs use the n - 1 denominator, as `sum` and `egen sd()` in Stata.
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats as sps
+
+from caps_panel import CapsPanel, open_caps
+from fe_regression import factorize, feols, singleton_mask
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+RESULTS_DIR = ROOT / "Results"
+
+CHUNKSIZE = 250_000
+
+# Variables built from the raw panel before any statistic (08 and 16)
+DERIVED = {
+    'pre_period': 'year >= 2003 & year <= 2009',
+    'post_period': 'year >= 2010 & year <= 2014',
+}
+
+STEP_2 = 'anytoise.notna()'
+STEP_3 = STEP_2 + ' & year >= 2010 & year <= 2014'
+STEP_4 = STEP_3 + ' & fintech_share.notna()'
+# Estimation sample of the fintech regressions of 08 (reghdfe anytoise
+# closure_zip ..., absorb(mergerID year) cluster(county_fips)) before singletons
+STEP_5 = STEP_4 + ' & mergerID.notna() & closure_zip.notna() & county_fips.notna()'
+
+BALANCE_VARS = ['anytoise', 'anytouse', 'closure_zip']
+
+
+def diagnostics():
+    """Statistics of 08 (sections 1, 2, 6) and 16 (parts 2-4)."""
+    specs = [
+        # 08 section 1: sample construction
+        {'name': 'n_full', 'stat': 'count'},
+        {'name': 'n_outcome', 'stat': 'count', 'where': STEP_2},
+        {'name': 'n_window', 'stat': 'count', 'where': STEP_3},
+        {'name': 'n_fintech', 'stat': 'count', 'where': STEP_4},
+        # Cells that share every fixed effect: singletons are dropped from these
+        {'name': 'fe_cells', 'stat': 'count', 'by': ['mergerID', 'year', 'indivID', 'county_fips'],
+         'where': STEP_5},
+        {'name': 'fe_closure', 'stat': 'count', 'by': ['mergerID', 'year'],
+         'where': STEP_5 + ' & closure_zip < 0'},
+        {'name': 'n_by_year', 'stat': 'count', 'by': ['year']},
+        # 08 section 2: composition of the fintech sample
+        {'name': 'individuals', 'stat': 'nunique', 'var': 'indivID', 'where': STEP_4},
+        {'name': 'counties', 'stat': 'nunique', 'var': 'county_fips', 'where': STEP_4},
+        {'name': 'mergers', 'stat': 'nunique', 'var': 'mergerID', 'where': STEP_4},
+        {'name': 'closure_obs', 'stat': 'count', 'where': STEP_4 + ' & closure_zip < 0'},
+        {'name': 'closure_zip', 'stat': 'mean', 'var': 'closure_zip', 'where': STEP_4},
+        # 08 section 6: within-merger variation of banking_desert, county-year collapse
+        {'name': 'merger_rows', 'stat': 'count', 'by': ['mergerID']},
+        {'name': 'bd_by_merger', 'stat': 'sd', 'var': 'banking_desert', 'by': ['mergerID']},
+        # 16 part 2: ever-pre / ever-post by individual
+        {'name': 'ever_pre', 'stat': 'any', 'var': 'pre_period', 'by': ['indivID']},
+        {'name': 'ever_post', 'stat': 'any', 'var': 'post_period', 'by': ['indivID']},
+    ]
+    for v in ['anytoise', 'closure_zip', 'banking_desert', 'fintech_share']:
+        specs.append({'name': f"county_year_{v}", 'stat': 'mean', 'var': v,
+                      'by': ['county_fips', 'year']})
+    for v in BALANCE_VARS:
+        # 16 part 3: pre and post means (`sum ... if pre_period == 1 & anytoise != .`)
+        specs.append({'name': f"balance_{v}", 'stat': 'sd', 'var': v, 'by': ['post_period'],
+                      'where': STEP_2 + ' & (pre_period | post_period)'})
+        # and `ttest v, by(period)` on every row, so years outside both
+        # windows count as period 0
+        specs.append({'name': f"ttest_{v}", 'stat': 'sd', 'var': v, 'by': ['post_period']})
+        # 16 part 4: pre-period moments per individual, pooled by attrition status later
+        specs.append({'name': f"pre_{v}", 'stat': 'sd', 'var': v, 'by': ['indivID'],
+                      'where': STEP_2 + ' & pre_period'})
+    return specs
+
+
+# ----------------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------------
+
+def combine_moments(n_a, mean_a, M2_a, n_b, mean_b, M2_b):
+    """Pooled count, mean and M2 of two sets of groups (pairwise Welford)."""
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    w = np.divide(n_b, n, out=np.zeros_like(mean_a), where=n > 0)
+    return n, mean_a + delta * w, M2_a + M2_b + delta ** 2 * n_a * w
+
+
+class _Groups:
+    """Stable integer codes for group keys seen across chunks."""
+
+    def __init__(self, by):
+        self.by = by
+        self.index = None
+
+    def codes(self, frame):
+        if len(self.by) == 1:
+            keys = pd.Index(frame[self.by[0]].to_numpy())
+        else:
+            keys = pd.MultiIndex.from_arrays([frame[b].to_numpy() for b in self.by])
+        new = keys.unique()
+        if self.index is None:
+            self.index = new
+        else:
+            new = new[self.index.get_indexer(new) < 0]
+            if len(new):
+                self.index = self.index.append(new)
+        return self.index.get_indexer(keys), len(self.index)
+
+
+class StreamingStats:
+    """Grouped statistics accumulated over a panel in one pass."""
+
+    def __init__(self, specs, derived=None):
+        self.specs = {s['name']: s for s in specs}
+        self.derived = derived or {}
+        self.groups = {}
+        self.acc = {}
+        self.nrows = 0
+        for s in specs:
+            by = tuple(s.get('by') or ())
+            if s['stat'] == 'nunique':
+                by = (s['var'],)
+            if by and by not in self.groups:
+                self.groups[by] = _Groups(list(by))
+            self.acc[s['name']] = {}
+            self._grow(self.acc[s['name']], 0 if by else 1)
+
+    def columns(self):
+        """Raw variables the statistics need (for a selective read)."""
+        names = set()
+        for s in self.specs.values():
+            names.update(s.get('by') or ())
+            if s.get('var'):
+                names.add(s['var'])
+            if s.get('where'):
+                names.update(_identifiers(s['where']))
+        for expr in self.derived.values():
+            names.update(_identifiers(expr))
+        return sorted(names - set(self.derived))
+
+    def update(self, chunk):
+        """Fold one chunk into every statistic."""
+        chunk = chunk.copy()
+        for name, expr in self.derived.items():
+            chunk[name] = chunk.eval(expr, engine='python')
+        self.nrows += len(chunk)
+
+        masks = {}
+        codes = {}
+        for name, s in self.specs.items():
+            where = s.get('where')
+            if where not in masks:
+                masks[where] = (np.ones(len(chunk), dtype=bool) if where is None else
+                                chunk.eval(where, engine='python').to_numpy(dtype=bool, copy=True))
+            keep = masks[where].copy()
+            by = tuple(s.get('by') or ())
+            if s['stat'] == 'nunique':
+                by = (s['var'],)
+            for b in by:
+                keep &= chunk[b].notna().to_numpy()
+
+            var = s.get('var') if s['stat'] not in ('count', 'nunique') else None
+            if var is not None:
+                x = chunk[var].to_numpy(dtype=float)
+                keep &= ~np.isnan(x)
+                x = x[keep]
+            else:
+                x = np.zeros(keep.sum())
+
+            if by:
+                key = (by, where, var)
+                if key not in codes:
+                    codes[key] = self.groups[by].codes(chunk.loc[keep])
+                g, G = codes[key]
+            else:
+                g, G = np.zeros(len(x), dtype=np.intp), 1
+            self._fold(self.acc[name], g, G, x)
+
+    @staticmethod
+    def _grow(acc, G):
+        """Extend the accumulators to G groups."""
+        for k, fill in (('n', 0.0), ('mean', 0.0), ('M2', 0.0), ('nonzero', 0.0),
+                        ('min', np.inf), ('max', -np.inf)):
+            have = acc.get(k, np.zeros(0))
+            if len(have) < G or k not in acc:
+                acc[k] = np.r_[have, np.full(G - len(have), fill)]
+
+    def _fold(self, acc, g, G, x):
+        self._grow(acc, G)
+        acc['nonzero'] += np.bincount(g, weights=(x != 0).astype(float), minlength=G)
+        n_b = np.bincount(g, minlength=G).astype(float)
+        s = np.bincount(g, weights=x, minlength=G)
+        mean_b = np.divide(s, n_b, out=np.zeros(G), where=n_b > 0)
+        M2_b = np.bincount(g, weights=(x - mean_b[g]) ** 2, minlength=G)
+        acc['n'], acc['mean'], acc['M2'] = combine_moments(acc['n'], acc['mean'], acc['M2'],
+                                                           n_b, mean_b, M2_b)
+        np.minimum.at(acc['min'], g, x)
+        np.maximum.at(acc['max'], g, x)
+
+    def run(self, source, chunksize=CHUNKSIZE):
+        """Stream a .dta file or a CapsPanel (reading only the needed columns)
+        or a DataFrame."""
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), chunksize):
+                self.update(source.iloc[start:start + chunksize])
+        elif isinstance(source, CapsPanel):
+            for chunk in source.chunks(self.columns(), chunksize):
+                self.update(chunk)
+        else:
+            with pd.read_stata(source, columns=self.columns(), chunksize=chunksize,
+                               convert_categoricals=False) as reader:
+                for chunk in reader:
+                    self.update(chunk)
+        return self
+
+    def __getitem__(self, name):
+        """Result table of one statistic: n, mean, sd, min, max (+ sum, any, all)."""
+        s = self.specs[name]
+        acc = self.acc[name]
+        by = s.get('by') or ([s['var']] if s['stat'] == 'nunique' else None)
+        index = self.groups[tuple(by)].index if by else None
+        if index is not None:
+            self._grow(acc, len(index))
+        n = acc['n']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sd = np.where(n > 1, np.sqrt(acc['M2'] / (n - 1)), np.nan)
+        empty = n == 0
+        table = pd.DataFrame({
+            'n': n.astype(np.int64),
+            'mean': np.where(empty, np.nan, acc['mean']),
+            'sd': sd,
+            'min': np.where(empty, np.nan, acc['min']),
+            'max': np.where(empty, np.nan, acc['max']),
+        })
+        table['sum'] = table['mean'] * table['n']
+        table['any'] = acc['nonzero'] > 0
+        table['all'] = (acc['nonzero'] == n) & ~empty
+        if by:
+            if index is None:
+                table = table.iloc[:0]
+            else:
+                table.index = index
+                table.index.names = by
+        return table
+
+    def value(self, name):
+        """Scalar result of an ungrouped statistic (or a grouped nunique)."""
+        s = self.specs[name]
+        if s['stat'] == 'nunique':
+            return int((self[name]['n'] > 0).sum())
+        row = self[name].iloc[0]
+        return row['n'] if s['stat'] == 'count' else row[s['stat']]
+
+
+def _identifiers(expr):
+    """Variable names in an eval expression."""
+    words = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expr))
+    return words - {'notna', 'isna', 'and', 'or', 'not', 'True', 'False'}
+
+
+# ----------------------------------------------------------------------------
+# Post-processing (all on small per-group tables)
+# ----------------------------------------------------------------------------
+
+def ttest(n1, m1, sd1, n2, m2, sd2):
+    """Two-sample t-test with equal variances, as Stata's `ttest, by()`."""
+    df = n1 + n2 - 2
+    sp2 = ((n1 - 1) * sd1 ** 2 + (n2 - 1) * sd2 ** 2) / df
+    t = (m1 - m2) / np.sqrt(sp2 * (1 / n1 + 1 / n2))
+    return t, 2 * sps.t.sf(abs(t), df)
+
+
+def pooled(table, mask):
+    """n, mean, sd of the union of the groups selected by mask."""
+    t = table[np.asarray(mask) & (table['n'] > 0).to_numpy()]
+    n = t['n'].to_numpy(float)
+    mean = t['mean'].to_numpy()
+    M2 = (t['sd'].fillna(0) ** 2 * np.maximum(n - 1, 0)).to_numpy()
+    N = n.sum()
+    if N == 0:
+        return 0, np.nan, np.nan
+    grand = (n * mean).sum() / N
+    M2_total = M2.sum() + (n * (mean - grand) ** 2).sum()
+    return int(N), grand, np.sqrt(M2_total / (N - 1)) if N > 1 else np.nan
+
+
+def attrition(stats):
+    """Individuals by period presence (16 part 2)."""
+    pre = stats['ever_pre']['any']
+    post = stats['ever_post']['any'].reindex(pre.index, fill_value=False)
+    return {'in_both': int((pre & post).sum()), 'pre_only': int((pre & ~post).sum()),
+            'post_only': int((~pre & post).sum()), 'total': len(pre)}
+
+
+def within_merger(stats):
+    """Within-mergerID SD of banking_desert, averaged as `sum bd_sd` after egen."""
+    sd = stats['bd_by_merger']['sd']
+    rows = stats['merger_rows']['n'].reindex(sd.index)
+    ok = sd.notna()
+    return {'groups': int(ok.sum()),
+            'mean_sd': float((sd[ok] * rows[ok]).sum() / rows[ok].sum()) if ok.any() else np.nan,
+            'share_zero': float((sd[ok] == 0).mean()) if ok.any() else np.nan}
+
+
+def fe_sample(stats):
+    """Observations, individuals, counties, merger groups and closure
+    observations of the absorb(mergerID year) sample after reghdfe's
+    iterative singleton drop, from the mergerID x year x indivID x county cells."""
+    cells = stats['fe_cells']
+    cells = cells[cells['n'] > 0]
+    n = cells['n'].to_numpy()
+    keys = cells.index.to_frame(index=False)
+    fe_codes = [np.repeat(factorize(keys[b])[0], n) for b in ('mergerID', 'year')]
+    dropped = singleton_mask(fe_codes)
+    # Rows of a cell share both fixed effects, so a cell is kept or dropped whole
+    kept = ~dropped[np.cumsum(n) - n]
+    k = keys[kept]
+    closure = stats['fe_closure']['n']
+    cells_my = pd.MultiIndex.from_frame(k[['mergerID', 'year']]).unique()
+    return {'obs': int(n[kept].sum()), 'singletons': int(n[~kept].sum()),
+            'individuals': k['indivID'].nunique(), 'counties': k['county_fips'].nunique(),
+            'mergers': k['mergerID'].nunique(),
+            'closure_obs': int(closure.reindex(cells_my, fill_value=0).sum())}
+
+
+def fmt(n):
+    return f"{n:,.0f}"
+
+
+def construction_tex(rows, fe):
+    lines = [r'\begin{table}[h]', r'\centering', r'\caption{Sample Construction}',
+             r'\label{tab:sample}', r'\begin{tabular}{lc}', r'\toprule',
+             r'Step & Observations \\', r'\midrule']
+    lines += [f"{label} & {fmt(n)} \\\\" for label, n in rows[:-1]]
+    lines += [f"{rows[-1][0]} & \\textbf{{{fmt(rows[-1][1])}}} \\\\"]
+    lines += [r'\bottomrule', r'\end{tabular}', r'\begin{tablenotes}', r'\small',
+              r'\item \textit{Notes:} The final sample is the estimation sample of the fintech '
+              r'regressions, absorb(mergerID year) with singletons dropped iteratively as in '
+              f"reghdfe. It contains {fmt(fe['individuals'])} unique individuals across "
+              f"{fmt(fe['counties'])} counties and {fmt(fe['mergers'])} merger groups; "
+              f"{fmt(fe['closure_obs'])} of its observations experienced a closure.",
+              r'\end{tablenotes}', r'\end{table}']
+    return '\n'.join(lines) + '\n'
+
+
+def attrition_tex(counts, balance, selection):
+    lines = [r'\begin{table}[h]', r'\centering', r'\caption{Attrition and Period Balance}',
+             r'\label{tab:attrition}', r'\begin{tabular}{lccc}', r'\toprule',
+             r'\multicolumn{4}{l}{\textit{Panel A: Individuals by period observed}} \\',
+             r'\midrule']
+    lines += [f"Both periods & {fmt(counts['in_both'])} & & \\\\",
+              f"Pre-period only (attriters) & {fmt(counts['pre_only'])} & & \\\\",
+              f"Post-period only (entrants) & {fmt(counts['post_only'])} & & \\\\",
+              f"Total & {fmt(counts['total'])} & & \\\\", r'\midrule',
+              r'\multicolumn{4}{l}{\textit{Panel B: Pre (2003-2009) vs post (2010-2014)}} \\',
+              r'Variable & Pre & Post & p-value \\', r'\midrule']
+    lines += [f"{v.replace('_', chr(92) + '_')} & {a:.3f} & {b:.3f} & {p:.3f} \\\\"
+              for v, a, b, p in balance]
+    lines += [r'\midrule',
+              r'\multicolumn{4}{l}{\textit{Panel C: Pre-period, attriters vs stayers}} \\',
+              r'Variable & Attriters & Stayers & p-value \\', r'\midrule']
+    lines += [f"{v.replace('_', chr(92) + '_')} & {a:.3f} & {b:.3f} & {p:.3f} \\\\"
+              for v, a, b, p in selection]
+    lines += [r'\bottomrule', r'\end{tabular}', r'\begin{tablenotes}', r'\small',
+              r'\item \textit{Notes:} Panel B means are over 2003-2009 and 2010-2014 rows with '
+              r'non-missing anytoise; the p-value is the two-sample t-test of 2010-2014 against '
+              r'all other years, as \texttt{ttest, by(period)} in 16\_attrition\_analysis.do.',
+              r'\end{tablenotes}', r'\end{table}']
+    return '\n'.join(lines) + '\n'
+
+
+def variation_tex(w):
+    lines = [r'\begin{table}[h]', r'\centering',
+             r'\caption{Within-Merger Variation in Banking Desert Status}',
+             r'\label{tab:bdvariation}', r'\begin{tabular}{lc}', r'\toprule',
+             f"Merger groups & {fmt(w['groups'])} \\\\",
+             f"Mean within-mergerID SD & {w['mean_sd']:.4f} \\\\",
+             f"Share of groups with no variation & {w['share_zero']:.3f} \\\\",
+             r'\bottomrule', r'\end{tabular}', r'\end{table}']
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    """One pass over CAPS, then the appendix tables."""
+
+    print("=" * 60)
+    print("SAMPLE DIAGNOSTICS (single pass)")
+    print("=" * 60)
+
+    stats = StreamingStats(diagnostics(), derived=DERIVED).run(open_caps(CAPS_FILE))
+    print(f"Read {stats.nrows:,} rows once")
+
+    # Sample construction (08 section 1)
+    fe = fe_sample(stats)
+    rows = [
+        ('Full CAPS sample', stats.value('n_full')),
+        ('Non-missing outcome (anytoise)', stats.value('n_outcome')),
+        ('Restrict to 2010-2014 (CAPS-fintech overlap)', stats.value('n_window')),
+        ('Non-missing fintech share', stats.value('n_fintech')),
+        ('After mergerID and year FE (singletons dropped)', fe['obs']),
+    ]
+    print("\nSample construction:")
+    for label, n in rows:
+        print(f"  {label:<48s} {fmt(n):>10s}")
+
+    # Composition (08 section 2)
+    print("\nFintech sample composition:")
+    for name in ('individuals', 'counties', 'mergers'):
+        print(f"  Unique {name:<12s} {stats.value(name):>8,}")
+    print(f"  Observations with closure_zip < 0: {stats.value('closure_obs'):,.0f}")
+    print(f"FE sample: {fe['obs']:,} observations ({fe['singletons']:,} singletons dropped), "
+          f"{fe['individuals']:,} individuals, {fe['counties']:,} counties, {fe['mergers']:,} mergers")
+
+    # Attrition and balance (16 parts 2-4)
+    counts = attrition(stats)
+    print(f"\nIndividuals: both {counts['in_both']:,}, pre only {counts['pre_only']:,}, "
+          f"post only {counts['post_only']:,}, total {counts['total']:,}")
+
+    balance, selection = [], []
+    status = stats['ever_post']['any']
+    for v in BALANCE_VARS:
+        b, t = stats[f"balance_{v}"], stats[f"ttest_{v}"]
+        if all(x in tab.index for x in (False, True) for tab in (b, t)):
+            pre, post = t.loc[False], t.loc[True]
+            _, p = ttest(pre['n'], pre['mean'], pre['sd'], post['n'], post['mean'], post['sd'])
+            balance.append((v, b.loc[False, 'mean'], b.loc[True, 'mean'], p))
+
+        t = stats[f"pre_{v}"]
+        stayer = status.reindex(t.index, fill_value=False).to_numpy()
+        a = pooled(t, ~stayer)
+        s = pooled(t, stayer)
+        if a[0] > 1 and s[0] > 1:
+            _, p = ttest(*a, *s)
+            selection.append((v, a[1], s[1], p))
+
+    # Within-merger variation and county-year collapse (08 section 6)
+    w = within_merger(stats)
+    print(f"\nWithin-mergerID SD of banking_desert: mean {w['mean_sd']:.4f}, "
+          f"{100 * w['share_zero']:.1f}% of groups with none")
+
+    collapse = pd.concat({v: stats[f"county_year_{v}"]['mean'] for v in
+                          ['anytoise', 'closure_zip', 'banking_desert', 'fintech_share']},
+                         axis=1).reset_index()
+    collapse.to_csv(RESULTS_DIR / "county_year_means.csv", index=False, float_format='%.6f')
+    collapse['closure_x_desert'] = collapse['closure_zip'] * collapse['banking_desert']
+    res = feols(collapse['anytoise'], collapse[['closure_zip', 'banking_desert', 'closure_x_desert']],
+                fe=[collapse['year']], cluster=collapse['county_fips'],
+                names=['closure_zip', 'banking_desert', 'closure_x_desert'])
+    print("\nCounty-level analysis (absorb(year) cluster(county_fips)):")
+    print(res.summary())
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    (RESULTS_DIR / "sample_construction.tex").write_text(construction_tex(rows, fe))
+    (RESULTS_DIR / "sample_attrition.tex").write_text(attrition_tex(counts, balance, selection))
+    (RESULTS_DIR / "banking_desert_variation.tex").write_text(variation_tex(w))
+    print(f"\nSaved appendix tables to: {RESULTS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Specification Curve Estimation
+Purpose: Estimate the specifications of 20_specification_curve.do through the
+         results store and write the table the specification-curve figures
+         read (replaces the hand-copied numbers in Output/plot_*.py)
+Date: October 2026
+
+Usage:
+    python specification_curve.py
+
+Requirements:
+    - numpy, pandas, scipy
+    - caps_panel.py, fe_regression.py, results_store.py (same folder)
+
+Input files:
+    - Data/caps_geographic_merged.dta
+
+Output files:
+    - Output/specification_curve.csv  (spec_id, spec_desc, coef, se, pval,
+                                       n_obs, baseline, feature indicators)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from caps_panel import caps_fingerprint, read_caps
+from results_store import ResultsStore, lazy
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CAPS_FILE = ROOT / "Data" / "caps_geographic_merged.dta"
+OUTPUT_FILE = ROOT / "Output" / "specification_curve.csv"
+
+KEY_VAR = 'closure_x_fintech'
+ANALYSIS_SAMPLE = 'year >= 2010 & year <= 2014'
+
+
+def spec(fe=(), cluster=None, outcome='anytoise', sample=None):
+    """Closure x fintech model of 20_specification_curve.do."""
+    return {
+        'outcome': outcome,
+        'regressors': ['closure_zip', 'fintech_share', KEY_VAR],
+        'derived': {KEY_VAR: 'closure_zip * fintech_share'},
+        'sample': ANALYSIS_SAMPLE + (f' & {sample}' if sample else ''),
+        'fe': list(fe),
+        'cluster': cluster,
+    }
+
+
+# (description, spec, baseline)
+SPECS = [
+    ('No FE, robust', spec(), False),
+    ('Year FE, robust', spec(['year']), False),
+    ('MergerID FE, robust', spec(['mergerID']), False),
+    ('MergerID+Year FE, robust', spec(['mergerID', 'year']), False),
+    ('County FE, robust', spec(['county_fips']), False),
+    ('BASELINE: MergerID+Year, county cluster', spec(['mergerID', 'year'], 'county_fips'), True),
+    ('MergerID+Year FE, mergerID cluster', spec(['mergerID', 'year'], 'mergerID'), False),
+    ('County+Year FE, county cluster', spec(['county_fips', 'year'], 'county_fips'), False),
+    ('Alternative outcome (anytouse)', spec(['mergerID', 'year'], 'county_fips', outcome='anytouse'), False),
+    ('Pre-2012 sample', spec(['mergerID', 'year'], 'county_fips', sample='year <= 2012'), False),
+    ('Post-2012 sample', spec(['mergerID', 'year'], 'county_fips', sample='year >= 2012'), False),
+    ('Individual+Year FE', spec(['indivID', 'year'], 'county_fips'), False),
+]
+
+# Indicator matrix in the bottom panel of the specification curve
+FEATURES = {
+    'mergerid_fe': lambda s: 'mergerID' in s['fe'],
+    'year_fe': lambda s: 'year' in s['fe'],
+    'county_fe': lambda s: 'county_fips' in s['fe'],
+    'individual_fe': lambda s: 'indivID' in s['fe'],
+    'county_cluster': lambda s: s['cluster'] == 'county_fips',
+}
+
+
+def specification_table(store, data_fp, load_data, specs=SPECS):
+    """One row per spec with the key coefficient and feature indicators."""
+    rows = []
+    for i, (desc, s, baseline) in enumerate(specs, start=1):
+        res = store.estimate(f"specification_curve/{i:03d}", s, data_fp, load_data)
+        j = res.names.index(KEY_VAR)
+        row = {'spec_id': i, 'spec_desc': desc, 'coef': res.coef[j], 'se': res.se[j],
+               'pval': res.pvalue[j], 'n_obs': res.nobs, 'baseline': baseline}
+        row.update({name: flag(s) for name, flag in FEATURES.items()})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    """Estimate changed specs and write the specification-curve table."""
+
+    print("=" * 60)
+    print("SPECIFICATION CURVE ANALYSIS")
+    print("=" * 60)
+
+    store = ResultsStore()
+    data_fp = caps_fingerprint(store, CAPS_FILE)
+    load = lazy(lambda: read_caps([
+        'indivID', 'year', 'anytoise', 'anytouse', 'closure_zip', 'fintech_share',
+        'mergerID', 'county_fips'], CAPS_FILE))
+
+    table = specification_table(store, data_fp, load)
+    table.to_csv(OUTPUT_FILE, index=False, float_format='%.6f')
+    print(f"Saved {len(table)} specifications to: {OUTPUT_FILE}")
+    print(f"Store: {store.hits} cached, {store.misses} estimated")
+
+    print("\n" + table[['spec_id', 'spec_desc', 'coef', 'se', 'pval', 'n_obs']].round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Compiled ZCTA-County Crosswalk
+Purpose: Compile zcta_county_full.csv into a compact, memory-mappable
+         crosswalk: the primary county of each ZCTA (largest
+         land-area overlap) plus the full land-area weight distribution, and
+         look up millions of ZIPs at once without re-parsing any CSV.
+Date: October 2026
+
+Usage:
+    python zcta_crosswalk.py          # compile, and write zcta_county_primary.csv
+
+    from zcta_crosswalk import Crosswalk
+    xw = Crosswalk()                  # memory-mapped, loads nothing up front
+    county = xw.county(df['zip'])     # int32 county FIPS, -1 if not a ZCTA
+    rows, counties, weights = xw.weights(df['zip'])   # area-weight CSR
+
+Requirements:
+    - numpy, pandas
+
+Input files:
+    - Data/Crosswalks/zcta_county_full.csv  (zcta, county_fips, county_name,
+                                             area_land, ...)
+
+Output files:
+    - Data/Crosswalks/zcta_county.xwalk/    compiled crosswalk (see Layout)
+    - Data/Crosswalks/zcta_county_primary.csv
+
+Layout (zcta_county.xwalk/, all .npy so they open with mmap_mode='r'):
+    zcta.npy      int32[Z]    sorted ZCTA codes
+    slot.npy      int32[1e5]  row of every 5-digit code, -1 if not a ZCTA
+    primary.npy   int32[Z]    primary county FIPS (largest land area)
+    indptr.npy    int64[Z+1]  CSR row pointers into the two arrays below
+    w_county.npy  int32[R]    every overlapping county of each ZCTA
+    w_area.npy    float32[R]  that county's share of the ZCTA's land area
+    names.json    county FIPS -> county name
+
+Notes:
+    - The full CSV is read once into typed arrays and grouped by ZCTA with
+      one lexsort, so compiling holds every relationship row in memory
+      (about 20 bytes per row; the national file has ~47k rows). It is not
+      a bounded-memory stream, which the file size does not call for.
+    - Ties in land area go to the county listed first in the input file,
+      as in the original create_primary_crosswalk.py. The result does not
+      depend on the input being sorted by ZCTA.
+    - A ZCTA with zero total land area gets equal weights.
+"""
+
+import csv
+import json
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Set paths
+ROOT = Path(__file__).resolve().parents[1]
+CROSSWALK_DIR = ROOT / "Data" / "Crosswalks"
+FULL_FILE = CROSSWALK_DIR / "zcta_county_full.csv"
+COMPILED_DIR = CROSSWALK_DIR / "zcta_county.xwalk"
+PRIMARY_FILE = CROSSWALK_DIR / "zcta_county_primary.csv"
+
+ARRAYS = ('zcta', 'slot', 'primary', 'indptr', 'w_county', 'w_area')
+
+# ZIP codes are five digits, so rows are found by direct addressing
+N_CODES = 100_000
+
+
+def to_code(values):
+    """ZIP / FIPS codes (strings with leading zeros, numbers) -> int64, -1 if invalid."""
+    s = pd.Series(values)
+    if s.dtype.kind in 'iu':
+        return s.to_numpy(dtype=np.int64)
+    codes = pd.to_numeric(s, errors='coerce')
+    bad = codes.isna() & s.notna()
+    if bad.any():
+        # ZIP+4 and padded strings: keep the first five digits
+        codes[bad] = pd.to_numeric(s[bad].astype(str).str.strip().str[:5], errors='coerce')
+    return codes.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def compile_crosswalk(full_file=FULL_FILE, out_dir=COMPILED_DIR):
+    """Read the full crosswalk once into arrays, group it in memory and
+    write the compiled arrays."""
+    zcta, county, area = array('i'), array('i'), array('q')
+    names = {}
+    with open(full_file, newline='') as f:
+        for row in csv.DictReader(f):
+            z, c = int(row['zcta']), int(row['county_fips'])
+            zcta.append(z)
+            county.append(c)
+            area.append(int(row['area_land']) if row['area_land'] else 0)
+            names.setdefault(c, row['county_name'])
+
+    zcta = np.frombuffer(zcta, dtype=np.int32)
+    county = np.frombuffer(county, dtype=np.int32)
+    area = np.frombuffer(area, dtype=np.int64)
+
+    # Group by ZCTA, largest area first, input order breaks ties
+    order = np.lexsort((np.arange(len(zcta)), -area, zcta))
+    zcta, county, area = zcta[order], county[order], area[order]
+    starts = np.flatnonzero(np.r_[True, zcta[1:] != zcta[:-1]])
+    indptr = np.r_[starts, len(zcta)].astype(np.int64)
+
+    total = np.add.reduceat(area, starts).astype(float)
+    sizes = np.diff(indptr)
+    total_row = np.repeat(total, sizes)
+    share = np.where(total_row > 0, area / np.where(total_row > 0, total_row, 1),
+                     1.0 / np.repeat(sizes, sizes))
+
+    slot = np.full(N_CODES, -1, dtype=np.int32)
+    slot[zcta[starts]] = np.arange(len(starts), dtype=np.int32)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {'zcta': zcta[starts], 'slot': slot, 'primary': county[starts], 'indptr': indptr,
+              'w_county': county, 'w_area': share.astype(np.float32)}
+    for name in ARRAYS:
+        np.save(out_dir / f"{name}.npy", arrays[name])
+    (out_dir / "names.json").write_text(json.dumps({str(k): v for k, v in sorted(names.items())}))
+    return Crosswalk(out_dir)
+
+
+class Crosswalk:
+    """Memory-mapped ZCTA -> county lookups."""
+
+    def __init__(self, path=COMPILED_DIR):
+        self.path = Path(path)
+        for name in ARRAYS:
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode='r'))
+        self._names = None
+
+    def __len__(self):
+        return len(self.zcta)
+
+    @property
+    def names(self):
+        """County FIPS -> county name (read on first use)."""
+        if self._names is None:
+            self._names = {int(k): v for k, v in
+                           json.loads((self.path / "names.json").read_text()).items()}
+        return self._names
+
+    def index(self, zips):
+        """Row of each ZIP in the crosswalk, -1 where it is not a ZCTA."""
+        codes = to_code(zips)
+        valid = (codes >= 0) & (codes < N_CODES)
+        return np.where(valid, self.slot[np.where(valid, codes, 0)], -1)
+
+    def county(self, zips):
+        """Primary county FIPS of each ZIP (int32, -1 where not found)."""
+        idx = self.index(zips)
+        return np.where(idx >= 0, self.primary[np.maximum(idx, 0)], -1).astype(np.int32)
+
+    def weights(self, zips):
+        """All overlapping counties of each ZIP as a CSR triple.
+
+        Returns (row, counties, weights): row[i] is the position in `zips` of
+        entry i. Unmatched ZIPs contribute no entries.
+        """
+        idx = self.index(zips)
+        rows = np.flatnonzero(idx >= 0)
+        start = self.indptr[idx[rows]]
+        sizes = self.indptr[idx[rows] + 1] - start
+        row = np.repeat(rows, sizes)
+        # Positions start..start+size-1 for every matched ZIP
+        offset = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        pos = np.repeat(start, sizes) + offset
+        return row, self.w_county[pos], self.w_area[pos]
+
+    def primary_frame(self):
+        """zcta, county_fips, county_name table of the primary crosswalk."""
+        county = np.asarray(self.primary)
+        return pd.DataFrame({
+            'zcta': pd.Series(np.asarray(self.zcta)).astype(str).str.zfill(5),
+            'county_fips': pd.Series(county).astype(str).str.zfill(5),
+            'county_name': [self.names[c] for c in county.tolist()],
+        })
+
+
+def main():
+    """Compile the crosswalk and write the primary CSV read by the Do-files."""
+
+    print("=" * 60)
+    print("COMPILING ZCTA-COUNTY CROSSWALK")
+    print("=" * 60)
+
+    xw = compile_crosswalk()
+    print(f"Compiled {len(xw):,} ZCTAs, {len(xw.w_county):,} ZCTA-county pairs to: {xw.path}")
+
+    xw.primary_frame().to_csv(PRIMARY_FILE, index=False)
+    print(f"Created primary crosswalk with {len(xw)} ZCTAs: {PRIMARY_FILE}")
+
+
+if __name__ == "__main__":
+    main()